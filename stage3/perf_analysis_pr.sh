@@ -34,8 +34,24 @@ source /home/intel/oneapi/vtune/2021.1.1/vtune-vars.sh
 # Define o governor de performance para utilizar o máximo de frequência
 cpufreq-set -g performance
 
-# Gera os comandos
-python3 ./src/build_commad.py
+# Converte cada grafo uma única vez para o binário do GAPBS (.sg)
+python3 ./src/cache_grafos.py
 
-# Executa todos os comandos
-./src/commands.sh
\ No newline at end of file
+# Gera os comandos. Com RETOMAR=true (run.slurm, ao continuar um job
+# interrompido) pula as runs que o run_ledger.csv registra como concluídas
+retomar=()
+if [[ "${RETOMAR:-false}" == "true" ]]; then
+  retomar=( --retomar )
+fi
+python3 ./src/build_commad.py "${retomar[@]}" --cache-grafos
+
+# Acompanha a varredura enquanto ela roda (estado parcial em monitor_status.json)
+python3 ./src/monitor.py > monitor.log 2>&1 &
+monitor_pid=$!
+
+# Executa todos os comandos em paralelo (o ./src/commands.sh continua disponível para execução serial)
+python3 ./src/executor.py
+status_executor=$?
+
+kill "$monitor_pid" 2>/dev/null || true
+exit "$status_executor"
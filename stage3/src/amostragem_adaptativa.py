@@ -0,0 +1,174 @@
+"""
+Amostragem adaptativa: número de repetições guiado pelo intervalo de confiança.
+
+Em vez de 5 (VTune) ou 10 (sem VTune) runs fixas por configuração, as runs
+são agendadas em rodadas. Depois de cada rodada os tempos já coletados de cada
+configuração são lidos (Elapsed Time do report.csv com VTune, Average Time do
+log do GAPBS sem VTune) e a configuração para de receber runs quando a largura
+relativa do intervalo de confiança de 95% da média (2 * t * s / sqrt(n) / média)
+fica abaixo do alvo, ou quando atinge o máximo de runs.
+
+Como tudo é lido do disco, a amostragem pode ser interrompida e retomada.
+As rodadas rodam uma run por vez (sem --concorrente), então o IC e as runs
+que faltam são os das runs exclusivas: runs do executor.py --concorrente
+(bind-<política>@<CPUs>) formam outro grupo nas agregações e não contam aqui.
+
+Os comandos são os mesmos do build_commad.py (configs_executaveis e
+build_command), com as mesmas opções --cache-grafos, --limite-threads e
+--sys-root: as políticas socket, cores e interleave recebem -cpu-list e
+-mem-policy, e configurações que esta máquina não comporta são ignoradas.
+
+Uso (a partir de stage3/):
+  python3 ./src/amostragem_adaptativa.py --csv experiments_noVTune.csv --alvo 0.02 [--cache-grafos]
+"""
+
+import argparse
+import math
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import build_commad
+from executor import Executor, nucleos_fisicos, tarefa_de_comando
+from ingestao import ler_report
+from logs_gapbs import ler_log
+
+ALVO_LARGURA = 0.02
+MIN_RUNS = 3
+MAX_RUNS = 20
+LOTE = 2
+
+# Quantis t de Student bicaudais para 95% de confiança, por grau de liberdade
+T_95 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+]
+
+
+def quantil_t95(graus_liberdade: int) -> float:
+    if graus_liberdade <= len(T_95):
+        return T_95[graus_liberdade - 1]
+    return 1.96
+
+
+def largura_relativa_ic(tempos: List[float]) -> float:
+    """Largura do IC de 95% da média dividida pela média (inf com menos de 2 runs)."""
+    n = len(tempos)
+    if n < 2:
+        return math.inf
+    media = statistics.fmean(tempos)
+    if media <= 0:
+        return math.inf
+    meia_largura = quantil_t95(n - 1) * statistics.stdev(tempos) / math.sqrt(n)
+    return 2 * meia_largura / media
+
+
+def tempo_da_run(config: dict, run_id: int) -> Optional[float]:
+    """Tempo de uma run já executada, ou None se ela ainda não tem resultado."""
+    key = build_commad.config_key(config)
+    if config["vtune_enable"].lower() == "true":
+        report = Path(build_commad.run_dir(build_commad.results_root, *key, run_id)) / "report.csv"
+        if not report.is_file():
+            return None
+        for nivel, nome, valor in ler_report(str(report)):
+            if nivel == 0 and nome == "Elapsed Time":
+                try:
+                    return float(valor)
+                except ValueError:
+                    return None
+        return None
+
+    pasta = Path(build_commad.run_dir(build_commad.logs_root, *key, run_id))
+    logs = sorted(pasta.glob("*.log")) if pasta.is_dir() else []
+    if not logs:
+        return None
+    run, _ = ler_log(str(logs[-1]))
+    return run.get("AVERAGE_TIME")
+
+
+def coletar_tempos(config: dict, max_runs: int) -> Dict[int, float]:
+    tempos = {}
+    for run_id in range(1, max_runs + 1):
+        tempo = tempo_da_run(config, run_id)
+        if tempo is not None:
+            tempos[run_id] = tempo
+    return tempos
+
+
+def planejar_rodada(
+    configs: List[Tuple[dict, Optional[Path]]],
+    alvo: float,
+    min_runs: int,
+    max_runs: int,
+    lote: int,
+) -> Tuple[List[str], int]:
+    """
+    Decide as runs da próxima rodada. Devolve (comandos, configurações convergidas).
+    """
+    comandos = []
+    convergidas = 0
+    for config, graph_file in configs:
+        tempos = coletar_tempos(config, max_runs)
+        n = len(tempos)
+        faltando = [i for i in range(1, max_runs + 1) if i not in tempos]
+        if not faltando or (n >= min_runs and largura_relativa_ic(list(tempos.values())) <= alvo):
+            convergidas += 1
+            continue
+        # Até o mínimo de runs de uma vez; depois, de lote em lote
+        quantidade = max(lote, min_runs - n)
+        comandos.extend(build_commad.build_command(config, i, graph_file) for i in faltando[:quantidade])
+    return comandos, convergidas
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Executa o benchmark com número de repetições adaptativo.")
+    parser.add_argument("--csv", default=build_commad.csv_file)
+    parser.add_argument("--alvo", type=float, default=ALVO_LARGURA,
+                        help="Largura relativa máxima do IC de 95%% do tempo (ex.: 0.02 = 2%%)")
+    parser.add_argument("--min-runs", type=int, default=MIN_RUNS)
+    parser.add_argument("--max-runs", type=int, default=MAX_RUNS)
+    parser.add_argument("--lote", type=int, default=LOTE, help="Runs extras por configuração a cada rodada")
+    parser.add_argument("--cores", type=int, default=None)
+    parser.add_argument("--cache-grafos", action="store_true",
+                        help="Usa os .sg já convertidos por cache_grafos.py (-graph-file)")
+    parser.add_argument("--limite-threads", default=None,
+                        help="CSV do modelos_escalabilidade.py; pula threads além de LIMITE_THREADS")
+    parser.add_argument("--sys-root", default=build_commad.sys_root,
+                        help="Raiz do /sys usada para resolver as políticas socket, cores e interleave")
+    args = parser.parse_args(argv)
+    build_commad.sys_root = args.sys_root
+
+    configs = build_commad.configs_executaveis(args.csv, cache_grafos=args.cache_grafos,
+                                               limite_threads=args.limite_threads)
+    nucleos = nucleos_fisicos()
+    if args.cores is not None:
+        nucleos = nucleos[: args.cores]
+
+    t0 = time.time()
+    rodada = 0
+    total_runs = 0
+    while True:
+        comandos, convergidas = planejar_rodada(configs, args.alvo, args.min_runs, args.max_runs, args.lote)
+        print(f"[INFO] Rodada {rodada}: {convergidas}/{len(configs)} configurações concluídas, {len(comandos)} runs agendadas")
+        if not comandos:
+            break
+        if rodada >= args.max_runs:
+            # Cada rodada acrescenta ao menos uma run por configuração pendente;
+            # passar disso significa runs que falham sempre
+            print("[AVISO] Limite de rodadas atingido com configurações pendentes")
+            break
+        falhas = Executor([tarefa_de_comando(c) for c in comandos], nucleos, max(1, len(nucleos) // 2)).executar()
+        if len(falhas) == len(comandos):
+            print("[ERRO] Todas as runs da rodada falharam; abortando")
+            return 1
+        total_runs += len(comandos)
+        rodada += 1
+
+    print(f"[INFO] {total_runs} runs em {rodada} rodadas; tempo total: {time.time() - t0:.1f} segundos")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+"""
+Detecção de runs anômalas (throttling, interferência, ruído) por z-score robusto.
+
+Dentro de cada configuração, o z-score robusto de um valor é
+0.6745 * (x - mediana) / MAD, que não é puxado pelas próprias runs ruins como
+a média e o desvio padrão. Uma run é marcada quando:
+
+  - o tempo (Elapsed Time do VTune ou Average Time do GAPBS) tem z > LIMITE_Z
+    e fica mais que DESVIO_MINIMO acima da mediana (com 5 runs muito
+    parecidas, o MAD é tão pequeno que diferenças irrelevantes dariam z alto);
+  - a Average CPU Frequency cai mais que QUEDA_FREQUENCIA em relação à mediana
+    da configuração;
+  - mais que FRACAO_TRIALS dos seus Trial Time são lentas pelo mesmo critério
+    do tempo, em relação a todas as trials da configuração (a não ser que isso
+    aconteça na maioria das runs da configuração).
+
+Configurações com menos de MIN_RUNS runs não são avaliadas. As runs marcadas
+continuam nas tabelas de amostras (colunas ANOMALIA e MOTIVO, para auditoria),
+mas saem das médias. A lista de reexecução (reexecutar.csv) é lida por
+build_commad.py --reexecutar.
+"""
+
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+LIMITE_Z = 3.5
+QUEDA_FREQUENCIA = 0.05
+FRACAO_TRIALS = 0.25
+DESVIO_MINIMO = 0.05
+MIN_RUNS = 3
+
+COLUNAS_REEXECUTAR = [
+    "GRAPH_NAME", "ANALYSIS_TYPE", "THREADS", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY", "VTUNE_ENABLE", "RUN", "MOTIVO",
+]
+
+
+def z_robusto(df: pd.DataFrame, chaves: List[str], coluna: str) -> pd.Series:
+    """
+    z-score robusto de `coluna` dentro de cada grupo de `chaves` (NaN em
+    grupos com menos de MIN_RUNS valores). Com MAD zero, só valores diferentes
+    da mediana recebem z infinito.
+    """
+    grupos = df.groupby(chaves, observed=True)[coluna]
+    mediana = grupos.transform("median")
+    desvio = (df[coluna] - mediana).abs()
+    mad = desvio.groupby([df[c] for c in chaves], observed=True).transform("median")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = 0.6745 * (df[coluna] - mediana) / mad
+    z = z.where(mad > 0, np.where(desvio > 0, np.inf * np.sign(df[coluna] - mediana), 0.0))
+    return z.where(grupos.transform("count") >= MIN_RUNS)
+
+
+def acima_do_normal(df: pd.DataFrame, chaves: List[str], coluna: str, limite_z: float, desvio_minimo: float) -> Tuple[pd.Series, pd.Series]:
+    """Valores lentos demais: z > limite_z e mais que desvio_minimo acima da mediana. Devolve (marcados, z)."""
+    z = z_robusto(df, chaves, coluna)
+    mediana = df.groupby(chaves, observed=True)[coluna].transform("median")
+    return (z > limite_z) & (df[coluna] > mediana * (1 + desvio_minimo)), z
+
+
+def _juntar_motivos(*motivos: pd.Series) -> pd.Series:
+    texto = motivos[0]
+    for motivo in motivos[1:]:
+        texto = texto.str.cat(motivo, sep=";")
+    return texto.str.replace(r";+", ";", regex=True).str.strip(";")
+
+
+def marcar_anomalias(
+    df: pd.DataFrame,
+    chaves: List[str],
+    coluna_tempo: str,
+    coluna_frequencia: Optional[str] = None,
+    df_trials: Optional[pd.DataFrame] = None,
+    limite_z: float = LIMITE_Z,
+    queda_frequencia: float = QUEDA_FREQUENCIA,
+    fracao_trials: float = FRACAO_TRIALS,
+    desvio_minimo: float = DESVIO_MINIMO,
+) -> pd.DataFrame:
+    """
+    Devolve df (uma linha por run, identificada por chaves + RUN) com as
+    colunas ANOMALIA (bool) e MOTIVO (texto, vazio nas runs normais).
+    """
+    df = df.copy()
+    marcada, z_tempo = acima_do_normal(df, chaves, coluna_tempo, limite_z, desvio_minimo)
+    motivo_tempo = pd.Series(np.where(marcada, "tempo_z=" + z_tempo.round(1).astype(str), ""), index=df.index)
+    motivos = [motivo_tempo]
+
+    if coluna_frequencia is not None and coluna_frequencia in df.columns:
+        mediana = df.groupby(chaves, observed=True)[coluna_frequencia].transform("median")
+        n = df.groupby(chaves, observed=True)[coluna_frequencia].transform("count")
+        queda = (mediana - df[coluna_frequencia]) / mediana
+        marcada = (queda > queda_frequencia) & (n >= MIN_RUNS)
+        motivos.append(pd.Series(np.where(marcada, "queda_freq=" + (queda * 100).round(1).astype(str) + "%", ""), index=df.index))
+
+    if df_trials is not None and not df_trials.empty:
+        trials = df_trials.copy()
+        trials["_LENTA"], _ = acima_do_normal(trials, chaves, "TRIAL_TIME", limite_z, desvio_minimo)
+        fracao = trials.groupby(chaves + ["RUN"], observed=True)["_LENTA"].mean().rename("_FRACAO").reset_index()
+        fracao_run = df[chaves + ["RUN"]].merge(fracao, on=chaves + ["RUN"], how="left")["_FRACAO"].to_numpy()
+        marcada = pd.Series(np.nan_to_num(fracao_run) > fracao_trials, index=df.index)
+        # Se a maioria das runs tem trials lentas, é o comportamento da configuração, não anomalia
+        maioria = marcada.groupby([df[c] for c in chaves], observed=True).transform("mean") > 0.5
+        marcada &= ~maioria
+        texto = "trials_lentas=" + pd.Series(np.round(fracao_run * 100, 0), index=df.index).astype(str) + "%"
+        motivos.append(pd.Series(np.where(marcada, texto, ""), index=df.index))
+
+    df["MOTIVO"] = _juntar_motivos(*motivos)
+    df["ANOMALIA"] = df["MOTIVO"] != ""
+    return df
+
+
+def gravar_reexecucao(df_marcado: pd.DataFrame, destino: Path, vtune_enable: Optional[bool] = None) -> int:
+    """
+    Escreve as runs marcadas no formato lido por build_commad.py --reexecutar.
+    vtune_enable diz de quais runs do CSV de experimentos elas vieram; sem
+    ele, vale a coluna VTUNE_ENABLE de cada run.
+    """
+    df = df_marcado.loc[df_marcado["ANOMALIA"]]
+    if vtune_enable is not None:
+        df = df.assign(VTUNE_ENABLE=vtune_enable)
+    df = df.assign(VTUNE_ENABLE=df["VTUNE_ENABLE"].astype(str).str.lower())
+    df = df.reindex(columns=COLUNAS_REEXECUTAR)
+    df["DISABLE_HYPERTHREADING"] = df["DISABLE_HYPERTHREADING"].astype(str).str.lower()
+    df.to_csv(destino, index=False)
+    return len(df)
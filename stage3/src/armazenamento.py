@@ -0,0 +1,138 @@
+"""
+Armazenamento colunar (Parquet) dos resultados do pipeline.
+
+Cada tabela (amostras por run, agregados, métricas hpc, tempos dos logs...)
+fica em <store>/<tabela>/ particionada por GRAPH_NAME e ANALYSIS_TYPE (quando
+a tabela tem essa coluna), com esquema fixo: colunas de configuração como
+category/bool/int, flags do pipeline (ex.: ANOMALIA) como bool e as métricas
+como float64. Os CSVs antigos passam a ser apenas exportações opcionais.
+
+Ler a fatia de um grafo:
+  carregar_tabela("agregados", colunas=["THREADS", "SPEEDUP"],
+                  filtros=[("GRAPH_NAME", "==", "web-Google")])
+
+Executado como script, importa para o store os CSVs já existentes em stage3/.
+"""
+
+import shutil
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STORE_PADRAO = Path("resultados_store")
+
+PARTICOES = ["GRAPH_NAME", "ANALYSIS_TYPE"]
+
+# Tipos fixos das colunas de configuração; o resto é tratado como métrica (float64)
+COLUNAS_CATEGORICAS = ["GRAPH_NAME", "GRAPH_URL", "ANALYSIS_TYPE", "THREAD_BIND_POLICY"]
+COLUNAS_BOOLEANAS = ["DISABLE_HYPERTHREADING", "LOGS_GAPBS", "VTUNE_ENABLE"]
+COLUNAS_INTEIRAS = ["THREADS", "MAX_ITERS", "RUN"]
+
+# CSVs gerados pelas etapas anteriores -> nome da tabela no store
+CSVS_LEGADOS = {
+    "unified_results.csv": "agregados",
+    "unified_results_noVTune.csv": "agregados_noVTune",
+    "hpc_hw_metrics.csv": "hpc",
+    "logs_average_times.csv": "tempos_logs",
+}
+
+
+def _para_bool(serie: pd.Series) -> pd.Series:
+    # Os CSVs misturam true/True/False; normaliza tudo para bool
+    if serie.dtype == bool:
+        return serie
+    convertida = serie.astype(str).str.strip().str.lower().map({"true": True, "false": False})
+    if convertida.isna().any():
+        invalidos = sorted(serie[convertida.isna()].astype(str).unique())
+        raise ValueError(f"Valores não booleanos na coluna {serie.name}: {invalidos[:5]}")
+    return convertida.astype(bool)
+
+
+def normalizar_tipos(df: pd.DataFrame) -> pd.DataFrame:
+    """Aplica o esquema fixo do store às colunas presentes em df."""
+    df = df.copy()
+    for col in df.columns:
+        if col in COLUNAS_CATEGORICAS:
+            df[col] = df[col].astype(str).astype("category")
+        elif col in COLUNAS_BOOLEANAS:
+            df[col] = _para_bool(df[col])
+        elif col in COLUNAS_INTEIRAS:
+            df[col] = df[col].astype("int32")
+        elif pd.api.types.is_bool_dtype(df[col]):
+            # Flags calculadas pelo pipeline (ex.: ANOMALIA) continuam bool
+            df[col] = df[col].astype(bool)
+        elif not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype(str).astype("category")
+        else:
+            df[col] = df[col].astype("float64")
+    return df
+
+
+def gravar_tabela(df: pd.DataFrame, nome: str, store: Path = STORE_PADRAO) -> Path:
+    """
+    Grava df como a tabela `nome` do store, substituindo o conteúdo anterior.
+    """
+    destino = Path(store) / nome
+    if destino.exists():
+        shutil.rmtree(destino)
+    destino.mkdir(parents=True)
+
+    df = normalizar_tipos(df)
+    particoes = [col for col in PARTICOES if col in df.columns]
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    if particoes:
+        pq.write_to_dataset(tabela, root_path=str(destino), partition_cols=particoes)
+    else:
+        pq.write_table(tabela, str(destino / "dados.parquet"))
+    return destino
+
+
+def carregar_tabela(
+    nome: str,
+    colunas: Optional[List[str]] = None,
+    filtros: Optional[list] = None,
+    store: Path = STORE_PADRAO,
+) -> pd.DataFrame:
+    """
+    Lê a tabela `nome` do store com memory map, trazendo apenas as colunas
+    pedidas e só as partições que satisfazem os filtros (formato do pyarrow,
+    ex.: [("GRAPH_NAME", "==", "web-Google")]).
+    """
+    origem = Path(store) / nome
+    if not origem.exists():
+        raise FileNotFoundError(f"Tabela não encontrada no store: {origem}")
+    tabela = pq.read_table(
+        str(origem),
+        columns=colunas,
+        filters=filtros,
+        memory_map=True,
+        partitioning="hive",
+    )
+    df = tabela.to_pandas()
+    # As partições voltam como dictionary; os inteiros/bools mantêm o tipo gravado
+    for col in PARTICOES:
+        if col in df.columns:
+            df[col] = df[col].astype(str).astype("category")
+    return df
+
+
+def exportar_csv(nome: str, destino: Path, store: Path = STORE_PADRAO) -> None:
+    """Exporta uma tabela do store para CSV (formato das etapas anteriores)."""
+    carregar_tabela(nome, store=store).to_csv(str(destino), sep=",", index=False)
+
+
+def importar_csvs_legados(base_dir: Path, store: Path = STORE_PADRAO) -> None:
+    """Importa para o store os CSVs antigos encontrados em base_dir."""
+    for arquivo, nome in CSVS_LEGADOS.items():
+        caminho = Path(base_dir) / arquivo
+        if not caminho.is_file():
+            continue
+        gravar_tabela(pd.read_csv(str(caminho), sep=","), nome, store=store)
+        print(f"[INFO] {caminho} -> {Path(store) / nome}")
+
+
+if __name__ == "__main__":
+    importar_csvs_legados(Path("."))
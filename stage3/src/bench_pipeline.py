@@ -0,0 +1,342 @@
+"""
+Benchmark do pipeline de pós-processamento com árvores sintéticas.
+
+Gera árvores results/ e logs/ com o mesmo layout do executa_bench.sh
+(<GRAPH_NAME>/<ANALYSIS_TYPE>/threads-X/ht-*/bind-*/run-N/), com a quantidade
+de runs pedida e reports com a hierarquia dos reais de cada análise, e mede
+cada etapa do pipeline sobre elas:
+
+  ingestao      ingerir_reports (sem cache, todos os report.csv)
+  unificacao    unify_all_results.unificar: anomalias, speedup, intervalos de
+                confiança, junção com o experiments.csv e gravação no store
+  metricas_hpc  extrair_metricias_hpc.agregar_metricas_hpc: matriz larga,
+                anomalias, agregação com IC, hpc_runs e hpc no store
+  logs          ingerir_logs e logs_gapbs.processar_logs
+  relatorio     gera_relatorio.py: declarar_alvos e construir sobre o store
+                (todas as figuras e tabelas .tex, em paralelo)
+
+As etapas chamam as mesmas funções que os scripts, então o que é medido é o
+pipeline de verdade. Para cada tamanho e etapa são registrados tempo de
+parede, tempo de CPU (com os workers), o pico de memória da etapa
+(tracemalloc, só o processo principal) e o maior RSS dos workers
+(MAXRSS_FILHOS_MB, ver instrumentacao.py). O resultado vai para
+bench_pipeline.csv, para comparar versões do pipeline antes de rodar uma
+varredura real.
+
+Uso (a partir de stage3/):
+  python3 ./src/bench_pipeline.py --tamanhos 1000 10000 100000 [--dir /tmp/bench_pipeline]
+"""
+
+import argparse
+import math
+import shutil
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from extrair_metricias_hpc import agregar_metricas_hpc
+from gera_relatorio import carregar_tabelas, construir, declarar_alvos
+from ingestao import ingerir_reports
+from instrumentacao import REGISTROS, etapa
+from logs_gapbs import ingerir_logs, processar_logs
+from unify_all_results import unificar
+
+BENCH_DIR = Path("/tmp/bench_pipeline")
+SAIDA_CSV = Path("bench_pipeline.csv")
+TAMANHOS = [1000, 10000]
+RUNS_POR_CONFIG = 5
+
+ANALISES = ["hpc-performance", "hotspots", "performance-snapshot"]
+THREADS = [1, 4, 12, 22, 28, 36, 44, 66, 88]
+HTS = ["true", "false"]
+BINDS = ["close", "spread"]
+
+# Reports no formato do VTune (mesma hierarquia, profundidade e número de linhas
+# dos reports reais de cada análise no nó de dois sockets), com os valores
+# sorteados por run
+_PLATAFORMA = """0\tCollection and Platform Info\t
+1\tApplication Command Line\t/scratch/perf-analysis/stage3/src/gapbs/pr "-f" "./data/{grafo}/{grafo}.sg" "-i" "500" "-t" "1e-6"
+1\tOperating System\t4.19.0-25-amd64 10.13
+1\tComputer Name\tblaise
+1\tResult Size\t{tamanho}
+1\tCollection start time\t01:13:26 05/10/2025 UTC
+1\tCollection stop time\t01:13:28 05/10/2025 UTC
+1\tCollector Type\t{coletor}
+1\tCPU\t
+2\tName\tIntel(R) Xeon(R) Processor code named Broadwell
+2\tFrequency\t2199990019
+2\tLogical CPU Count\t88
+"""
+_INSTRUCOES = """0\tVectorization\t0.0
+1\tInstruction Mix\t
+2\tSP FLOPs\t{sp:.1f}
+3\tPacked\t0.0
+4\t128-bit\t0.0
+4\t256-bit\t0.0
+3\tScalar\t100.0
+2\tDP FLOPs\t0.5
+3\tPacked\t0.0
+4\t128-bit\t0.0
+4\t256-bit\t0.0
+3\tScalar\t100.0
+2\tx87 FLOPs\t0.0
+2\tNon-FP\t{non_fp:.1f}
+1\tFP Arith/Mem Rd Instr. Ratio\t{fp_rd:.6f}
+1\tFP Arith/Mem Wr Instr. Ratio\t{fp_wr:.6f}
+"""
+MODELOS_REPORT = {
+    "hotspots": """Hierarchy Level\tMetric Name\tMetric Value
+0\tElapsed Time\t{tempo:.6f}
+1\tCPU Time\t{cpu:.6f}
+2\tEffective Time\t{cpu:.6f}
+3\tIdle\t0.0
+3\tPoor\t{cpu:.6f}
+3\tOk\t0.0
+3\tIdeal\t0.0
+3\tOver\t0.0
+2\tSpin Time\t0.0
+2\tOverhead Time\t0.0
+1\tTotal Thread Count\t{threads}
+1\tPaused Time\t0.0
+0\tTop Hotspots\t
+0\tFunction\tModule\tCPU Time
+0\tPageRankPullGS._omp_fn.1\tpr\t{cpu_pr:.6f}
+0\tfunc@0x18e20\tlibgomp.so.1\t{cpu_omp:.6f}
+0\tstd::istream::operator>>\tlibstdc++.so.6\t0.923912
+0\tfunc@0x18c90\tlibgomp.so.1\t0.319987
+0\tfunc@0x17b90\tlibgomp.so.1\t0.274099
+0\t[Others]\tN/A\t1.101976
+0\tEffective Physical Core Utilization\t{util_p:.1f}% ({nucleos:.3f} out of 44)
+1\tEffective Logical Core Utilization\t{util_l:.1f}% ({nucleos:.3f} out of 88)
+""" + _PLATAFORMA + """2\tCache Allocation Technology\t
+3\tLevel 2 capability\tnot detected
+3\tLevel 3 capability\tavailable
+""",
+    "hpc-performance": """Hierarchy Level\tMetric Name\tMetric Value
+0\tElapsed Time\t{tempo:.6f}
+1\tSP GFLOPS\t{gflops:.6f}
+1\tDP GFLOPS\t0.0
+1\tx87 GFLOPS\t0.0
+1\tCPI Rate\t{cpi:.6f}
+1\tAverage CPU Frequency\t{freq:.6f}
+1\tTotal Thread Count\t{threads}
+0\tEffective Physical Core Utilization\t{util_p:.1f}% ({nucleos:.3f} out of 44)
+1\tEffective Logical Core Utilization\t{util_l:.1f}% ({nucleos:.3f} out of 88)
+0\tMemory Bound\t{mem:.1f}
+1\tCache Bound\t{cache:.1f}
+1\tDRAM Bound\t{dram:.1f}
+2\tDRAM Bandwidth Bound\t0.0
+1\tNUMA: % of Remote Accesses\t{numa:.1f}
+1\tBandwidth Utilization\t
+1\tBandwidth Domain\tPlatform Maximum\tObserved Maximum\tAverage\t% of Elapsed Time with High BW Utilization(%)
+1\tDRAM, GB/sec\t168.000000\t{bw_max:.6f}\t{bw:.6f}\t0.0
+1\tDRAM Single-Package, GB/sec\t84.000000\t{bw_max:.6f}\t{bw:.6f}\t0.0
+1\tQPI Outgoing, GB/sec\t68.000000\t{bw_max:.6f}\t{bw:.6f}\t0.0
+""" + _INSTRUCOES + _PLATAFORMA + """2\tMax DRAM Single-Package Bandwidth\t84000000000.000000
+""",
+    "performance-snapshot": """Hierarchy Level\tMetric Name\tMetric Value
+0\tElapsed Time\t{tempo:.6f}
+1\tIPC\t{ipc:.6f}
+1\tSP GFLOPS\t{gflops:.6f}
+1\tDP GFLOPS\t0.203433
+1\tx87 GFLOPS\t0.008872
+1\tAverage CPU Frequency\t{freq:.6f}
+0\tEffective Logical Core Utilization\t{util_l:.1f}% ({nucleos:.3f} out of 88)
+1\tEffective Physical Core Utilization\t{util_p:.1f}% ({nucleos:.3f} out of 44)
+0\tMicroarchitecture Usage\t29.4
+1\tRetiring\t29.4
+1\tFront-End Bound\t5.6
+1\tBack-End Bound\t58.6
+2\tMemory Bound\t{mem:.1f}
+2\tCore Bound\t39.6
+1\tBad Speculation\t6.4
+0\tMemory Bound\t{mem:.1f}
+1\tL1 Bound\t18.1
+1\tL2 Bound\t1.1
+1\tL3 Bound\t1.2
+1\tDRAM Bound\t{dram:.1f}
+2\tDRAM Bandwidth Bound\t0.0
+1\tStore Bound\t1.4
+1\tNUMA: % of Remote Accesses\t{numa:.1f}
+""" + _INSTRUCOES + _PLATAFORMA + """2\tMax DRAM Single-Package Bandwidth\t84000000000.000000
+2\tCache Allocation Technology\t
+3\tLevel 2 capability\tnot detected
+3\tLevel 3 capability\tavailable
+0\tRecommendations:
+1\tHotspots\tStart with Hotspots analysis to understand the efficiency of your algorithm.\tUse Hotspots analysis to identify the most time consuming functions. Drill down to see the time spent on every line of code.
+1\tThreading\tThere is poor utilization of logical CPU cores ({util_l:.1f}%) in your application. \t Use Threading to explore more opportunities to increase parallelism in your application.
+1\tMicroarchitecture Exploration\tThere is low microarchitecture usage (29.4%) of available hardware resources. \tRun Microarchitecture Exploration analysis to analyze CPU microarchitecture bottlenecks that can affect application performance.
+""",
+}
+COLETORES = {
+    "hotspots": "Driverless Perf per-process counting,User-mode sampling and tracing",
+    "hpc-performance": "Driverless Perf per-process sampling",
+    "performance-snapshot": "Driverless Perf per-process counting",
+}
+
+
+def _tempo_sintetico(base: float, threads: int, rng: np.random.Generator) -> float:
+    # Escala aproximada pela USL, com ruído de ~2%
+    speedup = threads / (1 + 0.15 * (threads - 1) + 0.001 * threads * (threads - 1))
+    return base / speedup * rng.normal(1.0, 0.02)
+
+
+def gerar_arvore(destino: Path, n_runs: int, runs_por_config: int = RUNS_POR_CONFIG, semente: int = 0) -> int:
+    """
+    Escreve destino/results e destino/logs com n_runs runs em cada árvore,
+    espalhadas por quantos grafos sintéticos forem necessários. Devolve o
+    número de runs escritas.
+    """
+    rng = np.random.default_rng(semente)
+    configs_por_grafo = len(ANALISES) * len(THREADS) * len(HTS) * len(BINDS)
+    n_grafos = math.ceil(n_runs / (configs_por_grafo * runs_por_config))
+    escrever_experimentos(destino, n_grafos)
+    escritas = 0
+    for g in range(n_grafos):
+        grafo = f"synth-{g:04d}"
+        base = rng.uniform(1.0, 30.0)
+        for analise in ANALISES:
+            for threads in THREADS:
+                for ht in HTS:
+                    for bind in BINDS:
+                        for run in range(1, runs_por_config + 1):
+                            if escritas >= n_runs:
+                                return escritas
+                            rel = Path(grafo, analise, f"threads-{threads}", f"ht-{ht}", f"bind-{bind}", f"run-{run}")
+                            _escrever_run(destino, rel, grafo, analise, threads, run, base, rng)
+                            escritas += 1
+    return escritas
+
+
+def escrever_experimentos(destino: Path, n_grafos: int) -> None:
+    """destino/experiments.csv com as configurações dos grafos sintéticos, no formato do experiments.csv."""
+    linhas = [
+        {"GRAPH_NAME": f"synth-{g:04d}", "GRAPH_URL": "", "THREADS": threads, "MAX_ITERS": 500, "TOLERANCE": 1e-6,
+         "ANALYSIS_TYPE": analise, "DISABLE_HYPERTHREADING": ht, "THREAD_BIND_POLICY": bind,
+         "LOGS_GAPBS": "true", "VTUNE_ENABLE": "true"}
+        for g in range(n_grafos) for analise in ANALISES for threads in THREADS for ht in HTS for bind in BINDS
+    ]
+    destino.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(linhas).to_csv(destino / "experiments.csv", index=False)
+
+
+def _escrever_run(destino: Path, rel: Path, grafo: str, analise: str, threads: int, run: int, base: float,
+                  rng: np.random.Generator) -> None:
+    tempo = _tempo_sintetico(base, threads, rng)
+    cpu = tempo * threads * rng.uniform(0.8, 1.0)
+    sp = rng.uniform(5, 10)
+    bw = rng.uniform(1, 10)
+    pasta = destino / "results" / rel
+    pasta.mkdir(parents=True, exist_ok=True)
+    (pasta / "report.csv").write_text(MODELOS_REPORT[analise].format(
+        grafo=grafo,
+        tempo=tempo,
+        cpu=cpu,
+        cpu_pr=cpu * 0.45,
+        cpu_omp=cpu * 0.42,
+        threads=threads,
+        ipc=rng.uniform(0.5, 1.5),
+        gflops=rng.uniform(2.5, 3.5),
+        freq=rng.normal(2.9e9, 5.0e7),
+        cpi=rng.uniform(0.6, 2.0),
+        util_l=min(100.0, threads / 88 * 100),
+        util_p=min(100.0, threads / 44 * 100),
+        nucleos=float(threads),
+        mem=rng.uniform(10, 60),
+        cache=rng.uniform(5, 20),
+        dram=rng.uniform(5, 40),
+        numa=rng.uniform(0, 40),
+        bw=bw,
+        bw_max=bw * rng.uniform(2, 6),
+        sp=sp,
+        non_fp=100 - sp,
+        fp_rd=rng.uniform(0.3, 0.35),
+        fp_wr=rng.uniform(2.5, 2.7),
+        tamanho=int(rng.integers(3_000_000, 13_000_000)),
+        coletor=COLETORES[analise],
+    ))
+
+    pasta = destino / "logs" / rel
+    pasta.mkdir(parents=True, exist_ok=True)
+    trials = [tempo / 16 * rng.normal(1.0, 0.01) for _ in range(16)]
+    linhas = [
+        f"Read Time:           {rng.uniform(0.5, 2.0):.5f}",
+        f"Build Time:          {rng.uniform(0.01, 0.1):.5f}",
+        "Graph has 685231 nodes and 7600595 directed edges for degree: 11",
+    ]
+    linhas += [f"Trial Time:          {t:.5f}" for t in trials]
+    linhas.append(f"Average Time:        {sum(trials) / len(trials):.5f}")
+    (pasta / f"pr_{grafo}_t{threads}_{run}_20250101-000000.log").write_text("\n".join(linhas) + "\n")
+
+
+def medir_pipeline(raiz: Path, n_runs: int, memoria: bool, max_workers: Optional[int]) -> List[dict]:
+    """Executa as etapas do pipeline sobre raiz/ e devolve uma medição por etapa."""
+    inicio = len(REGISTROS)
+    store = raiz / "store"
+
+    with etapa("ingestao", ativo=True, memoria=memoria):
+        df_longo = ingerir_reports(raiz / "results", max_workers=max_workers)
+
+    # As sub-etapas dentro das funções do pipeline ficam desligadas (PERF_ETAPAS):
+    # etapas aninhadas zerariam o pico de memória da etapa de fora
+    with etapa("unificacao", ativo=True, memoria=memoria):
+        unificar(df_longo, pd.read_csv(raiz / "experiments.csv"), store=store,
+                 reexecutar_csv=raiz / "reexecutar.csv")
+
+    with etapa("metricas_hpc", ativo=True, memoria=memoria):
+        agregar_metricas_hpc(df_longo[df_longo["ANALYSIS_TYPE"] == "hpc-performance"], store=store)
+
+    with etapa("logs", ativo=True, memoria=memoria):
+        df_runs, df_trials = ingerir_logs(raiz / "logs", max_workers=max_workers)
+        processar_logs(df_runs, df_trials, store=store, reexecutar_csv=raiz / "reexecutar_noVTune.csv")
+
+    # Build completo do relatório (gera_relatorio.py) a partir do store, sem manifesto anterior
+    with etapa("relatorio", ativo=True, memoria=memoria):
+        tabelas = carregar_tabelas(store)
+        grafos = sorted(set(tabelas["agregados"]["GRAPH_NAME"].astype(str)))
+        alvos = declarar_alvos(grafos, raiz / "graficos", raiz / "tabelas")
+        construir(alvos, tabelas, raiz / "relatorio_build.json", max_workers=max_workers)
+
+    medicoes = REGISTROS[inicio:]
+    for medicao in medicoes:
+        medicao["RUNS"] = n_runs
+        medicao["RUNS_POR_SEGUNDO"] = n_runs / medicao["WALL_TIME"] if medicao["WALL_TIME"] > 0 else math.nan
+    return medicoes
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mede o pipeline de pós-processamento em árvores sintéticas.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS, help="Runs por árvore (ex.: 1000 10000 100000)")
+    parser.add_argument("--dir", type=Path, default=BENCH_DIR, help="Onde as árvores sintéticas são geradas")
+    parser.add_argument("--saida", type=Path, default=SAIDA_CSV)
+    parser.add_argument("--workers", type=int, default=None, help="Processos de leitura (padrão: todos os CPUs)")
+    parser.add_argument("--sem-memoria", action="store_true", help="Não mede o pico de memória (tracemalloc é lento)")
+    parser.add_argument("--manter", action="store_true", help="Não apaga as árvores geradas")
+    args = parser.parse_args(argv)
+
+    medicoes = []
+    for n_runs in args.tamanhos:
+        raiz = args.dir / f"runs-{n_runs}"
+        if raiz.exists():
+            shutil.rmtree(raiz)
+        t0 = time.time()
+        escritas = gerar_arvore(raiz, n_runs)
+        print(f"[INFO] Árvore sintética com {escritas} runs gerada em {time.time() - t0:.1f} s: {raiz}")
+
+        medicoes.extend(medir_pipeline(raiz, escritas, not args.sem_memoria, args.workers))
+        if not args.manter:
+            shutil.rmtree(raiz)
+
+    df = pd.DataFrame(medicoes)[["RUNS", "ETAPA", "WALL_TIME", "CPU_TIME", "PICO_MEMORIA_MB", "MAXRSS_MB", "MAXRSS_FILHOS_MB",
+                                  "RUNS_POR_SEGUNDO"]]
+    df.to_csv(args.saida, index=False)
+    print(df.to_string(index=False))
+    print(f"[INFO] Resultados salvos em: {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,60 +2,314 @@
 # 1. Reads the CSV file
 # 2. Creates the build command for the benchmark
 # 3. Creates a file with the commands
+#
+# Com --retomar, as runs já concluídas não são geradas de novo: o resultado
+# (report.csv do VTune ou log com "Average Time" do GAPBS) está no disco, na
+# pasta da run ou, em close/spread, numa bind-<política>@<CPUs> do
+# executor.py --concorrente (agregadas à parte, como CONCORRENTE), e a última
+# tentativa no run_ledger.csv terminou com sucesso. Runs sem registro no ledger
+# (resultados trazidos de volta pelo run.slurm, anteriores ao ledger ou que
+# vieram com o repositório) contam só pelo disco. Com --runs N, cada
+# configuração é completada até N repetições sem refazer as que já existem.
+#
+# Com --cache-grafos, as runs de grafos já convertidos por cache_grafos.py
+# recebem -graph-file com o .sg do cache.
+#
+# Com --limite-threads modelos_escalabilidade.csv, contagens de threads além do
+# pico previsto pela USL para a mesma análise (coluna LIMITE_THREADS) não são geradas.
+#
+# Com --reexecutar reexecutar.csv (gerado por unify_all_results.py ou
+# logs_gapbs.py), só as runs anômalas listadas são geradas, mesmo já concluídas.
+#
+# As políticas de bind socket, cores e interleave (topologia.py) são resolvidas
+# aqui, com a topologia desta máquina (ou de --sys-root): cada run recebe
+# -cpu-list e -mem-policy explícitos e a pasta bind-<política>@<CPUs>.
 
+import argparse
 import csv
+import glob
+import os
+from pathlib import Path
+
+from cache_grafos import caminho_em_cache
+from topologia import POLITICAS_OMP, POLITICAS_TOPOLOGIA, posicionamento_local
 
 # Ajuste: usar o CSV que contém VTUNE_ENABLE
 csv_file = "./experiments_noVTune.csv"
-print(f"Using CSV file: {csv_file}")
+results_root = "./results"
+logs_root = "./logs"
+ledger_file = "./run_ledger.csv"
+# O "Average Time" é a última linha do log do GAPBS: basta ler o final
+tamanho_cauda = 64 * 1024
+sys_root = "/sys"
 
-def create_build_commands(csv_file):
-    commands = []
+
+def posicionamento(thread_bind_policy, threads, disable_hyperthreading):
+    # None para close/spread, que continuam a cargo do OMP_PROC_BIND
+    if thread_bind_policy.lower() not in POLITICAS_TOPOLOGIA:
+        return None
+    return posicionamento_local(thread_bind_policy.lower(), int(threads), disable_hyperthreading.lower() == "true", Path(sys_root))
+
+
+def pasta_bind(thread_bind_policy, threads, disable_hyperthreading):
+    p = posicionamento(thread_bind_policy, threads, disable_hyperthreading)
+    if p is None:
+        return f"bind-{thread_bind_policy}"
+    return f"bind-{thread_bind_policy}@{p.tag}"
+
+
+def run_dir(root, graph_name, analysis_type, threads, disable_hyperthreading, thread_bind_policy, run_id):
+    # Mesmo layout usado pelo executa_bench.sh
+    return os.path.join(
+        root,
+        graph_name,
+        analysis_type,
+        f"threads-{threads}",
+        f"ht-{disable_hyperthreading}",
+        pasta_bind(thread_bind_policy, threads, disable_hyperthreading),
+        f"run-{run_id}",
+    )
+
+
+def pastas_run(root, graph_name, analysis_type, threads, disable_hyperthreading, thread_bind_policy, run_id):
+    # A pasta da run e, em close/spread, as bind-<política>@<CPUs> das runs do
+    # executor.py --concorrente (a reserva muda de uma execução para outra)
+    pastas = [run_dir(root, graph_name, analysis_type, threads, disable_hyperthreading, thread_bind_policy, run_id)]
+    if thread_bind_policy.lower() in POLITICAS_OMP:
+        pastas += sorted(glob.glob(os.path.join(
+            glob.escape(os.path.dirname(os.path.dirname(pastas[0]))), f"bind-{glob.escape(thread_bind_policy)}@*", f"run-{run_id}"
+        )))
+    return pastas
+
+
+def resultado_na_pasta(pasta, vtune_enable):
+    if vtune_enable.lower() == "true":
+        report = os.path.join(pasta, "report.csv")
+        return os.path.isfile(report) and os.path.getsize(report) > 0
+
+    # Sem VTune o resultado é o log do GAPBS; só vale se chegou ao "Average Time"
+    if not os.path.isdir(pasta):
+        return False
+    for nome in os.listdir(pasta):
+        if nome.endswith(".log"):
+            with open(os.path.join(pasta, nome), "rb") as f:
+                f.seek(max(os.fstat(f.fileno()).st_size - tamanho_cauda, 0))
+                if b"Average Time:" in f.read():
+                    return True
+    return False
+
+
+def run_concluida(graph_name, analysis_type, threads, disable_hyperthreading, thread_bind_policy, vtune_enable, run_id):
+    # Runs concorrentes também contam: refazê-las a cada --retomar só criaria
+    # mais pastas @<CPUs>. As agregações as usam como um grupo próprio
+    # (CONCORRENTE), então o resultado delas não se perde
+    config = (graph_name, analysis_type, threads, disable_hyperthreading, thread_bind_policy, run_id)
+    root = results_root if vtune_enable.lower() == "true" else logs_root
+    return any(resultado_na_pasta(pasta, vtune_enable) for pasta in pastas_run(root, *config))
+
+
+def chave_ledger(graph_name, analysis_type, threads, disable_hyperthreading, thread_bind_policy, vtune_enable, run_id):
+    return (graph_name, analysis_type, str(threads), disable_hyperthreading.lower(), thread_bind_policy.lower(),
+            vtune_enable.lower(), int(run_id))
+
+
+def ultimas_tentativas(ledger=ledger_file):
+    # Run -> EXIT_STATUS da última tentativa registrada no ledger
+    ultimas = {}
+    if not os.path.isfile(ledger):
+        return ultimas
+    with open(ledger, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            key = chave_ledger(
+                row["GRAPH_NAME"],
+                row["ANALYSIS_TYPE"],
+                row["THREADS"],
+                row["DISABLE_HYPERTHREADING"],
+                row["THREAD_BIND_POLICY"],
+                row["VTUNE_ENABLE"],
+                row["RUN"],
+            )
+            ultimas[key] = row["EXIT_STATUS"]
+    return ultimas
+
+
+def ler_configs(csv_file):
+    # Uma entrada por linha do CSV de experimentos, com os campos já normalizados
+    configs = []
     with open(csv_file, 'r') as file:
         reader = csv.reader(file)
         header = next(reader)
         for row in reader:
-            graph_name = row[header.index("GRAPH_NAME")]
-            graph_url = row[header.index("GRAPH_URL")]
-            threads = row[header.index("THREADS")]
-            max_iters = row[header.index("MAX_ITERS")]
-            tolerance = row[header.index("TOLERANCE")]
-            analysis_type = row[header.index("ANALYSIS_TYPE")]
-            disable_hyperthreading = row[header.index("DISABLE_HYPERTHREADING")].strip()
-            thread_bind_policy = row[header.index("THREAD_BIND_POLICY")].strip()
-            logs_gapbs = row[header.index("LOGS_GAPBS")].strip()
-            vtune_enable = row[header.index("VTUNE_ENABLE")].strip()
-
-            # 5 execuções se VTune ligado, 10 se desligado
-            total_runs = 5 if vtune_enable.lower() == "true" else 10
-
-            for i in range(1, total_runs + 1):
-                command = (
-                    f"./src/executa_bench.sh "
-                    f"-graph-name {graph_name} "
-                    f"-graph-url {graph_url} "
-                    f"-threads {threads} "
-                    f"-max-iters {max_iters} "
-                    f"-tolerance {tolerance} "
-                    f"-analysis-type {analysis_type} "
-                    f"-disable-hyperthreading {disable_hyperthreading} "
-                    f"-thread-bind-policy {thread_bind_policy} "
-                    f"-vtune-enable {vtune_enable} "
-                    f"-run-id {i}"
-                )
-                # Só liga logs se o VTune estiver habilitado
-                if logs_gapbs.lower() == 'true' and vtune_enable.lower() == 'true':
-                    command += " -gap-logs"
-                commands.append(command)
+            configs.append({
+                "graph_name": row[header.index("GRAPH_NAME")],
+                "graph_url": row[header.index("GRAPH_URL")],
+                "threads": row[header.index("THREADS")],
+                "max_iters": row[header.index("MAX_ITERS")],
+                "tolerance": row[header.index("TOLERANCE")],
+                "analysis_type": row[header.index("ANALYSIS_TYPE")],
+                "disable_hyperthreading": row[header.index("DISABLE_HYPERTHREADING")].strip(),
+                "thread_bind_policy": row[header.index("THREAD_BIND_POLICY")].strip(),
+                "logs_gapbs": row[header.index("LOGS_GAPBS")].strip(),
+                "vtune_enable": row[header.index("VTUNE_ENABLE")].strip(),
+            })
+    return configs
+
+
+def config_key(config):
+    return (
+        config["graph_name"],
+        config["analysis_type"],
+        config["threads"],
+        config["disable_hyperthreading"],
+        config["thread_bind_policy"],
+    )
+
+
+def build_command(config, run_id, graph_file=None):
+    command = (
+        f"./src/executa_bench.sh "
+        f"-graph-name {config['graph_name']} "
+        f"-graph-url {config['graph_url']} "
+        f"-threads {config['threads']} "
+        f"-max-iters {config['max_iters']} "
+        f"-tolerance {config['tolerance']} "
+        f"-analysis-type {config['analysis_type']} "
+        f"-disable-hyperthreading {config['disable_hyperthreading']} "
+        f"-thread-bind-policy {config['thread_bind_policy']} "
+        f"-vtune-enable {config['vtune_enable']} "
+        f"-run-id {run_id}"
+    )
+    if graph_file is not None:
+        command += f" -graph-file {graph_file.as_posix()}"
+    p = posicionamento(config["thread_bind_policy"], config["threads"], config["disable_hyperthreading"])
+    if p is not None:
+        command += f" -cpu-list {','.join(map(str, p.cpus))} -mem-policy {p.memoria}"
+    # Só liga logs se o VTune estiver habilitado
+    if config["logs_gapbs"].lower() == 'true' and config["vtune_enable"].lower() == 'true':
+        command += " -gap-logs"
+    return command
+
+
+def ler_limites_threads(arquivo):
+    # (grafo, análise, HT, bind) -> maior número de threads a medir, do modelos_escalabilidade.py
+    limites = {}
+    with open(arquivo, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            if row["LIMITE_THREADS"]:
+                key = (row["GRAPH_NAME"], row["ANALYSIS_TYPE"], row["DISABLE_HYPERTHREADING"].lower(),
+                       row["THREAD_BIND_POLICY"].lower())
+                limites[key] = int(float(row["LIMITE_THREADS"]))
+    return limites
+
+
+def ler_reexecucao(arquivo):
+    # (grafo, análise, threads, HT, bind, VTune) -> runs marcadas como anômalas (anomalias.py)
+    runs = {}
+    with open(arquivo, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            key = (
+                row["GRAPH_NAME"],
+                row["ANALYSIS_TYPE"],
+                row["THREADS"],
+                row["DISABLE_HYPERTHREADING"].lower(),
+                row["THREAD_BIND_POLICY"].lower(),
+                row["VTUNE_ENABLE"].lower(),
+            )
+            runs.setdefault(key, set()).add(int(row["RUN"]))
+    return runs
+
+
+def configs_executaveis(csv_file, cache_grafos=False, limite_threads=None):
+    # (config, graph_file) das configurações que esta máquina consegue executar,
+    # sem as podadas por --limite-threads. Usada também pelo amostragem_adaptativa.py
+    configs = []
+    limites = ler_limites_threads(limite_threads) if limite_threads else {}
+    podadas = 0
+    for config in ler_configs(csv_file):
+        try:
+            posicionamento(config["thread_bind_policy"], config["threads"], config["disable_hyperthreading"])
+        except ValueError as e:
+            print(f"[AVISO] {e}; configuração ignorada: {config['graph_name']} {config['analysis_type']}")
+            continue
+
+        limite = limites.get((config["graph_name"], config["analysis_type"], config["disable_hyperthreading"].lower(),
+                              config["thread_bind_policy"].lower()))
+        if limite is not None and int(config["threads"]) > limite:
+            podadas += 1
+            continue
+
+        graph_file = None
+        if cache_grafos:
+            graph_file = caminho_em_cache(config["graph_url"])
+            if graph_file is None:
+                print(f"[AVISO] Grafo fora do cache, será convertido na run: {config['graph_name']}")
+        configs.append((config, graph_file))
+    if limites:
+        print(f"Configurações além do pico previsto (podadas): {podadas}")
+    return configs
+
+
+def create_build_commands(csv_file, runs=None, retomar=False, cache_grafos=False, limite_threads=None, reexecutar=None):
+    commands = []
+    ultimas = ultimas_tentativas() if retomar else {}
+    reexecucao = ler_reexecucao(reexecutar) if reexecutar else None
+    puladas = 0
+    for config, graph_file in configs_executaveis(csv_file, cache_grafos=cache_grafos, limite_threads=limite_threads):
+        if reexecucao is not None:
+            key = config_key(config)
+            key = key[:3] + (key[3].lower(), key[4].lower(), config["vtune_enable"].lower())
+            # pop: linhas repetidas no CSV de experimentos não geram a mesma run duas vezes
+            commands.extend(build_command(config, i, graph_file) for i in sorted(reexecucao.pop(key, [])))
+            continue
+
+        # 5 execuções se VTune ligado, 10 se desligado
+        total_runs = 5 if config["vtune_enable"].lower() == "true" else 10
+        if runs is not None:
+            total_runs = runs
+
+        for i in range(1, total_runs + 1):
+            if retomar:
+                key = chave_ledger(*config_key(config), config["vtune_enable"], i)
+                # Sem registro no ledger vale o disco; com registro, a última tentativa também
+                if ultimas.get(key, "0") == "0" and run_concluida(*config_key(config), config["vtune_enable"], i):
+                    puladas += 1
+                    continue
+            commands.append(build_command(config, i, graph_file))
+    if retomar:
+        print(f"Runs já concluídas (puladas): {puladas}")
     return commands
 
 
 if __name__ == "__main__":
-    commands = create_build_commands(csv_file)
+    parser = argparse.ArgumentParser(description="Gera os comandos do benchmark a partir do CSV de experimentos.")
+    parser.add_argument("--csv", default=csv_file)
+    parser.add_argument("--runs", type=int, default=None,
+                        help="Repetições por configuração (padrão: 5 com VTune, 10 sem)")
+    parser.add_argument("--retomar", action="store_true",
+                        help="Pula as runs que têm resultado e cuja última tentativa no run_ledger.csv (se houver) deu certo")
+    parser.add_argument("--saida-dir", default="./src",
+                        help="Pasta onde commands.sh e commands.txt são escritos")
+    parser.add_argument("--cache-grafos", action="store_true",
+                        help="Usa os .sg já convertidos por cache_grafos.py (-graph-file)")
+    parser.add_argument("--limite-threads", default=None,
+                        help="CSV do modelos_escalabilidade.py; pula threads além de LIMITE_THREADS")
+    parser.add_argument("--reexecutar", default=None,
+                        help="CSV de runs anômalas (reexecutar.csv); gera só essas runs")
+    parser.add_argument("--sys-root", default=sys_root,
+                        help="Raiz do /sys usada para resolver as políticas socket, cores e interleave")
+    args = parser.parse_args()
+    sys_root = args.sys_root
+
+    print(f"Using CSV file: {args.csv}")
+    commands = create_build_commands(args.csv, runs=args.runs, retomar=args.retomar, cache_grafos=args.cache_grafos,
+                                     limite_threads=args.limite_threads, reexecutar=args.reexecutar)
+    print(f"Comandos gerados: {len(commands)}")
     commands_formatted = ' && \n'.join(commands)
-    
+
     # Cria arquivo com os comandos formatados
-    with open('./src/commands.sh', 'w') as f:
+    with open(os.path.join(args.saida_dir, 'commands.sh'), 'w') as f:
         f.write(commands_formatted)
 
-
+    # Um comando por linha, para o executor paralelo (src/executor.py)
+    with open(os.path.join(args.saida_dir, 'commands.txt'), 'w') as f:
+        f.write('\n'.join(commands) + '\n')
@@ -0,0 +1,219 @@
+"""
+Cache local de grafos já convertidos para o formato binário do GAPBS (.sg).
+
+Cada GRAPH_URL distinto é baixado e convertido uma única vez com o converter
+do GAPBS (src/gapbs/converter -f <edge list> -b <saida.sg>). O resultado fica
+em data/cache_grafos/<sha256 do arquivo baixado>/<GRAPH_NAME>.sg, ou seja,
+endereçado pelo conteúdo da fonte, e o indice.json guarda para cada URL o
+checksum da fonte, o checksum e o tamanho do .sg e o último uso. Quando o
+cache passa do limite de tamanho, os grafos usados há mais tempo são
+removidos.
+
+As runs geradas com build_commad.py --cache-grafos usam -graph-file apontando
+para o .sg, pulando descompressão e leitura do texto a cada repetição.
+
+Uso (a partir de stage3/):
+  python3 ./src/cache_grafos.py --csv experiments_noVTune.csv [--limite-gb 200]
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CACHE_DIR = Path("./data/cache_grafos")
+CONVERTER = Path("./src/gapbs/converter")
+LIMITE_GB = 200.0
+TAMANHO_BLOCO = 1 << 20
+
+
+def sha256_arquivo(caminho: Path) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def carregar_indice(cache_dir: Path = CACHE_DIR) -> Dict[str, dict]:
+    indice = cache_dir / "indice.json"
+    if not indice.is_file():
+        return {}
+    with open(indice, "r") as f:
+        return json.load(f)
+
+
+def salvar_indice(indice: Dict[str, dict], cache_dir: Path = CACHE_DIR) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_dir / "indice.json.tmp"
+    with open(tmp, "w") as f:
+        json.dump(indice, f, indent=2, sort_keys=True)
+    os.replace(tmp, cache_dir / "indice.json")
+
+
+def caminho_em_cache(url: str, cache_dir: Path = CACHE_DIR) -> Optional[Path]:
+    """Caminho do .sg de uma URL se ele estiver no cache (sem verificar checksum)."""
+    entrada = carregar_indice(cache_dir).get(url)
+    if entrada is None:
+        return None
+    caminho = cache_dir / entrada["arquivo"]
+    return caminho if caminho.is_file() else None
+
+
+def gerar_edge_list(origem: Path, destino: Path) -> None:
+    # Mesmo filtro do awk em executa_bench.sh: remove comentários, mantém "src dst"
+    abrir = gzip.open if origem.suffix == ".gz" else open
+    with abrir(origem, "rt") as entrada, open(destino, "w") as saida:
+        for linha in entrada:
+            if linha.startswith("#"):
+                continue
+            campos = linha.split()
+            if len(campos) >= 2:
+                saida.write(f"{campos[0]} {campos[1]}\n")
+
+
+def converter_para_sg(edge_list: Path, destino: Path, converter: Path = CONVERTER) -> None:
+    subprocess.run([str(converter), "-f", str(edge_list), "-b", str(destino)], check=True)
+
+
+def baixar(url: str, destino: Path) -> None:
+    if Path(url).is_file():
+        shutil.copyfile(url, destino)
+        return
+    with urllib.request.urlopen(url) as resposta, open(destino, "wb") as f:
+        shutil.copyfileobj(resposta, f, TAMANHO_BLOCO)
+
+
+def verificar(url: str, cache_dir: Path = CACHE_DIR) -> bool:
+    """Confere o checksum do .sg em cache contra o registrado no índice."""
+    entrada = carregar_indice(cache_dir).get(url)
+    if entrada is None:
+        return False
+    caminho = cache_dir / entrada["arquivo"]
+    return caminho.is_file() and sha256_arquivo(caminho) == entrada["sha256_sg"]
+
+
+def evictar(indice: Dict[str, dict], limite_bytes: int, manter: str, cache_dir: Path = CACHE_DIR) -> List[str]:
+    """Remove os grafos usados há mais tempo até o cache caber no limite."""
+    # Várias URLs podem apontar para o mesmo conteúdo; o tamanho conta uma vez por arquivo
+    por_arquivo: Dict[str, List[str]] = {}
+    for url, entrada in indice.items():
+        por_arquivo.setdefault(entrada["arquivo"], []).append(url)
+
+    def total() -> int:
+        return sum(indice[urls[0]]["tamanho"] for urls in por_arquivo.values())
+
+    removidos = []
+    ordem = sorted(por_arquivo, key=lambda a: max(indice[u]["ultimo_uso"] for u in por_arquivo[a]))
+    for arquivo in ordem:
+        if total() <= limite_bytes:
+            break
+        if manter in por_arquivo[arquivo]:
+            continue
+        caminho = cache_dir / arquivo
+        caminho.unlink(missing_ok=True)
+        if not any(caminho.parent.iterdir()):
+            caminho.parent.rmdir()
+        for url in por_arquivo.pop(arquivo):
+            del indice[url]
+            removidos.append(url)
+    return removidos
+
+
+def preparar(
+    graph_name: str,
+    url: str,
+    limite_bytes: int,
+    cache_dir: Path = CACHE_DIR,
+    converter: Path = CONVERTER,
+) -> Path:
+    """
+    Garante o .sg de `url` no cache e devolve o caminho. Baixa e converte só
+    quando a URL ainda não está no cache.
+    """
+    indice = carregar_indice(cache_dir)
+    entrada = indice.get(url)
+    if entrada is not None and (cache_dir / entrada["arquivo"]).is_file():
+        entrada["ultimo_uso"] = time.time()
+        salvar_indice(indice, cache_dir)
+        return cache_dir / entrada["arquivo"]
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        tmp = Path(tmp)
+        fonte = tmp / Path(url).name
+        print(f"[INFO] Baixando ({graph_name}): {url}")
+        baixar(url, fonte)
+        sha_fonte = sha256_arquivo(fonte)
+
+        # Outra URL com o mesmo conteúdo já convertido: só registra o alias
+        existente = next((e for e in indice.values() if e["sha256_fonte"] == sha_fonte), None)
+        if existente is not None and (cache_dir / existente["arquivo"]).is_file():
+            arquivo = existente["arquivo"]
+        else:
+            edge_list = tmp / f"{graph_name}.el"
+            saida = tmp / f"{graph_name}.sg"
+            print(f"[INFO] Convertendo ({graph_name}) -> {saida.name}")
+            gerar_edge_list(fonte, edge_list)
+            converter_para_sg(edge_list, saida, converter)
+            pasta_final = cache_dir / sha_fonte
+            pasta_final.mkdir(exist_ok=True)
+            os.replace(saida, pasta_final / saida.name)
+            arquivo = f"{sha_fonte}/{saida.name}"
+
+    caminho = cache_dir / arquivo
+    indice[url] = {
+        "graph_name": graph_name,
+        "arquivo": arquivo,
+        "sha256_fonte": sha_fonte,
+        "sha256_sg": sha256_arquivo(caminho),
+        "tamanho": caminho.stat().st_size,
+        "ultimo_uso": time.time(),
+    }
+    for removida in evictar(indice, limite_bytes, manter=url, cache_dir=cache_dir):
+        print(f"[INFO] Removido do cache: {removida}")
+    salvar_indice(indice, cache_dir)
+    return caminho
+
+
+def grafos_do_csv(csv_file: str) -> Dict[str, str]:
+    """URL -> GRAPH_NAME para cada GRAPH_URL distinto do CSV."""
+    grafos = {}
+    with open(csv_file, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            grafos.setdefault(row["GRAPH_URL"], row["GRAPH_NAME"])
+    return grafos
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prepara o cache de grafos binários do GAPBS.")
+    parser.add_argument("--csv", default="./experiments_noVTune.csv")
+    parser.add_argument("--limite-gb", type=float, default=LIMITE_GB)
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR)
+    parser.add_argument("--converter", type=Path, default=CONVERTER)
+    parser.add_argument("--verificar", action="store_true", help="Confere o checksum dos .sg já em cache")
+    args = parser.parse_args(argv)
+
+    limite = int(args.limite_gb * (1 << 30))
+    for url, nome in grafos_do_csv(args.csv).items():
+        if args.verificar and caminho_em_cache(url, args.cache_dir) and not verificar(url, args.cache_dir):
+            print(f"[AVISO] Checksum divergente, reconvertendo: {url}")
+            indice = carregar_indice(args.cache_dir)
+            indice.pop(url, None)
+            salvar_indice(indice, args.cache_dir)
+        caminho = preparar(nome, url, limite, args.cache_dir, args.converter)
+        print(f"[INFO] {nome}: {caminho}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
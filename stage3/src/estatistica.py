@@ -0,0 +1,203 @@
+"""
+Intervalos de confiança por bootstrap, calculados para todas as configurações de uma vez.
+
+As amostras de cada configuração (uma por run) são organizadas numa matriz
+configurações x runs. As reamostragens são sorteadas como matrizes de índices
+(configurações x reamostragens x runs), então o bootstrap de todas as
+configurações sai de poucas operações do NumPy, em blocos para limitar a
+memória. O intervalo é o percentil das médias reamostradas, calculado dentro
+de cada bloco: das reamostragens só ficam os limites do intervalo.
+
+Para o speedup, o tempo sequencial (1 thread) e o paralelo são reamostrados de
+forma independente e o intervalo vem da razão entre as duas médias
+reamostradas (as das configurações com 1 thread são sorteadas primeiro e
+reaproveitadas em todos os blocos); a eficiência paralela é a mesma razão dividida pelo número de
+threads.
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+REAMOSTRAGENS = 10_000
+NIVEL_CONFIANCA = 0.95
+SEMENTE = 0
+# Elementos sorteados por bloco (configurações x reamostragens x runs); cada
+# bloco ocupa uns 16 bytes por elemento (índices e amostras)
+ELEMENTOS_POR_BLOCO = 2_000_000
+
+
+def matriz_amostras(df: pd.DataFrame, chaves: List[str], coluna: str) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Organiza as amostras de `coluna` numa matriz (configurações x runs),
+    completada com NaN. Devolve (chaves de cada linha, matriz, runs por linha).
+    """
+    df = df.loc[df[coluna].notna(), chaves + [coluna]]
+    grupos = df.groupby(chaves, sort=True, observed=True)
+    posicao = grupos.cumcount().to_numpy()
+    linha = grupos.ngroup().to_numpy()
+    n = np.bincount(linha, minlength=grupos.ngroups)
+
+    valores = np.full((grupos.ngroups, max(n.max(initial=0), 1)), np.nan)
+    valores[linha, posicao] = df[coluna].to_numpy(dtype=float)
+    indice = grupos.size().reset_index()[chaves]
+    return indice, valores, n
+
+
+def bootstrap_medias(
+    valores: np.ndarray,
+    n: np.ndarray,
+    reamostragens: int = REAMOSTRAGENS,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """
+    Médias reamostradas de cada linha de `valores`, com as primeiras n[i]
+    colunas válidas. Devolve uma matriz (configurações x reamostragens).
+    Para muitas configurações, prefira blocos_medias, que não guarda a matriz inteira.
+    """
+    rng = rng if rng is not None else np.random.default_rng(SEMENTE)
+    medias = np.full((valores.shape[0], reamostragens), np.nan)
+    for inicio, fim, bloco in blocos_medias(valores, n, reamostragens, rng):
+        medias[inicio:fim] = bloco
+    return medias
+
+
+def blocos_medias(
+    valores: np.ndarray,
+    n: np.ndarray,
+    reamostragens: int,
+    rng: np.random.Generator,
+) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """
+    Gera (início, fim, médias reamostradas das linhas início:fim), em blocos de
+    até ELEMENTOS_POR_BLOCO índices sorteados. Linhas sem runs ficam NaN.
+    """
+    linhas, largura = valores.shape
+    bloco = max(1, ELEMENTOS_POR_BLOCO // (reamostragens * largura))
+    colunas = np.arange(largura)
+
+    for inicio in range(0, linhas, bloco):
+        fim = min(inicio + bloco, linhas)
+        n_bloco = np.maximum(n[inicio:fim], 1)
+        # Sorteia `largura` índices por reamostragem e usa só os n primeiros de cada linha
+        idx = rng.integers(0, n_bloco[:, None, None], size=(fim - inicio, reamostragens, largura))
+        amostras = np.take_along_axis(valores[inicio:fim, None, :], idx, axis=2)
+        del idx
+        # Os índices sorteados são < n, então as amostras só são NaN em linhas sem runs
+        amostras *= colunas < n_bloco[:, None, None]
+        medias = amostras.sum(axis=2) / n_bloco[:, None]
+        medias[n[inicio:fim] == 0] = np.nan
+        yield inicio, fim, medias
+
+
+def percentis(medias: np.ndarray, n: np.ndarray, nivel: float = NIVEL_CONFIANCA) -> Tuple[np.ndarray, np.ndarray]:
+    """Limites do intervalo percentil; NaN onde há menos de 2 runs."""
+    alfa = 1.0 - nivel
+    baixo, alto = np.quantile(medias, [alfa / 2, 1 - alfa / 2], axis=1)
+    sem_variancia = n < 2
+    baixo[sem_variancia] = np.nan
+    alto[sem_variancia] = np.nan
+    return baixo, alto
+
+
+def intervalos_bootstrap(
+    valores: np.ndarray,
+    n: np.ndarray,
+    reamostragens: int = REAMOSTRAGENS,
+    nivel: float = NIVEL_CONFIANCA,
+    rng: Optional[np.random.Generator] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Limites do intervalo da média de cada linha, calculados bloco a bloco."""
+    rng = rng if rng is not None else np.random.default_rng(SEMENTE)
+    baixo = np.full(valores.shape[0], np.nan)
+    alto = np.full(valores.shape[0], np.nan)
+    for inicio, fim, medias in blocos_medias(valores, n, reamostragens, rng):
+        baixo[inicio:fim], alto[inicio:fim] = percentis(medias, n[inicio:fim], nivel)
+    return baixo, alto
+
+
+def intervalos_media(
+    df: pd.DataFrame,
+    chaves: List[str],
+    colunas: List[str],
+    reamostragens: int = REAMOSTRAGENS,
+    nivel: float = NIVEL_CONFIANCA,
+    semente: int = SEMENTE,
+) -> pd.DataFrame:
+    """
+    Intervalo de confiança da média de cada coluna por configuração.
+    Devolve as chaves e as colunas <coluna>_CI_LOW / <coluna>_CI_HIGH.
+    """
+    rng = np.random.default_rng(semente)
+    resultado = None
+    for coluna in colunas:
+        indice, valores, n = matriz_amostras(df, chaves, coluna)
+        baixo, alto = intervalos_bootstrap(valores, n, reamostragens, nivel, rng)
+        parcial = indice.assign(**{f"{coluna}_CI_LOW": baixo, f"{coluna}_CI_HIGH": alto})
+        resultado = parcial if resultado is None else resultado.merge(parcial, on=chaves, how="outer")
+    return resultado
+
+
+def intervalos_speedup(
+    df_amostras: pd.DataFrame,
+    chaves_config: List[str],
+    chaves_sequencial: List[str],
+    coluna_tempo: str = "ELAPSED_TIME",
+    reamostragens: int = REAMOSTRAGENS,
+    nivel: float = NIVEL_CONFIANCA,
+    semente: int = SEMENTE,
+) -> pd.DataFrame:
+    """
+    Intervalos de confiança do tempo, do speedup e da eficiência paralela de
+    cada configuração, a partir das amostras por run. O tempo sequencial é o
+    da configuração com 1 thread que compartilha as chaves_sequencial.
+    """
+    rng = np.random.default_rng(semente)
+    indice, valores, n = matriz_amostras(df_amostras, chaves_config, coluna_tempo)
+
+    # Linha da configuração sequencial correspondente a cada configuração
+    sequenciais = indice.reset_index().loc[indice["THREADS"] == 1, chaves_sequencial + ["index"]]
+    linha_seq = indice.merge(sequenciais, on=chaves_sequencial, how="left")["index"].to_numpy()
+    tem_seq = ~np.isnan(linha_seq)
+    linha_seq = np.where(tem_seq, linha_seq, 0).astype(int)
+    # Intervalo só quando as duas pontas da razão têm variância
+    n_razao = np.where(tem_seq, np.minimum(n, n[linha_seq]), 0)
+    threads = indice["THREADS"].to_numpy(dtype=float)
+
+    # As médias reamostradas das configurações com 1 thread são sorteadas antes
+    # e reaproveitadas em cada bloco; das outras só ficam os limites do intervalo
+    usadas = np.unique(linha_seq[tem_seq])
+    medias_seq = bootstrap_medias(valores[usadas], n[usadas], reamostragens, rng)
+    posicao_seq = np.zeros(len(indice), dtype=int)
+    posicao_seq[usadas] = np.arange(len(usadas))
+    seq_de = posicao_seq[linha_seq]
+    # A própria configuração sequencial tem speedup 1 em toda reamostragem
+    eh_seq = tem_seq & (linha_seq == np.arange(len(indice)))
+    razao = tem_seq & ~eh_seq
+
+    tempo_baixo, tempo_alto = np.full((2, len(indice)), np.nan)
+    speedup_baixo, speedup_alto = np.full((2, len(indice)), np.nan)
+    for inicio, fim, medias in blocos_medias(valores, n, reamostragens, rng):
+        tempo_baixo[inicio:fim], tempo_alto[inicio:fim] = percentis(medias, n[inicio:fim], nivel)
+        com_seq = razao[inicio:fim]
+        if not com_seq.any():
+            continue
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speedup = medias_seq[seq_de[inicio:fim][com_seq]] / medias[com_seq]
+        baixo, alto = percentis(speedup, n_razao[inicio:fim][com_seq], nivel)
+        speedup_baixo[inicio:fim][com_seq] = baixo
+        speedup_alto[inicio:fim][com_seq] = alto
+    speedup_baixo[eh_seq & (n >= 2)] = 1.0
+    speedup_alto[eh_seq & (n >= 2)] = 1.0
+
+    return indice.assign(
+        **{
+            f"{coluna_tempo}_CI_LOW": tempo_baixo,
+            f"{coluna_tempo}_CI_HIGH": tempo_alto,
+            "SPEEDUP_CI_LOW": speedup_baixo,
+            "SPEEDUP_CI_HIGH": speedup_alto,
+            "PARALLEL_EFFICIENCY_CI_LOW": speedup_baixo / threads,
+            "PARALLEL_EFFICIENCY_CI_HIGH": speedup_alto / threads,
+        }
+    )
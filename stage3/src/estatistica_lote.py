@@ -0,0 +1,437 @@
+"""
+ANOVA, correlação de Spearman e importância de métricas para todas as colunas de uma vez.
+
+As tabelas anova_*.tex, correlacao_spearman.tex e feature_importance.tex eram
+feitas uma métrica por vez nos notebooks. Aqui cada análise é uma conta
+matricial sobre a matriz Y (linhas = configurações, colunas = métricas):
+
+  ANOVA        soma de quadrados tipo II de cada termo, y' (H_{M+T} - H_M) y,
+               com os projetores H calculados uma vez para todas as métricas
+               (modelo padrão: C(THREADS) + C(HT_OFF) + C(BINDING) +
+               C(HT_OFF):C(BINDING), o mesmo das tabelas do relatório);
+  Spearman     correlação de Pearson dos postos, Z' Z com Z = postos centrados
+               e normalizados;
+  importância  aumento do erro quadrático ao permutar cada métrica num modelo
+               linear padronizado do alvo (SPEEDUP), na média de REPETICOES
+               permutações da métrica, normalizado para somar 1. É outro
+               método que o da feature_importance.tex (random forest), por
+               isso vai para importancia_permutacao.tex.
+
+Os p-valores de permutação (P_PERMUTACAO) vêm de PERMUTACOES embaralhamentos
+das linhas, feitos em lote: as permutações viram colunas extras de Y e passam
+pelas mesmas multiplicações de matriz. A ANOVA e o Spearman são divididos em
+blocos de métricas, processados em paralelo.
+
+Entrada: tabelas agregados (hpc-performance, com VTune), hpc e hpc_runs do
+store, juntadas por configuração (só as runs exclusivas: as do executor.py
+--concorrente formam outro grupo, CONCORRENTE, fora dos fatores). Do hpc_runs (todas as métricas numéricas do
+report, uma coluna por METRIC_PATH) entram as médias por configuração das runs
+não anômalas, com o caminho legível como nome (ex.: "Memory Bound > DRAM
+Bound"). Ficam de fora as constantes da plataforma (Collection and Platform
+Info, Platform Maximum), as contagens de runs anômalas, o Total Thread Count
+(igual a THREADS) e as colunas repetidas; na importância, também as colunas
+calculadas a partir do alvo. Saídas: estatistica_anova.csv, estatistica_spearman.csv e
+estatistica_importancia.csv, e as tabelas .tex no formato das que já estão em
+tabelas/.
+
+Uso (a partir de stage3/):
+  python3 ./src/estatistica_lote.py [--metricas SPEEDUP CPI_RATE ...] [--permutacoes 999] [--workers N]
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from armazenamento import STORE_PADRAO, carregar_tabela
+from ingestao import caminho_metrica, rotulo_caminho
+from planejamento_experimentos import matriz_modelo
+
+CHAVES = ["GRAPH_NAME", "THREADS", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY"]
+TERMOS_PADRAO = ["THREADS", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY", "DISABLE_HYPERTHREADING:THREAD_BIND_POLICY"]
+# Nomes dos fatores nas tabelas do relatório
+ROTULOS_FATORES = {
+    "THREADS": "C(THREADS)",
+    "DISABLE_HYPERTHREADING": "C(HT_OFF)",
+    "THREAD_BIND_POLICY": "C(BINDING)",
+    "GRAPH_NAME": "C(GRAPH)",
+}
+ANALISE = "hpc-performance"
+ALVO_IMPORTANCIA = "SPEEDUP"
+# Colunas numéricas que não são métricas de desempenho (N_RUNS_ANOMALAS* também
+# não: contagens de runs, com sufixo _HPC/_RUNS depois dos merges)
+NAO_METRICAS = {"MAX_ITERS", "TOLERANCE", "SEQUENTIAL_TIME"}
+PREFIXOS_NAO_METRICAS = ("N_RUNS_ANOMALAS",)
+# Constantes da plataforma e da coleta, iguais em todas as configurações de uma máquina
+PLATAFORMA = rotulo_caminho(caminho_metrica("Collection and Platform Info"))
+SUFIXO_PLATAFORMA = rotulo_caminho(caminho_metrica("", "Platform Maximum"))
+# Total Thread Count do report repete o fator THREADS
+ECO_THREADS = rotulo_caminho(caminho_metrica("Elapsed Time", "Total Thread Count"))
+# Colunas calculadas a partir do alvo (vazariam o alvo na importância)
+DERIVADAS_ALVO = {
+    "SPEEDUP": {"ELAPSED_TIME", "SEQUENTIAL_TIME", "PARALLEL_EFFICIENCY", rotulo_caminho(caminho_metrica("Elapsed Time"))},
+}
+
+PERMUTACOES = 999
+# Permutações de cada métrica na importância (a média reduz o ruído de um sorteio só)
+REPETICOES = 30
+SEMENTE = 0
+METRICAS_POR_BLOCO = 16
+PERMUTACOES_POR_LOTE = 100
+NIVEL = 0.05
+
+SAIDA_ANOVA = Path("estatistica_anova.csv")
+SAIDA_SPEARMAN = Path("estatistica_spearman.csv")
+SAIDA_IMPORTANCIA = Path("estatistica_importancia.csv")
+TABELAS_DIR = Path("tabelas")
+TEX_ANOVA = ["SPEEDUP", "CPI_RATE", "MEMORY_BOUND", "AVERAGE_CPU_FREQUENCY"]
+TEX_SPEARMAN = ["SPEEDUP", "PARALLEL_EFFICIENCY", "MEMORY_BOUND", "CPI_RATE", "AVERAGE_CPU_FREQUENCY"]
+TEX_IMPORTANCIA = ["AVERAGE_CPU_FREQUENCY", "MEMORY_BOUND", "CPI_RATE"]
+TEX_IMPORTANCIA_ARQUIVO = "importancia_permutacao.tex"
+
+
+def _exclusivas(df: pd.DataFrame) -> pd.DataFrame:
+    """Sem as linhas do executor.py --concorrente (tabelas antigas não têm a coluna)."""
+    if "CONCORRENTE" not in df.columns:
+        return df
+    return df[~df["CONCORRENTE"].astype(bool)].drop(columns="CONCORRENTE")
+
+
+def carregar_runs_hpc(store: Path = STORE_PADRAO) -> pd.DataFrame:
+    """
+    Média por configuração de todas as métricas do hpc_runs (runs anômalas de
+    fora), com as colunas renomeadas para o caminho legível.
+    """
+    runs = _exclusivas(carregar_tabela("hpc_runs", store=store))
+    if "ANOMALIA" in runs.columns:
+        runs = runs[~runs["ANOMALIA"]]
+    for chave in ("GRAPH_NAME", "THREAD_BIND_POLICY"):
+        runs[chave] = runs[chave].astype(str)
+    colunas = [c for c in runs.columns if c not in CHAVES and c != "RUN" and pd.api.types.is_float_dtype(runs[c])]
+    medias = runs.groupby(CHAVES, as_index=False)[colunas].mean()
+    return medias.rename(columns={c: rotulo_caminho(c) for c in colunas})
+
+
+def carregar_dados(store: Path = STORE_PADRAO) -> pd.DataFrame:
+    """
+    Uma linha por configuração com tempos/speedup (agregados), métricas de
+    hardware selecionadas (hpc) e todas as métricas do report (hpc_runs).
+    """
+    agregados = carregar_tabela("agregados", filtros=[("ANALYSIS_TYPE", "==", ANALISE)], store=store)
+    if "VTUNE_ENABLE" in agregados.columns:
+        agregados = agregados[agregados["VTUNE_ENABLE"]]
+    agregados = _exclusivas(agregados)
+    hpc = _exclusivas(carregar_tabela("hpc", store=store))
+    for df in (agregados, hpc):
+        df["GRAPH_NAME"] = df["GRAPH_NAME"].astype(str)
+        df["THREAD_BIND_POLICY"] = df["THREAD_BIND_POLICY"].astype(str)
+    df = agregados.merge(hpc, on=CHAVES, how="outer", suffixes=("", "_HPC"))
+    try:
+        runs = carregar_runs_hpc(store)
+    except FileNotFoundError as e:
+        print(f"[AVISO] {e}; só as métricas da tabela hpc entram na análise")
+        return df
+    return df.merge(runs, on=CHAVES, how="left", suffixes=("", "_RUNS"))
+
+
+def _eh_metrica(df: pd.DataFrame, coluna: str) -> bool:
+    if coluna in CHAVES or coluna in NAO_METRICAS or coluna == ECO_THREADS or not pd.api.types.is_float_dtype(df[coluna]):
+        return False
+    if coluna.startswith(PREFIXOS_NAO_METRICAS + (PLATAFORMA,)) or coluna.endswith(SUFIXO_PLATAFORMA):
+        return False
+    if coluna.endswith(("_STD", "_CI_LOW", "_CI_HIGH")):
+        return False
+    # "<métrica> (count)" e "(total)" só reescalam a porcentagem, quando ela está presente
+    base, sufixo = coluna[:-8], coluna[-8:]
+    if sufixo in (" (count)", " (total)") and base in df.columns:
+        return False
+    return df[coluna].nunique() > 1
+
+
+def colunas_metricas(df: pd.DataFrame) -> List[str]:
+    """
+    Colunas numéricas que são métricas: sem fatores, desvios, limites de IC,
+    contagens de runs, constantes da plataforma e colunas repetidas (fica a
+    primeira, ex.: CPI_RATE e não "Elapsed Time > CPI Rate"; nem as iguais a THREADS).
+    """
+    metricas = []
+    vistas = [df["THREADS"].to_numpy(dtype=float)] if "THREADS" in df.columns else []
+    for coluna in df.columns:
+        if not _eh_metrica(df, coluna):
+            continue
+        valores = df[coluna].to_numpy(dtype=float)
+        if any(np.array_equal(valores, outra, equal_nan=True) for outra in vistas):
+            continue
+        vistas.append(valores)
+        metricas.append(coluna)
+    return metricas
+
+
+def _projetor(x: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Projetor ortogonal no espaço das colunas de x e o posto de x."""
+    u, s, _ = np.linalg.svd(x, full_matrices=False)
+    posto = int((s > s.max() * max(x.shape) * np.finfo(float).eps).sum())
+    u = u[:, :posto]
+    return u @ u.T, posto
+
+
+def _contem(termo: str, outro: str) -> bool:
+    return set(termo.split(":")) <= set(outro.split(":"))
+
+
+def projetores_anova(df: pd.DataFrame, termos: List[str]) -> Tuple[Dict[str, Tuple[np.ndarray, int]], np.ndarray, int]:
+    """
+    Para cada termo T, (H_{M+T} - H_M, GL), com M os termos que não contêm T
+    (soma de quadrados tipo II). Devolve também I - H do modelo completo e os
+    GL do resíduo.
+    """
+    fatores = sorted({f for t in termos for f in t.split(":")})
+    niveis = {f: sorted(df[f].unique()) for f in fatores}
+    diferencas = {}
+    for termo in termos:
+        base = [t for t in termos if not _contem(termo, t)]
+        h_base, posto_base = _projetor(matriz_modelo(df, base, niveis)[0])
+        h_termo, posto_termo = _projetor(matriz_modelo(df, base + [termo], niveis)[0])
+        diferencas[termo] = (h_termo - h_base, posto_termo - posto_base)
+    h_completo, posto = _projetor(matriz_modelo(df, termos, niveis)[0])
+    return diferencas, np.eye(len(df)) - h_completo, len(df) - posto
+
+
+def _estatisticas_f(y: np.ndarray, diferencas: dict, residuo: np.ndarray, gl_residuo: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(SS por termo, F por termo, SS do resíduo) para cada coluna de y."""
+    ss_residuo = np.einsum("ij,ij->j", y, residuo @ y)
+    ss = np.stack([np.einsum("ij,ij->j", y, p @ y) for p, _ in diferencas.values()])
+    gl = np.array([g for _, g in diferencas.values()], dtype=float)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f = (ss / gl) / (ss_residuo / gl_residuo)
+    return ss, f, ss_residuo
+
+
+def _permutacoes(n: int, permutacoes: int, semente: int) -> np.ndarray:
+    rng = np.random.default_rng(semente)
+    return np.argsort(rng.random((permutacoes, n)), axis=1)
+
+
+def _anova_bloco(tarefa: tuple) -> pd.DataFrame:
+    df, metricas, termos, permutacoes, semente = tarefa
+    linhas = []
+    # Métricas com o mesmo padrão de valores ausentes compartilham os projetores
+    ausentes = df[metricas].isna()
+    for _, grupo in ausentes.T.groupby(list(ausentes.index), sort=False):
+        colunas = list(grupo.index)
+        validas = ~ausentes[colunas[0]].to_numpy()
+        if validas.sum() < 3:
+            continue
+        df_validas = df.loc[validas]
+        diferencas, residuo, gl_residuo = projetores_anova(df_validas, termos)
+        y = df_validas[colunas].to_numpy(dtype=float)
+        ss, f, ss_residuo = _estatisticas_f(y, diferencas, residuo, gl_residuo)
+
+        excedentes = np.zeros_like(f)
+        indices = _permutacoes(len(y), permutacoes, semente)
+        for inicio in range(0, permutacoes, PERMUTACOES_POR_LOTE):
+            lote = indices[inicio:inicio + PERMUTACOES_POR_LOTE]
+            # (n, lote * métricas): cada permutação vira um bloco de colunas
+            y_perm = y[lote].transpose(1, 0, 2).reshape(len(y), -1)
+            _, f_perm, _ = _estatisticas_f(y_perm, diferencas, residuo, gl_residuo)
+            excedentes += (f_perm.reshape(len(termos), len(lote), -1) >= f[:, None, :]).sum(axis=1)
+        p_perm = (excedentes + 1) / (permutacoes + 1)
+
+        for j, metrica in enumerate(colunas):
+            for i, (termo, (_, gl)) in enumerate(diferencas.items()):
+                linhas.append({
+                    "METRICA": metrica, "TERMO": termo, "GL": gl, "SUM_SQ": ss[i, j], "F": f[i, j],
+                    "P_VALOR": stats.f.sf(f[i, j], gl, gl_residuo), "P_PERMUTACAO": p_perm[i, j],
+                })
+            linhas.append({"METRICA": metrica, "TERMO": "Residual", "GL": gl_residuo, "SUM_SQ": ss_residuo[j],
+                           "F": np.nan, "P_VALOR": np.nan, "P_PERMUTACAO": np.nan})
+    return pd.DataFrame(linhas)
+
+
+def _blocos(itens: List[str], tamanho: int) -> List[List[str]]:
+    return [itens[i:i + tamanho] for i in range(0, len(itens), tamanho)]
+
+
+def _mapear(funcao, tarefas: list, max_workers: Optional[int]) -> list:
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or len(tarefas) < 2:
+        return [funcao(t) for t in tarefas]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(funcao, tarefas))
+
+
+def anova_lote(df: pd.DataFrame, metricas: List[str], termos: List[str] = TERMOS_PADRAO,
+               permutacoes: int = PERMUTACOES, semente: int = SEMENTE, max_workers: Optional[int] = None) -> pd.DataFrame:
+    """ANOVA tipo II de cada métrica contra os termos: uma linha por (métrica, termo)."""
+    tarefas = [(df, bloco, termos, permutacoes, semente) for bloco in _blocos(metricas, METRICAS_POR_BLOCO)]
+    return pd.concat(_mapear(_anova_bloco, tarefas, max_workers), ignore_index=True)
+
+
+def _postos_padronizados(df: pd.DataFrame, metricas: List[str]) -> np.ndarray:
+    postos = df[metricas].rank().to_numpy(dtype=float, copy=True)
+    postos -= postos.mean(axis=0)
+    norma = np.linalg.norm(postos, axis=0)
+    return postos / np.where(norma > 0, norma, 1.0)
+
+
+def _spearman_bloco(tarefa: tuple) -> Tuple[np.ndarray, np.ndarray]:
+    z, inicio, fim, permutacoes, semente = tarefa
+    z_bloco = z[:, inicio:fim]
+    rho = z_bloco.T @ z
+    excedentes = np.zeros_like(rho)
+    for lote in np.array_split(_permutacoes(len(z), permutacoes, semente), max(1, permutacoes // PERMUTACOES_POR_LOTE)):
+        # (lote, bloco, métricas): correlações com as linhas do bloco embaralhadas
+        rho_perm = np.einsum("bni,nj->bij", z_bloco[lote], z)
+        excedentes += (np.abs(rho_perm) >= np.abs(rho) - 1e-12).sum(axis=0)
+    return rho, (excedentes + 1) / (permutacoes + 1)
+
+
+def spearman_lote(df: pd.DataFrame, metricas: List[str], permutacoes: int = PERMUTACOES, semente: int = SEMENTE,
+                  max_workers: Optional[int] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Matriz de correlação de Spearman e os p-valores de permutação (bilaterais)."""
+    completas = df[metricas].dropna()
+    if len(completas) < len(df):
+        print(f"[AVISO] Spearman: {len(df) - len(completas)} linhas com valores ausentes descartadas")
+    z = _postos_padronizados(completas, metricas)
+    tarefas = [(z, i, min(i + METRICAS_POR_BLOCO, len(metricas)), permutacoes, semente)
+               for i in range(0, len(metricas), METRICAS_POR_BLOCO)]
+    resultados = _mapear(_spearman_bloco, tarefas, max_workers)
+    rho = np.vstack([r for r, _ in resultados])
+    p = np.vstack([p for _, p in resultados])
+    return pd.DataFrame(rho, index=metricas, columns=metricas), pd.DataFrame(p, index=metricas, columns=metricas)
+
+
+def importancia_lote(df: pd.DataFrame, alvo: str, metricas: List[str], permutacoes: int = PERMUTACOES,
+                     semente: int = SEMENTE, repeticoes: int = REPETICOES) -> pd.DataFrame:
+    """
+    Importância por permutação de cada métrica num modelo linear padronizado
+    do alvo, na média de `repeticoes` permutações da métrica. P_PERMUTACAO
+    compara com a importância obtida com o alvo embaralhado (nenhuma métrica
+    explica o alvo). As colunas calculadas a partir do alvo (DERIVADAS_ALVO)
+    ficam de fora.
+    """
+    metricas = [m for m in metricas if m != alvo and m not in DERIVADAS_ALVO.get(alvo, ())]
+    completas = df[metricas + [alvo]].dropna()
+    x = completas[metricas].to_numpy(dtype=float)
+    x = (x - x.mean(axis=0)) / np.where(x.std(axis=0) > 0, x.std(axis=0), 1.0)
+    x = np.column_stack([np.ones(len(x)), x])
+    y = completas[alvo].to_numpy(dtype=float)
+    indices = _permutacoes(len(y), permutacoes, semente)
+    # Coluna 0: alvo real; demais: alvo embaralhado
+    y_todos = np.column_stack([y, y[indices].T])
+    coeficientes = np.linalg.lstsq(x, y_todos, rcond=None)[0]
+    beta = coeficientes[1:]
+    residuo = y_todos - x @ coeficientes
+
+    # Permutar a métrica j soma -beta_j * delta_j ao resíduo, com delta_j = x_j[perm] - x_j;
+    # na média das repetições o erro quadrático sobe
+    # beta_j^2 * média(delta_j^2) - 2 * beta_j * média(residuo * delta_j)
+    delta = x[_permutacoes(len(y), repeticoes, semente + 1), 1:] - x[None, :, 1:]
+    delta_medio = delta.mean(axis=0)
+    delta_quadrado = (delta ** 2).mean(axis=(0, 1))
+    aumento = beta ** 2 * delta_quadrado[:, None] - 2 * beta * (delta_medio.T @ residuo) / len(y)
+    aumento = np.clip(aumento, 0, None)
+    total = aumento[:, 0].sum()
+    importancia = aumento[:, 0] / (total if total > 0 else 1.0)
+    p = ((aumento[:, 1:] >= aumento[:, :1]).sum(axis=1) + 1) / (permutacoes + 1)
+    return pd.DataFrame({"METRICA": metricas, "IMPORTANCIA": importancia, "P_PERMUTACAO": p}) \
+        .sort_values("IMPORTANCIA", ascending=False, ignore_index=True)
+
+
+def _tex(texto: str) -> str:
+    return str(texto).replace("_", "\\_").replace("%", "\\%")
+
+
+def _rotulo_termo(termo: str) -> str:
+    return ":".join(ROTULOS_FATORES.get(f, f"C({f})") for f in termo.split(":"))
+
+
+def tex_anova(df_metrica: pd.DataFrame, metrica: str) -> str:
+    linhas = ["\\begin{table}[ht]", "\\centering", "\\begin{tabular}{lrrl}", "\\toprule",
+              " & sum\\_sq & F & p-value \\\\", "\\midrule"]
+    for _, r in df_metrica.iterrows():
+        if r["TERMO"] == "Residual":
+            linhas.append(f"Residual & {r['SUM_SQ']:.6f} & NaN & - \\\\")
+            continue
+        p = f"{r['P_VALOR']:.6f}"
+        if r["P_VALOR"] < NIVEL:
+            p = f"\\cellcolor{{ForestGreen}}{{{p}}}"
+        linhas.append(f"{_tex(_rotulo_termo(r['TERMO']))} & {r['SUM_SQ']:.6f} & {r['F']:.6f} & {p} \\\\")
+    linhas += ["\\bottomrule", "\\end{tabular}", f"\\caption{{ANOVA para {_tex(metrica)}}}",
+               f"\\label{{tab:anova_{metrica.lower()}}}", "\\end{table}"]
+    return "\n".join(linhas) + "\n"
+
+
+def tex_spearman(rho: pd.DataFrame) -> str:
+    linhas = ["\\begin{table}", "\\caption{Matriz de Correlação}", "\\label{tab:spearman}",
+              f"\\begin{{tabular}}{{l{'r' * len(rho.columns)}}}", "\\toprule",
+              " & " + " & ".join(_tex(c) for c in rho.columns) + " \\\\", "\\midrule"]
+    for metrica, valores in rho.iterrows():
+        linhas.append(_tex(metrica) + " & " + " & ".join(f"{v:.4f}" for v in valores) + " \\\\")
+    linhas += ["\\bottomrule", "\\end{tabular}", "\\end{table}"]
+    return "\n".join(linhas) + "\n"
+
+
+def tex_importancia(df_importancia: pd.DataFrame, alvo: str = ALVO_IMPORTANCIA, repeticoes: int = REPETICOES) -> str:
+    titulo = f"Importância por permutação ({_tex(alvo)}, modelo linear, média de {repeticoes} permutações)"
+    linhas = ["\\begin{table}", f"\\caption{{{titulo}}}", "\\label{tab:importancia_permutacao}",
+              "\\begin{tabular}{lr}", "\\toprule", "Metrica & Importancia \\\\", "\\midrule"]
+    for _, r in df_importancia.iterrows():
+        linhas.append(f"{_tex(r['METRICA'])} & {r['IMPORTANCIA']:.4f} \\\\")
+    linhas += ["\\bottomrule", "\\end{tabular}", "\\end{table}"]
+    return "\n".join(linhas) + "\n"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ANOVA, Spearman e importância de todas as métricas de uma vez.")
+    parser.add_argument("--store", type=Path, default=STORE_PADRAO)
+    parser.add_argument("--metricas", nargs="*", default=None, help="Padrão: todas as colunas de métrica")
+    parser.add_argument("--termos", nargs="*", default=TERMOS_PADRAO, help="Termos da ANOVA (ex.: GRAPH_NAME THREADS:DISABLE_HYPERTHREADING)")
+    parser.add_argument("--alvo", default=ALVO_IMPORTANCIA, help="Alvo da importância de métricas")
+    parser.add_argument("--permutacoes", type=int, default=PERMUTACOES)
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES, help="Permutações de cada métrica na importância")
+    parser.add_argument("--semente", type=int, default=SEMENTE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--tabelas-dir", type=Path, default=TABELAS_DIR, help="Onde as tabelas .tex são escritas")
+    parser.add_argument("--sem-tex", action="store_true", help="Só grava os CSVs")
+    args = parser.parse_args(argv)
+
+    df = carregar_dados(args.store)
+    metricas = args.metricas or colunas_metricas(df)
+    print(f"[INFO] {len(df)} configurações, {len(metricas)} métricas")
+
+    df_anova = anova_lote(df, metricas, args.termos, args.permutacoes, args.semente, args.workers)
+    df_anova.to_csv(SAIDA_ANOVA, index=False)
+    rho, p_rho = spearman_lote(df, metricas, args.permutacoes, args.semente, args.workers)
+    pd.concat({"RHO": rho.stack(), "P_PERMUTACAO": p_rho.stack()}, axis=1) \
+        .rename_axis(["METRICA_A", "METRICA_B"]).reset_index().to_csv(SAIDA_SPEARMAN, index=False)
+    df_importancia = pd.DataFrame()
+    if args.alvo in df.columns:
+        df_importancia = importancia_lote(df, args.alvo, metricas, args.permutacoes, args.semente, args.repeticoes)
+        df_importancia.to_csv(SAIDA_IMPORTANCIA, index=False)
+    print(f"[INFO] Resultados em: {SAIDA_ANOVA}, {SAIDA_SPEARMAN}, {SAIDA_IMPORTANCIA}")
+
+    if not args.sem_tex:
+        args.tabelas_dir.mkdir(parents=True, exist_ok=True)
+        for metrica in [m for m in TEX_ANOVA if m in metricas]:
+            destino = args.tabelas_dir / f"anova_{metrica.lower()}.tex"
+            destino.write_text(tex_anova(df_anova[df_anova["METRICA"] == metrica], metrica))
+        selecao = [m for m in TEX_SPEARMAN if m in metricas]
+        if selecao:
+            (args.tabelas_dir / "correlacao_spearman.tex").write_text(tex_spearman(rho.loc[selecao, selecao]))
+        selecao = [m for m in TEX_IMPORTANCIA if m in metricas]
+        if selecao and args.alvo in df.columns:
+            # feature_importance.tex (random forest, dos notebooks) fica como está
+            df_tex = importancia_lote(df, args.alvo, selecao, 0, args.semente, args.repeticoes)
+            (args.tabelas_dir / TEX_IMPORTANCIA_ARQUIVO).write_text(tex_importancia(df_tex, args.alvo, args.repeticoes))
+        print(f"[INFO] Tabelas .tex em: {args.tabelas_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
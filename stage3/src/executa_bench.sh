@@ -30,6 +30,11 @@ THREAD_BIND_POLICY=""
 DISABLE_HYPERTHREADING=""
 RUN_ID=1 # Valor padrão para o ID da execução
 VTUNE_ENABLE="true" # padrão: profiler ligado
+CPU_LIST="" # CPUs reservadas pelo executor paralelo (vazio: máquina inteira)
+GRAPH_FILE="" # grafo já convertido (.sg do cache_grafos.py); pula download e conversão
+TELEMETRIA="true" # amostra frequência/utilização por CPU nas runs sem VTune (telemetria.py)
+MEM_POLICY="" # política de memória do numactl (membind=0, interleave=0,1, localalloc)
+FILTRO_LOG="true" # filtra o progresso do VTune na captura e grava o JSON da run (filtro_log.py)
 
 # Função para mostrar ajuda
 show_help() {
@@ -43,10 +48,15 @@ show_help() {
     echo "  -graph-url URL    URL do grafo"
     echo "  -kernel KERNEL    Kernel a executar (obrigatório)"
     echo "  -gap-logs         Habilita criação de logs"
-    echo "  -thread-bind-policy POLICY  Política de bind (spread, close)"
+    echo "  -thread-bind-policy POLICY  Política de bind (spread, close; socket, cores, interleave com -cpu-list)"
     echo "  -disable-hyperthreading true|false  Usa somente núcleos físicos"
     echo "  -run-id ID        ID da execução (para criar pastas de resultado únicas)"
     echo "  -vtune-enable true|false  Habilita/desabilita o Intel VTune Profiler"
+    echo "  -cpu-list LIST    Restringe a execução a essas CPUs (ex.: 0,1,2,3)"
+    echo "  -graph-file PATH  Usa um grafo já convertido (ex.: .sg do cache de grafos)"
+    echo "  -telemetria true|false  Grava telemetria.csv (frequência/utilização) nas runs sem VTune (padrão: true)"
+    echo "  -mem-policy POLICY  Política de memória do numactl (ex.: membind=0, interleave=0,1, localalloc)"
+    echo "  -filtro-log true|false  Filtra o progresso do VTune do log e grava <log>.json (padrão: true)"
     echo "  -h, --help        Mostra esta ajuda"
 }
 
@@ -84,6 +94,11 @@ show_parsed_params() {
     echo "[INFO] THREAD_BIND_POLICY=${THREAD_BIND_POLICY:-'(não definido)'}"
     echo "[INFO] DISABLE_HYPERTHREADING=${DISABLE_HYPERTHREADING:-'(não definido)'}"
     echo "[INFO] VTUNE_ENABLE=${VTUNE_ENABLE:-'(não definido)'}"
+    echo "[INFO] CPU_LIST=${CPU_LIST:-'(máquina inteira)'}"
+    echo "[INFO] GRAPH_FILE=${GRAPH_FILE:-'(download/conversão em ./data)'}"
+    echo "[INFO] TELEMETRIA=$TELEMETRIA"
+    echo "[INFO] MEM_POLICY=${MEM_POLICY:-'(padrão do sistema)'}"
+    echo "[INFO] FILTRO_LOG=$FILTRO_LOG"
     echo "[INFO] ENABLE_LOGS=$ENABLE_LOGS"
     echo ""
 }
@@ -104,6 +119,11 @@ parse_arguments() {
       -disable-hyperthreading) DISABLE_HYPERTHREADING="$2"; shift ;;
       -run-id) RUN_ID="$2"; shift ;;
       -vtune-enable) VTUNE_ENABLE="$2"; shift ;;
+      -cpu-list) CPU_LIST="$2"; shift ;;
+      -graph-file) GRAPH_FILE="$2"; shift ;;
+      -telemetria) TELEMETRIA="$2"; shift ;;
+      -mem-policy) MEM_POLICY="$2"; shift ;;
+      -filtro-log) FILTRO_LOG="$2"; shift ;;
       -h|--help) show_help; exit 0 ;;
       *) echo "Opção desconhecida: $1"; show_help; exit 1 ;;
     esac
@@ -111,10 +131,19 @@ parse_arguments() {
   done
 }
 
+# "0,1,2,3,8" -> "0-3,8" (mesmo formato de topologia.compactar_lista_cpus)
+compactar_cpus() {
+  tr ',' '\n' <<< "$1" | sort -n -u | awk '
+    NR==1 {s=$1; p=$1; next}
+    $1==p+1 {p=$1; next}
+    {printf "%s%s", sep, (s==p ? s : s "-" p); sep=","; s=$1; p=$1}
+    END {if (NR) printf "%s%s", sep, (s==p ? s : s "-" p)}'
+}
+
 get_graph_data() {
   # Pastas por grafo/kernel
   graph_dir="$data_dir/$GRAPH_NAME"
-  logs_dir="$logs_root/$GRAPH_NAME/$ANALYSIS_TYPE/threads-$THREADS/ht-$DISABLE_HYPERTHREADING/bind-$THREAD_BIND_POLICY/run-$RUN_ID"
+  logs_dir="$logs_root/$GRAPH_NAME/$ANALYSIS_TYPE/threads-$THREADS/ht-$DISABLE_HYPERTHREADING/$bind_dir/run-$RUN_ID"
   mkdir -p "$graph_dir"
 
   # Remover a pasta de logs específica desta execução se ela já existir
@@ -128,6 +157,16 @@ get_graph_data() {
     mkdir -p "$logs_dir"
   fi
 
+  # Grafo vindo do cache: o GAPBS lê o .sg direto (detecta pela extensão)
+  if [[ -n "$GRAPH_FILE" ]]; then
+    if [[ ! -s "$GRAPH_FILE" ]]; then
+      echo "Erro: -graph-file não encontrado: $GRAPH_FILE"
+      exit 1
+    fi
+    el_path="$GRAPH_FILE"
+    return
+  fi
+
   # Baixar arquivo original (usa o nome do recurso da URL)
   download_path="$graph_dir/$(basename "$GRAPH_URL")"
   if [[ ! -s "$download_path" ]]; then
@@ -169,6 +208,26 @@ fi
 # Valida parâmetros obrigatórios
 validate_required_params
 
+# Políticas de topologia (build_commad.py/topologia.py) já vêm com as CPUs
+# resolvidas; a lista compacta vai no nome da pasta: bind-<política>@<CPUs>
+bind_dir="bind-$THREAD_BIND_POLICY"
+case "$THREAD_BIND_POLICY" in
+  socket|cores|interleave)
+    if [[ -z "$CPU_LIST" ]]; then
+      echo "Erro: -thread-bind-policy $THREAD_BIND_POLICY requer -cpu-list (gerado por build_commad.py)"
+      exit 1
+    fi
+    bind_dir="bind-$THREAD_BIND_POLICY@$(compactar_cpus "$CPU_LIST")"
+    ;;
+  *)
+    # close/spread com reserva do executor.py --concorrente: a run não teve a
+    # máquina inteira, então não vai para a mesma pasta das runs exclusivas
+    if [[ -n "$CPU_LIST" ]]; then
+      bind_dir="bind-$THREAD_BIND_POLICY@$(compactar_cpus "$CPU_LIST")"
+    fi
+    ;;
+esac
+
 # Mostra os parâmetros parseados
 show_parsed_params
 
@@ -203,9 +262,16 @@ else
   )"
 fi
 
+# Com CPUs reservadas pelo executor, cada thread fica em uma CPU da reserva
+if [[ -n "$CPU_LIST" ]]; then
+  export OMP_PLACES="{${CPU_LIST//,/\},\{}}"
+  export GOMP_CPU_AFFINITY="$CPU_LIST"
+  cpu_list="$CPU_LIST"
+fi
+
 # Cria as pastas de dados, resultados e logs
 # A estrutura agora inclui a política de bind e o ID da execução
-results_dir="./results/$GRAPH_NAME/$ANALYSIS_TYPE/threads-$THREADS/ht-$DISABLE_HYPERTHREADING/bind-$THREAD_BIND_POLICY/run-$RUN_ID"
+results_dir="./results/$GRAPH_NAME/$ANALYSIS_TYPE/threads-$THREADS/ht-$DISABLE_HYPERTHREADING/$bind_dir/run-$RUN_ID"
 
 # Remover a pasta de resultados específica desta execução se ela já existir
 if [[ -d "$results_dir" ]]; then
@@ -226,23 +292,39 @@ get_graph_data
 # Seta as variáveis do OpenMP
 export OMP_NUM_THREADS="$THREADS"
 export OMP_PROC_BIND="$THREAD_BIND_POLICY"
+# Nas políticas de topologia a ordem de OMP_PLACES já é o posicionamento
+case "$THREAD_BIND_POLICY" in
+  socket|cores|interleave) export OMP_PROC_BIND=true ;;
+esac
+
+# Política de memória: numactl envolve o benchmark (e o coletor do VTune)
+numa=()
+if [[ -n "$MEM_POLICY" ]]; then
+  need_cmd numactl
+  numa=( numactl "--$MEM_POLICY" )
+fi
 
 # Monta o comando conforme HT e VTune
 if [[ "$VTUNE_ENABLE" == "true" ]]; then
-  if [[ "$DISABLE_HYPERTHREADING" == "true" ]]; then
-    echo "[INFO] HT off via taskset em CPUs: $cpu_list"
-    cmd=( taskset -c "$cpu_list" vtune -collect "$ANALYSIS_TYPE" -result-dir "$results_dir" -- "$gapbs_dir/$KERNEL" -f "$el_path" -i "$MAX_ITERS" -t "$TOLERANCE" )
+  if [[ "$DISABLE_HYPERTHREADING" == "true" || -n "$CPU_LIST" ]]; then
+    echo "[INFO] taskset em CPUs: $cpu_list"
+    cmd=( taskset -c "$cpu_list" "${numa[@]}" vtune -collect "$ANALYSIS_TYPE" -result-dir "$results_dir" -- "$gapbs_dir/$KERNEL" -f "$el_path" -i "$MAX_ITERS" -t "$TOLERANCE" )
   else
-    cmd=( vtune -collect "$ANALYSIS_TYPE" -result-dir "$results_dir" -- "$gapbs_dir/$KERNEL" -f "$el_path" -i "$MAX_ITERS" -t "$TOLERANCE" )
+    cmd=( "${numa[@]}" vtune -collect "$ANALYSIS_TYPE" -result-dir "$results_dir" -- "$gapbs_dir/$KERNEL" -f "$el_path" -i "$MAX_ITERS" -t "$TOLERANCE" )
   fi
 else
-  # Execução sem VTune; aplica taskset quando HT off
-  if [[ "$DISABLE_HYPERTHREADING" == "true" ]]; then
+  # Execução sem VTune; aplica taskset quando HT off ou com CPUs reservadas
+  if [[ "$DISABLE_HYPERTHREADING" == "true" || -n "$CPU_LIST" ]]; then
     echo "EXECUTANDO SEM VTUNE"
-    echo "[INFO] HT off via taskset em CPUs: $cpu_list"
-    cmd=( taskset -c "$cpu_list" "$gapbs_dir/$KERNEL" -f "$el_path" -i "$MAX_ITERS" -t "$TOLERANCE" )
+    echo "[INFO] taskset em CPUs: $cpu_list"
+    cmd=( taskset -c "$cpu_list" "${numa[@]}" "$gapbs_dir/$KERNEL" -f "$el_path" -i "$MAX_ITERS" -t "$TOLERANCE" )
   else
-    cmd=( "$gapbs_dir/$KERNEL" -f "$el_path" -i "$MAX_ITERS" -t "$TOLERANCE" )
+    cmd=( "${numa[@]}" "$gapbs_dir/$KERNEL" -f "$el_path" -i "$MAX_ITERS" -t "$TOLERANCE" )
+  fi
+
+  # Sem VTune, a telemetria guarda o contexto de hardware na pasta de logs da run
+  if [[ "$TELEMETRIA" == "true" ]]; then
+    cmd=( python3 "$script_dir/telemetria.py" --saida "$logs_dir" --cpus "${cpu_list:-}" -- "${cmd[@]}" )
   fi
 fi
 
@@ -255,8 +337,16 @@ echo "[INFO] GOMP_CPU_AFFINITY=${GOMP_CPU_AFFINITY:-'(não definido)'}"
 
 if [[ "$ENABLE_LOGS" == "true" ]]; then
   ts="$(date +%Y%m%d-%H%M%S)"
-  log="$logs_root/$GRAPH_NAME/$ANALYSIS_TYPE/threads-$THREADS/ht-$DISABLE_HYPERTHREADING/bind-$THREAD_BIND_POLICY/run-$RUN_ID/${KERNEL}_${GRAPH_NAME}_t${THREADS}_${RUN_ID}_${ts}.log"
-  "${cmd[@]}" 2>&1 | tee "$log"
+  log="$logs_dir/${KERNEL}_${GRAPH_NAME}_t${THREADS}_${RUN_ID}_${ts}.log"
+  if [[ "$FILTRO_LOG" == "true" ]]; then
+    # Mantém os tempos e o Elapsed Time do VTune, colapsa progresso, dicas e resumo e grava o JSON ao lado do log
+    "${cmd[@]}" 2>&1 | python3 "$script_dir/filtro_log.py" --log "$log" --json "${log%.log}.json" \
+      --meta GRAPH_NAME="$GRAPH_NAME" ANALYSIS_TYPE="$ANALYSIS_TYPE" THREADS="$THREADS" \
+             DISABLE_HYPERTHREADING="$DISABLE_HYPERTHREADING" THREAD_BIND_POLICY="$THREAD_BIND_POLICY" \
+             RUN="$RUN_ID" VTUNE_ENABLE="$VTUNE_ENABLE" CPU_LIST="${cpu_list:-}"
+  else
+    "${cmd[@]}" 2>&1 | tee "$log"
+  fi
   echo "[INFO] Log salvo em: $log"
 else
   "${cmd[@]}"
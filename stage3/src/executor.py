@@ -0,0 +1,339 @@
+"""
+Executor paralelo dos comandos gerados por build_commad.py.
+
+Substitui a cadeia serial de '&&' do commands.sh: lê src/commands.txt (um
+comando por linha) e executa as runs com repetição das que falham e registro
+no ledger.
+
+Por padrão toda run é exclusiva: só começa com a máquina vazia e nada roda
+junto com ela. close/spread (OMP_PROC_BIND) descrevem o posicionamento na
+máquina inteira, e runs lado a lado dividiriam L3 e banda de DRAM, o que
+contamina os tempos do speedup.
+
+Com --concorrente, runs sem VTune e com menos de LIMITE_EXCLUSIVO threads
+rodam em paralelo sob um orçamento de núcleos físicos. Cada uma recebe núcleos
+próprios (-cpu-list) escolhidos conforme a política: close enche um socket,
+spread alterna os sockets, e com HT ligado (ht-false) as threads usam também
+os irmãos de cada núcleo. A reserva fica registrada na pasta da run
+(bind-<política>@<CPUs>); a ingestão marca essas runs como CONCORRENTE e as
+agregações as tratam como um grupo próprio de cada configuração (com a base
+sequencial também concorrente), sem se misturar com as exclusivas.
+
+Runs que falham são repetidas até TENTATIVAS vezes. Cada tentativa vira uma
+linha no ledger (run_ledger.csv) com o status de saída e o tempo de parede.
+
+Uso (a partir de stage3/):
+  python3 ./src/executor.py [--concorrente] [--cores N] [--limite-exclusivo N] [--tentativas N]
+"""
+
+import argparse
+import csv
+import os
+import shlex
+import subprocess
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from topologia import expandir_lista_cpus
+
+COMMANDS_FILE = Path("./src/commands.txt")
+LEDGER_FILE = Path("./run_ledger.csv")
+SAIDAS_DIR = Path("./saidas_executor")
+SYSFS_CPU = Path("/sys/devices/system/cpu")
+
+TENTATIVAS = 3
+INTERVALO_POLL = 0.5
+
+COLUNAS_LEDGER = [
+    "GRAPH_NAME",
+    "ANALYSIS_TYPE",
+    "THREADS",
+    "DISABLE_HYPERTHREADING",
+    "THREAD_BIND_POLICY",
+    "VTUNE_ENABLE",
+    "RUN",
+    "ATTEMPT",
+    "EXIT_STATUS",
+    "WALL_TIME",
+    "START",
+    "CPU_LIST",
+    "COMMAND",
+]
+
+
+class Tarefa(NamedTuple):
+    comando: str
+    graph_name: str
+    analysis_type: str
+    threads: int
+    disable_ht: str
+    bind: str
+    vtune_enable: str
+    run_id: int
+    cpus_fixas: bool = False
+
+
+def ler_opcoes(comando: str) -> Dict[str, str]:
+    """Lê as opções '-nome valor' de um comando do executa_bench.sh."""
+    tokens = shlex.split(comando)
+    opcoes = {}
+    for i, token in enumerate(tokens):
+        if token.startswith("-") and i + 1 < len(tokens) and not tokens[i + 1].startswith("-"):
+            opcoes[token.lstrip("-")] = tokens[i + 1]
+    return opcoes
+
+
+def tarefa_de_comando(comando: str) -> Tarefa:
+    opcoes = ler_opcoes(comando)
+    return Tarefa(
+        comando=comando,
+        graph_name=opcoes.get("graph-name", ""),
+        analysis_type=opcoes.get("analysis-type", ""),
+        threads=int(opcoes.get("threads", "1")),
+        disable_ht=opcoes.get("disable-hyperthreading", ""),
+        bind=opcoes.get("thread-bind-policy", ""),
+        vtune_enable=opcoes.get("vtune-enable", "true"),
+        run_id=int(opcoes.get("run-id", "1")),
+        cpus_fixas="cpu-list" in opcoes,
+    )
+
+
+def carregar_tarefas(arquivo: Path) -> List[Tarefa]:
+    tarefas = []
+    with open(arquivo, "r") as f:
+        for linha in f:
+            comando = linha.strip()
+            if not comando or comando.startswith("#"):
+                continue
+            tarefas.append(tarefa_de_comando(comando))
+    return tarefas
+
+
+def nucleos_fisicos(sysfs_cpu: Path = SYSFS_CPU) -> List[int]:
+    """
+    Devolve um CPU lógico por núcleo físico (o primeiro irmão de cada núcleo),
+    como o awk sobre o lscpu no executa_bench.sh.
+    """
+    primeiros = set()
+    for topo in sysfs_cpu.glob("cpu[0-9]*/topology/thread_siblings_list"):
+        irmaos = expandir_lista_cpus(topo.read_text().strip())
+        if irmaos:
+            primeiros.add(min(irmaos))
+    if not primeiros:
+        return list(range(os.cpu_count() or 1))
+    return sorted(primeiros)
+
+
+def irmaos_por_nucleo(sysfs_cpu: Path = SYSFS_CPU) -> Dict[int, Tuple[int, List[int]]]:
+    """
+    Para cada núcleo físico (identificado pelo primeiro irmão), o socket e as
+    CPUs lógicas do núcleo, em ordem.
+    """
+    nucleos = {}
+    for topo in sysfs_cpu.glob("cpu[0-9]*/topology"):
+        try:
+            irmaos = sorted(expandir_lista_cpus((topo / "thread_siblings_list").read_text().strip()))
+            socket = int((topo / "physical_package_id").read_text().strip())
+        except (OSError, ValueError):
+            continue
+        if irmaos:
+            nucleos[irmaos[0]] = (socket, irmaos)
+    return nucleos
+
+
+def eh_exclusiva(tarefa: Tarefa, limite_exclusivo: int, concorrente: bool = False) -> bool:
+    if not concorrente:
+        return True
+    # Runs com -cpu-list já fixado (políticas de topologia.py) não cabem na reserva de núcleos
+    return tarefa.vtune_enable.lower() == "true" or tarefa.threads >= limite_exclusivo or tarefa.cpus_fixas
+
+
+class Executor:
+    def __init__(
+        self,
+        tarefas: List[Tarefa],
+        nucleos: List[int],
+        limite_exclusivo: int,
+        tentativas: int = TENTATIVAS,
+        ledger: Path = LEDGER_FILE,
+        saidas: Path = SAIDAS_DIR,
+        concorrente: bool = False,
+        irmaos: Optional[Dict[int, Tuple[int, List[int]]]] = None,
+    ):
+        self.pendentes = deque((t, 1) for t in tarefas)
+        self.livres = list(nucleos)
+        self.concorrente = concorrente
+        # Sem a topologia, cada núcleo é uma CPU só, num socket só
+        self.irmaos = {n: (irmaos or {}).get(n, (0, [n])) for n in nucleos}
+        # Runs maiores que a máquina inteira só podem rodar sozinhas
+        self.limite_exclusivo = min(limite_exclusivo, len(nucleos))
+        self.tentativas = tentativas
+        self.ledger = ledger
+        self.saidas = saidas
+        self.rodando: Dict[subprocess.Popen, tuple] = {}
+        self.exclusiva_rodando = False
+        # Grafos cujo download/conversão já terminou; antes disso só uma run por grafo
+        self.grafos_prontos = set()
+        self.falhas: List[Tarefa] = []
+
+    def _exclusiva(self, tarefa: Tarefa) -> bool:
+        return eh_exclusiva(tarefa, self.limite_exclusivo, self.concorrente)
+
+    def _nucleos_necessarios(self, tarefa: Tarefa) -> int:
+        # Com HT ligado (ht-false) cada núcleo recebe uma thread por irmão
+        if tarefa.disable_ht.lower() == "true":
+            return tarefa.threads
+        por_nucleo = min(len(irmaos) for _, irmaos in self.irmaos.values())
+        return -(-tarefa.threads // por_nucleo)
+
+    def _escolher_nucleos(self, tarefa: Tarefa) -> Tuple[List[int], List[int]]:
+        """(núcleos reservados, CPUs na ordem das threads) conforme a política e o HT."""
+        por_socket: Dict[int, List[int]] = {}
+        for n in sorted(self.livres):
+            por_socket.setdefault(self.irmaos[n][0], []).append(n)
+        if tarefa.bind.lower() == "spread":
+            # Alterna os sockets: s0, s1, s0, s1, ...
+            listas = list(por_socket.values())
+            ordem = [l[i] for i in range(max(map(len, listas), default=0)) for l in listas if i < len(l)]
+        else:
+            # close: começa pelo socket com mais núcleos livres, para não quebrar a reserva
+            ordem = [n for l in sorted(por_socket.values(), key=len, reverse=True) for n in l]
+        nucleos = ordem[: self._nucleos_necessarios(tarefa)]
+        if tarefa.disable_ht.lower() == "true":
+            return nucleos, nucleos
+        cpus = [cpu for n in nucleos for cpu in self.irmaos[n][1]]
+        return nucleos, cpus[: tarefa.threads]
+
+    def _pode_iniciar(self, tarefa: Tarefa) -> bool:
+        if self.exclusiva_rodando:
+            return False
+        if self._exclusiva(tarefa):
+            return not self.rodando
+        if tarefa.graph_name not in self.grafos_prontos and any(
+            t.graph_name == tarefa.graph_name for t, *_ in self.rodando.values()
+        ):
+            return False
+        return self._nucleos_necessarios(tarefa) <= len(self.livres)
+
+    def _iniciar(self, tarefa: Tarefa, tentativa: int) -> None:
+        exclusiva = self._exclusiva(tarefa)
+        comando = tarefa.comando
+        nucleos: List[int] = []
+        cpus: List[int] = []
+        if exclusiva:
+            self.exclusiva_rodando = True
+        else:
+            nucleos, cpus = self._escolher_nucleos(tarefa)
+            self.livres = [n for n in self.livres if n not in nucleos]
+            comando += f" -cpu-list {','.join(map(str, cpus))}"
+
+        self.saidas.mkdir(parents=True, exist_ok=True)
+        nome = f"{tarefa.graph_name}_{tarefa.analysis_type}_t{tarefa.threads}_ht-{tarefa.disable_ht}_{tarefa.bind}_run{tarefa.run_id}_try{tentativa}.out"
+        saida = open(self.saidas / nome, "w")
+        print(f"[INFO] Iniciando ({tentativa}/{self.tentativas}): {comando}")
+        proc = subprocess.Popen(shlex.split(comando), stdout=saida, stderr=subprocess.STDOUT)
+        self.rodando[proc] = (tarefa, tentativa, nucleos, cpus, time.time(), datetime.now().isoformat(timespec="seconds"), saida)
+
+    def _finalizar(self, proc: subprocess.Popen, status: int) -> None:
+        tarefa, tentativa, nucleos, cpus, inicio, inicio_str, saida = self.rodando.pop(proc)
+        saida.close()
+        duracao = time.time() - inicio
+        if nucleos:
+            self.livres = sorted(self.livres + nucleos)
+        else:
+            self.exclusiva_rodando = False
+
+        self._registrar(tarefa, tentativa, status, duracao, inicio_str, cpus)
+        if status == 0:
+            self.grafos_prontos.add(tarefa.graph_name)
+        elif tentativa < self.tentativas:
+            print(f"[AVISO] Falhou (status {status}), reenfileirando: {tarefa.comando}")
+            self.pendentes.append((tarefa, tentativa + 1))
+        else:
+            print(f"[ERRO] Falhou após {tentativa} tentativas: {tarefa.comando}")
+            self.falhas.append(tarefa)
+
+    def _registrar(self, tarefa: Tarefa, tentativa: int, status: int, duracao: float, inicio: str, cpus: List[int]) -> None:
+        novo = not self.ledger.exists()
+        with open(self.ledger, "a", newline="") as f:
+            writer = csv.writer(f)
+            if novo:
+                writer.writerow(COLUNAS_LEDGER)
+            writer.writerow([
+                tarefa.graph_name,
+                tarefa.analysis_type,
+                tarefa.threads,
+                tarefa.disable_ht,
+                tarefa.bind,
+                tarefa.vtune_enable,
+                tarefa.run_id,
+                tentativa,
+                status,
+                f"{duracao:.3f}",
+                inicio,
+                ",".join(map(str, cpus)),
+                tarefa.comando,
+            ])
+
+    def executar(self) -> List[Tarefa]:
+        """Executa todas as tarefas e devolve as que falharam em todas as tentativas."""
+        while self.pendentes or self.rodando:
+            # Inicia tudo o que couber. Uma exclusiva no início da fila bloqueia
+            # as demais até a máquina esvaziar, para não ficar esperando para sempre.
+            iniciou = True
+            while iniciou and self.pendentes:
+                iniciou = False
+                for i, (tarefa, tentativa) in enumerate(self.pendentes):
+                    if self._exclusiva(tarefa) and i > 0:
+                        continue
+                    if self._pode_iniciar(tarefa):
+                        del self.pendentes[i]
+                        self._iniciar(tarefa, tentativa)
+                        iniciou = True
+                        break
+                    if i == 0 and self._exclusiva(tarefa):
+                        break
+
+            time.sleep(INTERVALO_POLL)
+            for proc in list(self.rodando):
+                status = proc.poll()
+                if status is not None:
+                    self._finalizar(proc, status)
+        return self.falhas
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Executa os comandos do benchmark em paralelo.")
+    parser.add_argument("--comandos", type=Path, default=COMMANDS_FILE)
+    parser.add_argument("--concorrente", action="store_true",
+                        help="Roda em paralelo as runs sem VTune e com poucas threads (padrão: uma run por vez)")
+    parser.add_argument("--cores", type=int, default=None, help="Limita o orçamento aos N primeiros núcleos físicos (padrão: todos)")
+    parser.add_argument("--limite-exclusivo", type=int, default=None,
+                        help="Runs com pelo menos esse número de threads rodam sozinhas (padrão: metade dos núcleos)")
+    parser.add_argument("--tentativas", type=int, default=TENTATIVAS)
+    parser.add_argument("--ledger", type=Path, default=LEDGER_FILE)
+    args = parser.parse_args(argv)
+
+    nucleos = nucleos_fisicos()
+    if args.cores is not None:
+        nucleos = nucleos[: args.cores]
+    limite = args.limite_exclusivo or max(1, len(nucleos) // 2)
+
+    tarefas = carregar_tarefas(args.comandos)
+    if args.concorrente:
+        print(f"[INFO] {len(tarefas)} runs, {len(nucleos)} núcleos, exclusivas a partir de {limite} threads ou com VTune")
+    else:
+        print(f"[INFO] {len(tarefas)} runs, uma por vez")
+
+    t0 = time.time()
+    falhas = Executor(tarefas, nucleos, limite, args.tentativas, args.ledger,
+                      concorrente=args.concorrente, irmaos=irmaos_por_nucleo()).executar()
+    print(f"[INFO] Tempo total: {time.time() - t0:.1f} segundos; {len(falhas)} runs falharam")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,199 +1,130 @@
 from pathlib import Path
-from typing import List, Optional, Tuple
 
 import pandas as pd
 
+from anomalias import marcar_anomalias
+from armazenamento import gravar_tabela
+from estatistica import intervalos_media
+from ingestao import caminho_cache_padrao, caminho_metrica, ingerir_reports, tabela_larga
+from instrumentacao import etapa
+from pacote_runs import PACOTE_PADRAO, origem_runs
+
 # Diretório base no Colab
 BASE_DIR = Path("/content/perf-analysis/stage3")
 RESULTS_ROOT = BASE_DIR / "results"
 OUTPUT_CSV = BASE_DIR / "hpc_hw_metrics.csv"
-
-def extrair_infos_caminho(rel_path_parts: List[str]) -> Optional[Tuple[str, int, bool, str, int]]:
+STORE_DIR = BASE_DIR / "resultados_store"
+# O store colunar é a saída principal; o CSV é mantido para os notebooks antigos
+EXPORTAR_CSV = True
+
+# Caminho da métrica na hierarquia do report -> coluna do CSV agregado
+METRICAS_HPC = {
+    caminho_metrica("Elapsed Time", "Average CPU Frequency"): "AVERAGE_CPU_FREQUENCY",
+    caminho_metrica("Memory Bound"): "MEMORY_BOUND",
+    caminho_metrica("Memory Bound", "Cache Bound"): "CACHE_BOUND",
+    caminho_metrica("Memory Bound", "DRAM Bound"): "DRAM_BOUND",
+    caminho_metrica("Elapsed Time", "CPI Rate"): "CPI_RATE",
+}
+# Usados na detecção de runs anômalas (mesmo critério do unify_all_results.py)
+TEMPO_REPORT = caminho_metrica("Elapsed Time")
+FREQUENCIA_REPORT = caminho_metrica("Elapsed Time", "Average CPU Frequency")
+
+
+def extrair_metricas_hpc(df_longo: pd.DataFrame) -> pd.DataFrame:
     """
-    Recebe as partes do caminho relativo a 'results' e extrai:
-      GRAPH_NAME, THREADS, DISABLE_HYPERTHREADING, THREAD_BIND_POLICY, RUN.
-
-    Espera algo do tipo:
-      [GRAPH_NAME, ANALYSIS_TYPE, 'threads-X',
-       'ht-true|ht-false', 'bind-<policy>', 'run-N']
-
-    ANALYSIS_TYPE é usado apenas para filtrar 'hpc-performance'.
-    
-    Nota: ht-true significa que o HT foi DESATIVADO (disable_ht=True)
-          ht-false significa que o HT está ATIVADO (disable_ht=False)
+    Recebe a tabela longa de ingerir_reports (somente hpc-performance) e retorna
+    a matriz larga com uma linha por run e uma coluna por métrica do report
+    (todas as métricas numéricas, identificadas pelo caminho na hierarquia).
     """
-    if len(rel_path_parts) < 6:
-        return None
-
-    graph_name = rel_path_parts[0]
-    analysis_type = rel_path_parts[1]
-
-    if analysis_type != "hpc-performance":
-        return None
-
-    threads_dir = rel_path_parts[2]
-    ht_dir = rel_path_parts[3]
-    bind_dir = rel_path_parts[4]
-    run_dir = rel_path_parts[5]
-
-    # threads-X
-    try:
-        _, threads_str = threads_dir.split("-", 1)
-        threads = int(threads_str)
-    except Exception:
-        return None
-
-    # ht-true|ht-false (ou disable-ht-true|disable-ht-false para compatibilidade)
-    try:
-        if ht_dir.startswith("ht-"):
-            # Formato: "ht-true" ou "ht-false"
-            ht_value = ht_dir.split("-")[1]
-            # ht-true significa que o HT foi DESATIVADO, então disable_ht = True
-            # ht-false significa que o HT está ATIVADO, então disable_ht = False
-            disable_ht = ht_value == "true"
-        elif ht_dir.startswith("disable-ht-"):
-            # Formato antigo: "disable-ht-false" -> ["disable", "ht", "false"]
-            # Converte string "true"/"false" para boolean
-            disable_ht_str = ht_dir.split("-")[2]
-            disable_ht = disable_ht_str == "true"
-        else:
-            return None
-    except Exception:
-        return None
-
-    # bind-<policy>
-    try:
-        _, thread_bind_policy = bind_dir.split("-", 1)
-    except Exception:
-        return None
-
-    # run-N
-    try:
-        _, run_str = run_dir.split("-", 1)
-        run_id = int(run_str)
-    except Exception:
-        return None
-
-    return graph_name, threads, disable_ht, thread_bind_policy, run_id
+    df_runs = tabela_larga(df_longo)
+    return df_runs.drop(columns=["ANALYSIS_TYPE"])
 
 
-def extrair_metricas_hpc(report_path: str) -> Optional[Tuple[float, float, float, float]]:
+def selecionar_metricas(df_runs: pd.DataFrame, metricas: dict) -> pd.DataFrame:
     """
-    Lê um report.csv de hpc-performance e retorna:
-      (Average CPU Frequency, Memory Bound, Cache Bound, DRAM Bound)
-    ou None se não conseguir extrair.
+    Seleciona as colunas da matriz larga usadas na análise, renomeando-as.
+    Runs em que alguma dessas métricas não foi encontrada são descartadas.
     """
-    try:
-        df = pd.read_csv(
-            report_path,
-            sep="\t",
-            engine="python",
-            header=0,
-            on_bad_lines="skip",
-        )
-    except Exception as e:
-        print(f"[AVISO] Falha ao ler {report_path}: {e}")
-        return None
-
-    def get_metric(nome: str) -> Optional[float]:
-        if "Metric Name" not in df.columns or "Metric Value" not in df.columns:
-            return None
-        serie = df.loc[df["Metric Name"] == nome, "Metric Value"]
-        if serie.empty:
-            return None
-        try:
-            return float(serie.values[0])
-        except (TypeError, ValueError):
-            return None
-
-    avg_cpu_freq = get_metric("Average CPU Frequency")
-    mem_bound = get_metric("Memory Bound")
-    cache_bound = get_metric("Cache Bound")
-    dram_bound = get_metric("DRAM Bound")
-
-    if any(v is None for v in (avg_cpu_freq, mem_bound, cache_bound, dram_bound)):
-        # Se alguma métrica não foi encontrada, ignora este report
-        return None
-
-    return avg_cpu_freq, mem_bound, cache_bound, dram_bound
-
-
-# ===== Execução principal no Colab =====
-
-if not RESULTS_ROOT.is_dir():
-    raise FileNotFoundError(f"Pasta de resultados não encontrada: {RESULTS_ROOT}")
-
-# Coletar métricas por run
-linhas: List[List[object]] = []
-
-for report_path in RESULTS_ROOT.rglob("report.csv"):
-    rel_dir = report_path.parent.relative_to(RESULTS_ROOT)
-    parts = list(rel_dir.parts)
-
-    info = extrair_infos_caminho(parts)
-    if info is None:
-        continue
-
-    graph_name, threads, disable_ht, thread_bind_policy, run_id = info
-
-    metricas = extrair_metricas_hpc(str(report_path))
-    if metricas is None:
-        continue
-
-    avg_cpu_freq, mem_bound, cache_bound, dram_bound = metricas
-
-    linhas.append(
-        [
-            graph_name,
-            threads,
-            disable_ht,
-            thread_bind_policy,
-            run_id,
-            avg_cpu_freq,
-            mem_bound,
-            cache_bound,
-            dram_bound,
-        ]
-    )
+    run_cols = ["GRAPH_NAME", "THREADS", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY", "CONCORRENTE", "RUN"]
+    df = df_runs.reindex(columns=run_cols + list(metricas.keys())).rename(columns=metricas)
+    return df.dropna()
 
-if not linhas:
-    print("[INFO] Nenhuma execução hpc-performance encontrada.")
-else:
-    # Converte para DataFrame e agrega por configuração (média das runs)
-    header = [
-        "GRAPH_NAME",
-        "THREADS",
-        "DISABLE_HYPERTHREADING",
-        "THREAD_BIND_POLICY",
-        "RUN",
-        "AVERAGE_CPU_FREQUENCY",
-        "MEMORY_BOUND",
-        "CACHE_BOUND",
-        "DRAM_BOUND",
-    ]
-    df = pd.DataFrame(linhas, columns=header)
 
+def agregar_metricas_hpc(df_longo: pd.DataFrame, store: Path = STORE_DIR) -> pd.DataFrame:
+    """
+    Recebe a tabela longa do hpc-performance, grava hpc_runs (uma linha por
+    run, com ANOMALIA e MOTIVO) e hpc (média, desvio e IC por configuração,
+    sem as runs anômalas) no store e devolve a tabela hpc (vazia se não há runs).
+    Usada pelo main e pelo bench_pipeline.py.
+    """
     group_cols = [
         "GRAPH_NAME",
         "THREADS",
         "DISABLE_HYPERTHREADING",
         "THREAD_BIND_POLICY",
+        # Runs do executor.py --concorrente são agregadas à parte das exclusivas
+        "CONCORRENTE",
     ]
-    metric_cols = [
-        "AVERAGE_CPU_FREQUENCY",
-        "MEMORY_BOUND",
-        "CACHE_BOUND",
-        "DRAM_BOUND",
-    ]
-
-    df_group = df.groupby(group_cols, as_index=False)[metric_cols].mean()
+    with etapa("matriz_larga"):
+        df_runs = extrair_metricas_hpc(df_longo)
+
+    if df_runs.empty:
+        return pd.DataFrame()
+
+    # Runs anômalas (throttling, interferência) ficam no hpc_runs, com ANOMALIA e
+    # MOTIVO, mas fora das médias: uma run com a frequência derrubada puxaria a
+    # AVERAGE_CPU_FREQUENCY e as métricas de memória da configuração
+    with etapa("anomalias"):
+        df_runs = marcar_anomalias(df_runs, group_cols, TEMPO_REPORT, FREQUENCIA_REPORT)
+        df = selecionar_metricas(df_runs.loc[~df_runs["ANOMALIA"]], METRICAS_HPC)
+        n_anomalas = df_runs.groupby(group_cols, as_index=False)["ANOMALIA"].sum()
+        print(f"Runs anômalas (fora das médias): {int(df_runs['ANOMALIA'].sum())}")
+
+    # Agrega por configuração (média das runs válidas)
+    metric_cols = list(METRICAS_HPC.values())
+
+    with etapa("agregacao"):
+        df_group = df.groupby(group_cols)[metric_cols].agg(["mean", "std"])
+        df_group = pd.concat(
+            [df_group.xs("mean", axis=1, level=1), df_group.xs("std", axis=1, level=1).add_suffix("_STD")],
+            axis=1,
+        ).reset_index()
+        # Intervalos de confiança (bootstrap) da média de cada métrica
+        df_group = df_group.merge(intervalos_media(df, group_cols, metric_cols), on=group_cols, how="left")
+        df_group = df_group.merge(n_anomalas.rename(columns={"ANOMALIA": "N_RUNS_ANOMALAS"}), on=group_cols, how="left")
     df_group = df_group.sort_values(
-        by=["GRAPH_NAME", "THREADS", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY"]
+        by=["GRAPH_NAME", "THREADS", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY", "CONCORRENTE"]
     )
 
-    df_group.to_csv(str(OUTPUT_CSV), sep=",", index=False)
+    with etapa("gravacao"):
+        gravar_tabela(df_runs.assign(ANALYSIS_TYPE="hpc-performance"), "hpc_runs", store=store)
+        gravar_tabela(df_group, "hpc", store=store)
     print(f"Total de configurações hpc-performance agregadas: {len(df_group)}")
-    print(f"CSV gerado em: {OUTPUT_CSV}")
+    print(f"Store atualizado em: {store}")
+    return df_group
+
+
+def main() -> None:
+    # Sem a pasta results/, lê do runs.pack (pacote_runs.py), se existir
+    results_root = origem_runs(RESULTS_ROOT, BASE_DIR / PACOTE_PADRAO)
+    if not results_root.exists():
+        raise FileNotFoundError(f"Pasta de resultados não encontrada: {RESULTS_ROOT}")
+
+    # Coletar métricas por run
+    with etapa("ingestao"):
+        df_longo = ingerir_reports(
+            results_root,
+            analises=["hpc-performance"],
+            cache=caminho_cache_padrao(RESULTS_ROOT),
+        )
+    df_group = agregar_metricas_hpc(df_longo)
+    if df_group.empty:
+        print("[INFO] Nenhuma execução hpc-performance encontrada.")
+        return
+
+    if EXPORTAR_CSV:
+        df_group.to_csv(str(OUTPUT_CSV), sep=",", index=False)
+        print(f"CSV gerado em: {OUTPUT_CSV}")
     print(f"\nAmostra dos dados:")
 
     # Usa display() no Colab para melhor visualização
@@ -204,3 +135,6 @@ else:
         # Se não estiver no Colab, usa print normal
         print(df_group.head())
 
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Filtro da saída do benchmark no momento da captura (substitui o tee do executa_bench.sh).
+
+Com o VTune ligado, quase todo o log é o progresso "Executing actions NN %"
+redesenhado com '\\r'. O filtro lê a saída em blocos, enquanto o benchmark
+roda, e:
+
+  - descarta os trechos terminados em '\\r' (redesenhos da mesma linha);
+  - de uma sequência de linhas "Executing actions NN %" mantém só a última;
+  - separa o texto que chega colado depois do campo de progresso (o
+    "Elapsed Time" do resumo vem assim) e o trata como uma linha própria;
+  - descarta linhas maiores que TAMANHO_MAX_LINHA (mesmo limite do logs_gapbs.py);
+  - descarta os parágrafos de dicas do VTune (" | The metric value is low...")
+    e os avisos "Cannot locate debugging information", que se repetem em toda
+    run; no JSON ficam só as contagens (DICAS_VTUNE, AVISOS_SIMBOLOS);
+  - do resumo que o VTune imprime no fim da coleta mantém só a linha
+    "Elapsed Time" (o resumo inteiro já fica no report.csv, gerado por
+    vtune -report summary); --manter-resumo mantém o resto, sem as dicas;
+  - mantém todo o resto: tempos do GAPBS, mensagens "vtune:", outros avisos e erros.
+
+As linhas mantidas vão para o log (--log) e para a saída padrão. No fim, um
+registro JSON (--json) com os tempos já extraídos (os mesmos campos que
+logs_gapbs.py lê do log), os metadados passados em --meta CHAVE=VALOR e o
+volume de entrada e saída do filtro. O logs_gapbs.py usa esse JSON quando ele
+existe, sem reparsear o log.
+
+Uso (executa_bench.sh faz isso quando os logs estão ligados):
+  ./src/gapbs/pr ... 2>&1 | python3 ./src/filtro_log.py --log run.log --json run.json --meta THREADS=4
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TAMANHO_BLOCO = 1 << 16
+TAMANHO_MAX_LINHA = 512
+
+PADRAO_TEMPO = re.compile(rb"^(Read Time|Build Time|Trial Time|Average Time):\s+([-+0-9.eE]+)\s*$")
+PADRAO_GRAFO = re.compile(rb"^Graph has (\d+) nodes and (\d+) (?:un)?directed edges")
+# "vtune: Executing actions 14 % Clearing the database" (e as outras etapas do coletor)
+PADRAO_PROGRESSO = re.compile(rb"^(?:vtune: )?Executing actions\s+\d{1,3}\s?%")
+# O campo de progresso tem largura fixa (completado com espaços); o que vem
+# depois do preenchimento é a próxima linha, que chegou depois do último '\r'
+# ("... 75 % Generating a report          Elapsed Time: 8.694s")
+PADRAO_CAUDA_PROGRESSO = re.compile(rb"^((?:vtune: )?Executing actions\s+\d{1,3}\s?%.*?)\s{2,}(\S.*)$")
+# Linhas das dicas do resumo do VTune, que vêm abaixo da métrica (" | ...")
+PADRAO_DICA = re.compile(rb"^\s*\|")
+# "vtune: Warning: Cannot locate debugging information for file `...'." (um por biblioteca)
+PADRAO_AVISO_SIMBOLOS = re.compile(rb"^vtune: Warning: Cannot locate ")
+# "Elapsed Time: 12.345s" do resumo do VTune
+PADRAO_ELAPSED_VTUNE = re.compile(rb"^\s*Elapsed Time:\s+([0-9.]+)s?\s*$")
+
+
+class FiltroLog:
+    def __init__(self, saidas: List, tamanho_max: int = TAMANHO_MAX_LINHA, manter_resumo: bool = False):
+        self.saidas = saidas
+        self.tamanho_max = tamanho_max
+        self.manter_resumo = manter_resumo
+        self.em_resumo = False
+        self.resto = b""
+        self.descartando = False
+        self.progresso_pendente: Optional[bytes] = None
+        self.em_dica = False
+        self.run: Dict[str, object] = {}
+        self.trials: List[float] = []
+        self.estatisticas = {
+            "BYTES_ENTRADA": 0,
+            "BYTES_SAIDA": 0,
+            "LINHAS_MANTIDAS": 0,
+            "REDESENHOS_DESCARTADOS": 0,
+            "PROGRESSO_DESCARTADO": 0,
+            "LINHAS_LONGAS_DESCARTADAS": 0,
+            "DICAS_VTUNE": 0,
+            "AVISOS_SIMBOLOS": 0,
+            "LINHAS_RESUMO_VTUNE": 0,
+        }
+
+    def alimentar(self, bloco: bytes) -> None:
+        self.estatisticas["BYTES_ENTRADA"] += len(bloco)
+        dados = self.resto + bloco
+        inicio = 0
+        for m in re.finditer(rb"\r\n|\r|\n", dados):
+            # '\r' no fim do bloco pode ser o começo de um '\r\n'
+            if m.group() == b"\r" and m.end() == len(dados):
+                break
+            if self.descartando:
+                # Fim da linha longa que estava sendo descartada
+                self.descartando = False
+            else:
+                self._segmento(dados[inicio:m.start()], redesenho=m.group() == b"\r")
+            inicio = m.end()
+        self.resto = dados[inicio:]
+        if len(self.resto) > self.tamanho_max:
+            # Linha longa em andamento: não guarda mais que o limite
+            self.estatisticas["LINHAS_LONGAS_DESCARTADAS"] += 1
+            self.resto = b""
+            self.descartando = True
+
+    def finalizar(self) -> None:
+        if self.resto and not self.descartando:
+            self._segmento(self.resto.rstrip(b"\r"), redesenho=False)
+            self.resto = b""
+        self._liberar_progresso()
+
+    def _segmento(self, linha: bytes, redesenho: bool) -> None:
+        if redesenho:
+            self.estatisticas["REDESENHOS_DESCARTADOS"] += 1
+            return
+        if len(linha) > self.tamanho_max:
+            self.estatisticas["LINHAS_LONGAS_DESCARTADAS"] += 1
+            return
+        if PADRAO_PROGRESSO.match(linha):
+            cauda = PADRAO_CAUDA_PROGRESSO.match(linha)
+            if self.progresso_pendente is not None:
+                self.estatisticas["PROGRESSO_DESCARTADO"] += 1
+            self.progresso_pendente = linha if cauda is None else cauda.group(1)
+            if cauda is not None:
+                self._segmento(cauda.group(2), redesenho=False)
+            return
+        # Linhas descartadas não encerram uma sequência de progresso
+        if PADRAO_DICA.match(linha):
+            # Conta parágrafos, não linhas
+            if not self.em_dica:
+                self.estatisticas["DICAS_VTUNE"] += 1
+            self.em_dica = True
+            return
+        self.em_dica = False
+        if PADRAO_AVISO_SIMBOLOS.match(linha):
+            self.estatisticas["AVISOS_SIMBOLOS"] += 1
+            return
+        # O resumo vai da linha "Elapsed Time" até a próxima mensagem "vtune:"
+        if self.em_resumo and not linha.startswith(b"vtune:"):
+            self.estatisticas["LINHAS_RESUMO_VTUNE"] += 1
+            return
+        self.em_resumo = False
+        self._liberar_progresso()
+        self._escrever(linha)
+        self._extrair(linha)
+
+    def _liberar_progresso(self) -> None:
+        if self.progresso_pendente is not None:
+            self._escrever(self.progresso_pendente)
+            self.progresso_pendente = None
+
+    def _escrever(self, linha: bytes) -> None:
+        for saida in self.saidas:
+            saida.write(linha + b"\n")
+            saida.flush()
+        self.estatisticas["BYTES_SAIDA"] += len(linha) + 1
+        self.estatisticas["LINHAS_MANTIDAS"] += 1
+
+    def _extrair(self, linha: bytes) -> None:
+        m = PADRAO_TEMPO.match(linha)
+        if m:
+            rotulo, valor = m.group(1), float(m.group(2))
+            if rotulo == b"Trial Time":
+                self.trials.append(valor)
+            else:
+                self.run[rotulo.decode().upper().replace(" ", "_")] = valor
+            return
+        m = PADRAO_GRAFO.match(linha)
+        if m:
+            self.run["NODES"] = int(m.group(1))
+            self.run["EDGES"] = int(m.group(2))
+            return
+        m = PADRAO_ELAPSED_VTUNE.match(linha)
+        if m:
+            self.run["VTUNE_ELAPSED_TIME"] = float(m.group(1))
+            self.em_resumo = not self.manter_resumo
+
+    def registro(self, meta: Dict[str, str]) -> dict:
+        return {
+            **meta,
+            **self.run,
+            "TRIALS": len(self.trials),
+            "TRIAL_TIMES": self.trials,
+            **self.estatisticas,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Filtra a saída do benchmark (progresso do VTune) e grava log e JSON.")
+    parser.add_argument("--log", type=Path, required=True)
+    parser.add_argument("--json", type=Path, default=None, help="Registro estruturado da run (padrão: <log>.json)")
+    parser.add_argument("--meta", nargs="*", default=[], help="Metadados CHAVE=VALOR gravados no JSON")
+    parser.add_argument("--silencioso", action="store_true", help="Não repete as linhas mantidas na saída padrão")
+    parser.add_argument("--manter-resumo", action="store_true",
+                        help="Mantém no log o resumo do VTune (sem as dicas), que também está no report.csv")
+    args = parser.parse_args(argv)
+
+    meta = dict(item.split("=", 1) for item in args.meta)
+    destino_json = args.json or args.log.with_suffix(".json")
+    args.log.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.log, "wb") as log:
+        saidas = [log] if args.silencioso else [log, sys.stdout.buffer]
+        filtro = FiltroLog(saidas, manter_resumo=args.manter_resumo)
+        while True:
+            # os.read devolve o que já chegou, sem esperar o bloco inteiro
+            bloco = os.read(sys.stdin.fileno(), TAMANHO_BLOCO)
+            if not bloco:
+                break
+            filtro.alimentar(bloco)
+        filtro.finalizar()
+
+    with open(destino_json, "w") as f:
+        json.dump(filtro.registro(meta), f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,304 @@
+"""
+Build incremental e paralelo das figuras (gráficos/) e tabelas LaTeX (tabelas/).
+
+Cada figura ou tabela é um alvo declarado em ALVOS: a tabela do store de onde
+vem (agregados ou hpc), a fatia que usa (filtros por coluna, ex.: um grafo) e a
+função que desenha. O build:
+
+  1. carrega cada tabela do store uma vez;
+  2. recorta a fatia de cada alvo e calcula o hash (conteúdo da fatia + nome da
+     função + VERSAO);
+  3. pula os alvos cujo hash é igual ao do último build (relatorio_build.json)
+     e cujo arquivo de saída ainda existe;
+  4. desenha os restantes em um pool de processos.
+
+Assim, quando só os dados de um grafo mudam, só as figuras desse grafo (e as
+tabelas combinadas, que usam todos os grafos) são refeitas. Mudou o estilo de
+uma figura? Aumente VERSAO ou use --forcar.
+
+Uso (a partir de stage3/):
+  python3 ./src/gera_relatorio.py [--alvos 'speedup_*'] [--forcar] [--workers N] [--listar]
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import STORE_PADRAO, carregar_tabela
+
+GRAFICOS_DIR = Path("gráficos")
+TABELAS_DIR = Path("tabelas")
+MANIFESTO = Path("relatorio_build.json")
+# Aumentar quando o estilo das figuras/tabelas mudar, para refazer tudo
+VERSAO = 1
+# Speedup e eficiência vêm das runs com VTune dessa análise
+ANALISE_SPEEDUP = "performance-snapshot"
+
+CHAVES_SERIE = ["DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY"]
+# Runs do executor.py --concorrente são outro grupo nos agregados e no hpc: fora das figuras
+EXCLUSIVAS = (("CONCORRENTE", False),)
+TABELAS = ("agregados", "hpc")
+
+# Coluna do store -> (nome no arquivo, rótulo do eixo/legenda, escala, casas, maior é melhor)
+METRICAS_HPC = {
+    "AVERAGE_CPU_FREQUENCY": ("average-cpu-frequency", "Frequência Média da CPU (GHz)", 1e-9, 3, True),
+    "MEMORY_BOUND": ("memory-bound", "Memory Bound (\\%)", 1.0, 2, False),
+    "CACHE_BOUND": ("cache-bound", "Cache Bound (\\%)", 1.0, 2, False),
+    "DRAM_BOUND": ("dram-bound", "DRAM Bound (\\%)", 1.0, 2, False),
+    "CPI_RATE": ("cpi-rate", "CPI Rate", 1.0, 3, False),
+}
+
+
+class Alvo(NamedTuple):
+    nome: str
+    saida: Path
+    tabela: str
+    filtros: Tuple[Tuple[str, object], ...]
+    colunas: Tuple[str, ...]
+    desenhar: Callable[..., None]
+    parametros: Tuple = ()
+
+
+def _rotulo_serie(disable_ht: bool, bind: str) -> str:
+    return f"HT {'off' if disable_ht else 'on'}, {bind}"
+
+
+def _nome_curto(grafo: str) -> str:
+    # "web-BerkStan" -> "BerkStan", como nas tabelas do relatório
+    return grafo.split("-", 1)[-1]
+
+
+def _eixo_threads(ax, threads) -> None:
+    ax.set_xlabel("Threads")
+    ax.set_xticks(sorted(set(threads)))
+    ax.grid(True, alpha=0.3)
+
+
+def figura_metrica(df: pd.DataFrame, saida: Path, coluna: str, rotulo: str, escala: float, titulo: str) -> None:
+    """Métrica x threads, uma série por (HT, bind), com o IC quando a tabela tiver."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(6, 4))
+    for (ht, bind), serie in df.groupby(CHAVES_SERIE, observed=True):
+        serie = serie.sort_values("THREADS")
+        y = serie[coluna] * escala
+        linha, = ax.plot(serie["THREADS"], y, marker="o", label=_rotulo_serie(ht, bind))
+        if f"{coluna}_CI_LOW" in serie.columns:
+            ax.fill_between(serie["THREADS"], serie[f"{coluna}_CI_LOW"] * escala, serie[f"{coluna}_CI_HIGH"] * escala,
+                            color=linha.get_color(), alpha=0.2)
+    _eixo_threads(ax, df["THREADS"])
+    ax.set_ylabel(rotulo.replace("\\%", "%"))
+    ax.set_title(titulo)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(saida)
+    plt.close(fig)
+
+
+def tabela_combinada(df: pd.DataFrame, saida: Path, coluna: str, arquivo: str, rotulo: str, escala: float,
+                     casas: int, maior_melhor: bool) -> None:
+    """
+    Tabela grafo x configuração x threads, com o melhor valor de cada linha em
+    verde e o pior em vermelho (mesmo formato das tabelas já no relatório).
+    """
+    df = df.assign(VALOR=df[coluna] * escala)
+    threads = sorted(df["THREADS"].unique())
+    n_colunas = 2 + len(threads)
+    linhas = [
+        "\\begin{table}[ht]",
+        "\\centering",
+        "\\small",
+        f"\\begin{{tabular}}{{ll{'r' * len(threads)}}}",
+        "\\toprule",
+        f"\\multirow{{2}}*{{GRAPH\\_NAME}} & \\multirow{{2}}*{{CONFIG}} & \\multicolumn{{{len(threads)}}}{{c}}{{THREADS}} \\\\",
+        f"\\cmidrule(lr){{3-{n_colunas}}}",
+        " & & " + " & ".join(str(t) for t in threads) + " \\\\",
+        "\\midrule",
+    ]
+    grafos = sorted(df["GRAPH_NAME"].astype(str).unique(), key=_nome_curto)
+    for i, grafo in enumerate(grafos):
+        df_grafo = df[df["GRAPH_NAME"].astype(str) == grafo]
+        matriz = df_grafo.pivot_table(index=CHAVES_SERIE, columns="THREADS", values="VALOR", observed=True)
+        # HT desligado primeiro (H_OFF), close antes de spread
+        matriz = matriz.sort_index(ascending=[False, True])
+        for j, ((ht, bind), valores) in enumerate(matriz.iterrows()):
+            melhor = valores.idxmax() if maior_melhor else valores.idxmin()
+            pior = valores.idxmin() if maior_melhor else valores.idxmax()
+            celulas = []
+            for t in threads:
+                v = valores.get(t, np.nan)
+                texto = "--" if pd.isna(v) else f"{v:.{casas}f}"
+                if t == melhor:
+                    texto = f"\\cellcolor{{ForestGreen}}{{{texto}}}"
+                elif t == pior:
+                    texto = f"\\cellcolor{{BrickRed}}{{{texto}}}"
+                celulas.append(texto)
+            inicio = f"\\multirow{{{len(matriz)}}}{{*}}{{{_nome_curto(grafo)}}}" if j == 0 else ""
+            config = f"H\\_{'OFF' if ht else 'ON'}\\_{str(bind)[0].upper()}"
+            linhas.append(f"{inicio} & {config} & " + " & ".join(celulas) + " \\\\")
+        if i < len(grafos) - 1:
+            linhas.append(f"\\cline{{1-{n_colunas}}}")
+    linhas += [
+        "\\bottomrule",
+        "\\end{tabular}",
+        f"\\caption{{Tabela Combinada de {rotulo} (Valores Ótimos Destacados)}}",
+        f"\\label{{tab:{arquivo}-combined-highlighted}}",
+        "\\end{table}",
+    ]
+    saida.write_text("\n".join(linhas) + "\n")
+
+
+def declarar_alvos(grafos: List[str], graficos_dir: Path = GRAFICOS_DIR, tabelas_dir: Path = TABELAS_DIR) -> List[Alvo]:
+    """Todas as figuras e tabelas do relatório para os grafos presentes no store."""
+    alvos = []
+    serie = ("THREADS",) + tuple(CHAVES_SERIE)
+    for grafo in grafos:
+        filtro_speedup = (("GRAPH_NAME", grafo), ("ANALYSIS_TYPE", ANALISE_SPEEDUP), ("VTUNE_ENABLE", True)) + EXCLUSIVAS
+        for coluna, arquivo, rotulo in [
+            ("SPEEDUP", "speedup_per_run_with_ci", "Speedup"),
+            ("PARALLEL_EFFICIENCY", "parallel_efficiency", "Eficiência paralela"),
+        ]:
+            alvos.append(Alvo(
+                nome=f"{arquivo}_{grafo}",
+                saida=graficos_dir / f"{arquivo}_{grafo}.pdf",
+                tabela="agregados",
+                filtros=filtro_speedup,
+                colunas=serie + (coluna, f"{coluna}_CI_LOW", f"{coluna}_CI_HIGH"),
+                desenhar=figura_metrica,
+                parametros=(coluna, rotulo, 1.0, grafo),
+            ))
+        for coluna, (arquivo, rotulo, escala, _, _) in METRICAS_HPC.items():
+            if coluna == "CPI_RATE":
+                continue
+            nome = f"{arquivo.replace('-', '_')}_vs_threads_{grafo}"
+            alvos.append(Alvo(
+                nome=nome,
+                saida=graficos_dir / f"{nome}.pdf",
+                tabela="hpc",
+                filtros=(("GRAPH_NAME", grafo),) + EXCLUSIVAS,
+                colunas=serie + (coluna, f"{coluna}_CI_LOW", f"{coluna}_CI_HIGH"),
+                desenhar=figura_metrica,
+                parametros=(coluna, rotulo, escala, grafo),
+            ))
+    for coluna, (arquivo, rotulo, escala, casas, maior_melhor) in METRICAS_HPC.items():
+        alvos.append(Alvo(
+            nome=f"{arquivo}_combined_highlighted",
+            saida=tabelas_dir / f"{arquivo}_combined_highlighted.tex",
+            tabela="hpc",
+            filtros=EXCLUSIVAS,
+            colunas=("GRAPH_NAME",) + serie + (coluna,),
+            desenhar=tabela_combinada,
+            parametros=(coluna, arquivo, rotulo, escala, casas, maior_melhor),
+        ))
+    return alvos
+
+
+def carregar_tabelas(store: Path = STORE_PADRAO) -> Dict[str, pd.DataFrame]:
+    """As tabelas do store usadas pelos alvos."""
+    tabelas = {}
+    for nome in TABELAS:
+        df = carregar_tabela(nome, store=store)
+        if "CONCORRENTE" not in df.columns:
+            # Stores importados de CSVs antigos só têm runs exclusivas
+            df = df.assign(CONCORRENTE=False)
+        tabelas[nome] = df
+    return tabelas
+
+
+def fatia(df: pd.DataFrame, alvo: Alvo) -> pd.DataFrame:
+    """Linhas e colunas que o alvo usa, em ordem estável (para o hash)."""
+    mascara = np.ones(len(df), dtype=bool)
+    for coluna, valor in alvo.filtros:
+        mascara &= (df[coluna].astype(str) == str(valor)).to_numpy()
+    colunas = [c for c in alvo.colunas if c in df.columns]
+    return df.loc[mascara, colunas].sort_values(colunas[:4]).reset_index(drop=True)
+
+
+def hash_fatia(df: pd.DataFrame, alvo: Alvo) -> str:
+    h = hashlib.sha256()
+    h.update(f"{VERSAO}|{alvo.desenhar.__name__}|{alvo.parametros}|{list(df.columns)}".encode())
+    h.update(pd.util.hash_pandas_object(df.astype({c: str for c in df.select_dtypes("category").columns}), index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _desenhar(tarefa: Tuple[Callable, pd.DataFrame, Path, Tuple]) -> None:
+    desenhar, df, saida, parametros = tarefa
+    desenhar(df, saida, *parametros)
+
+
+def construir(alvos: List[Alvo], tabelas: Dict[str, pd.DataFrame], manifesto: Path, forcar: bool = False,
+              max_workers: Optional[int] = None) -> Tuple[List[str], List[str]]:
+    """Desenha os alvos desatualizados. Devolve (refeitos, pulados)."""
+    anterior = json.loads(manifesto.read_text()) if manifesto.is_file() else {}
+    atual = dict(anterior)
+    pendentes, pulados = [], []
+    for alvo in alvos:
+        df = fatia(tabelas[alvo.tabela], alvo)
+        h = hash_fatia(df, alvo)
+        if not forcar and anterior.get(alvo.nome) == h and alvo.saida.exists():
+            pulados.append(alvo.nome)
+            continue
+        if df.empty:
+            print(f"[AVISO] Alvo sem dados, ignorado: {alvo.nome}")
+            continue
+        alvo.saida.parent.mkdir(parents=True, exist_ok=True)
+        pendentes.append((alvo, h, (alvo.desenhar, df, alvo.saida, alvo.parametros)))
+
+    refeitos = []
+    if pendentes:
+        workers = max_workers or os.cpu_count() or 1
+        tarefas = [t for _, _, t in pendentes]
+        if workers == 1 or len(tarefas) == 1:
+            resultados = [_desenhar(t) for t in tarefas]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                resultados = list(pool.map(_desenhar, tarefas))
+        for (alvo, h, _), _ in zip(pendentes, resultados):
+            atual[alvo.nome] = h
+            refeitos.append(alvo.nome)
+    manifesto.write_text(json.dumps(atual, indent=1, sort_keys=True))
+    return refeitos, pulados
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Gera as figuras e tabelas do relatório só onde os dados mudaram.")
+    parser.add_argument("--store", type=Path, default=STORE_PADRAO)
+    parser.add_argument("--graficos-dir", type=Path, default=GRAFICOS_DIR)
+    parser.add_argument("--tabelas-dir", type=Path, default=TABELAS_DIR)
+    parser.add_argument("--manifesto", type=Path, default=MANIFESTO)
+    parser.add_argument("--alvos", nargs="*", default=None, help="Padrões (fnmatch) dos alvos a considerar")
+    parser.add_argument("--forcar", action="store_true", help="Refaz os alvos mesmo com o hash igual")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de desenho (padrão: todos os CPUs)")
+    parser.add_argument("--listar", action="store_true", help="Só lista os alvos")
+    args = parser.parse_args(argv)
+
+    tabelas = carregar_tabelas(args.store)
+    grafos = sorted(set(tabelas["agregados"]["GRAPH_NAME"].astype(str)) | set(tabelas["hpc"]["GRAPH_NAME"].astype(str)))
+    alvos = declarar_alvos(grafos, args.graficos_dir, args.tabelas_dir)
+    if args.alvos:
+        alvos = [a for a in alvos if any(fnmatch.fnmatch(a.nome, p) for p in args.alvos)]
+
+    if args.listar:
+        for alvo in alvos:
+            print(f"{alvo.nome}\t{alvo.tabela}\t{dict(alvo.filtros)}\t{alvo.saida}")
+        return 0
+
+    refeitos, pulados = construir(alvos, tabelas, args.manifesto, args.forcar, args.workers)
+    for nome in refeitos:
+        print(f"[INFO] Gerado: {nome}")
+    print(f"[INFO] {len(refeitos)} alvos gerados, {len(pulados)} sem mudança nos dados")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+"""
+Gera um job array do SLURM a partir do CSV de experimentos.
+
+As linhas de experiments.csv / experiments_noVTune.csv são divididas em N
+shards (round-robin, para espalhar os grafos grandes). Cada tarefa do array
+roda um shard em slurm/work/shard-<i>/, com results/, logs/ e run_ledger.csv
+próprios, usando build_commad.py --retomar e o executor paralelo. Os scripts
+gerados em slurm/ são:
+
+  preparo.slurm  baixa/converte cada grafo uma única vez para o cache de .sg (cache_grafos.py)
+  array.slurm    uma tarefa por shard (#SBATCH --array=0-(N-1))
+  unifica.slurm  junta as árvores dos shards em results/ e logs/ e roda a unificação
+  submete.sh     encadeia os três com --dependency
+
+Com --local os mesmos scripts são executados nesta máquina, em sequência,
+para testar a divisão sem um cluster.
+
+Uso (a partir de stage3/):
+  python3 ./src/gera_slurm_array.py --csv experiments_noVTune.csv --shards 8 [--local]
+"""
+
+import argparse
+import csv
+import os
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+SLURM_DIR = Path("slurm")
+PARTICAO = "blaise"
+TEMPO_LIMITE = "24:00:00"
+VTUNE_VARS = "/home/intel/oneapi/vtune/2021.1.1/vtune-vars.sh"
+
+CABECALHO = """#!/bin/bash
+#SBATCH --job-name={nome}
+#SBATCH --partition={particao}
+#SBATCH --nodes=1
+#SBATCH --ntasks=1
+#SBATCH --exclusive
+#SBATCH --time={tempo}
+#SBATCH --output={slurm_dir}/logs/%x_%A_%a.out
+#SBATCH --error={slurm_dir}/logs/%x_%A_%a.err
+{extra}
+set -euo pipefail
+
+PROJECT_DIR="{project_dir}"
+SLURM_DIR="{slurm_dir}"
+cd "$PROJECT_DIR"
+"""
+
+PREPARO = """
+# Compila o GAPBS se necessário (mesmo passo do perf_analysis_pr.sh)
+if [ ! -d "src/gapbs" ]; then
+  (cd src && git clone https://github.com/sbeamer/gapbs.git && cd gapbs && make)
+fi
+
+# Baixa e converte cada grafo uma única vez, antes das tarefas do array
+python3 ./src/cache_grafos.py --csv "{csv}"
+"""
+
+TAREFA = """
+SHARD="${{SLURM_ARRAY_TASK_ID:?SLURM_ARRAY_TASK_ID não definido}}"
+WORK="$SLURM_DIR/work/shard-$SHARD"
+mkdir -p "$WORK"
+cd "$WORK"
+
+# O shard usa o src/ e os grafos já preparados do projeto; results/ e logs/ são próprios
+ln -sfn "$PROJECT_DIR/src" src
+ln -sfn "$PROJECT_DIR/data" data
+
+if [[ -f "{vtune_vars}" ]]; then
+  source "{vtune_vars}"
+fi
+if command -v cpufreq-set >/dev/null 2>&1; then
+  cpufreq-set -g performance || true
+fi
+
+echo "[INFO] Shard $SHARD em $(hostname): $(pwd)"
+python3 ./src/build_commad.py --csv "$SLURM_DIR/shards/shard-$SHARD.csv" --retomar --cache-grafos --saida-dir .
+python3 ./src/executor.py --comandos ./commands.txt
+"""
+
+UNIFICA = """
+# Junta as árvores de cada shard (os caminhos não se sobrepõem entre shards)
+mkdir -p results logs
+for shard in "$SLURM_DIR"/work/shard-*; do
+  for dir in results logs; do
+    if [[ -d "$shard/$dir" ]]; then
+      cp -r "$shard/$dir/." "./$dir/"
+    fi
+  done
+done
+
+python3 ./src/unify_all_results.py
+python3 ./src/logs_gapbs.py
+"""
+
+SUBMETE = """#!/bin/bash
+set -euo pipefail
+cd "{slurm_dir}"
+mkdir -p logs
+prep=$(sbatch --parsable preparo.slurm)
+array=$(sbatch --parsable --dependency=afterok:$prep array.slurm)
+# afterany: unifica o que houver mesmo se alguma tarefa estourar o tempo
+unif=$(sbatch --parsable --dependency=afterany:$array unifica.slurm)
+echo "[INFO] preparo=$prep array=$array unifica=$unif"
+"""
+
+
+def dividir_em_shards(csv_file: Path, n_shards: int) -> List[List[List[str]]]:
+    """Divide as linhas do CSV em n_shards (round-robin). Devolve [header] + shards."""
+    with open(csv_file, "r", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        linhas = [row for row in reader if row]
+    n_shards = max(1, min(n_shards, len(linhas)))
+    shards: List[List[List[str]]] = [[] for _ in range(n_shards)]
+    for i, row in enumerate(linhas):
+        shards[i % n_shards].append(row)
+    return [header] + shards
+
+
+def gerar(
+    csv_file: Path,
+    n_shards: int,
+    slurm_dir: Path = SLURM_DIR,
+    particao: str = PARTICAO,
+    tempo: str = TEMPO_LIMITE,
+) -> int:
+    """Escreve os shards e os scripts em slurm_dir. Devolve o número de shards."""
+    header, *shards = dividir_em_shards(csv_file, n_shards)
+    slurm_dir = slurm_dir.resolve()
+    project_dir = Path.cwd().resolve()
+    (slurm_dir / "shards").mkdir(parents=True, exist_ok=True)
+    (slurm_dir / "logs").mkdir(parents=True, exist_ok=True)
+
+    for i, shard in enumerate(shards):
+        with open(slurm_dir / "shards" / f"shard-{i}.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(shard)
+
+    comuns = dict(particao=particao, tempo=tempo, slurm_dir=slurm_dir, project_dir=project_dir)
+    scripts = {
+        "preparo.slurm": CABECALHO.format(nome="perf-preparo", extra="", **comuns)
+        + PREPARO.format(csv=csv_file.resolve()),
+        "array.slurm": CABECALHO.format(nome="perf-shard", extra=f"#SBATCH --array=0-{len(shards) - 1}", **comuns)
+        + TAREFA.format(vtune_vars=VTUNE_VARS),
+        "unifica.slurm": CABECALHO.format(nome="perf-unifica", extra="", **comuns) + UNIFICA,
+        "submete.sh": SUBMETE.format(slurm_dir=slurm_dir),
+    }
+    for nome, conteudo in scripts.items():
+        caminho = slurm_dir / nome
+        caminho.write_text(conteudo)
+        caminho.chmod(0o755)
+    return len(shards)
+
+
+def executar_local(n_shards: int, slurm_dir: Path = SLURM_DIR) -> int:
+    """
+    Executa preparo, todas as tarefas do array e a unificação nesta máquina,
+    em sequência. Devolve o número de etapas que falharam.
+    """
+    slurm_dir = slurm_dir.resolve()
+    falhas = 0
+
+    def rodar(script: str, env_extra: Optional[dict] = None) -> int:
+        env = dict(os.environ, **(env_extra or {}))
+        print(f"[INFO] Local: {script} {env_extra or ''}")
+        return subprocess.run(["bash", str(slurm_dir / script)], env=env).returncode
+
+    if rodar("preparo.slurm") != 0:
+        print("[ERRO] Preparo falhou; tarefas não executadas")
+        return 1
+    for i in range(n_shards):
+        if rodar("array.slurm", {"SLURM_ARRAY_TASK_ID": str(i)}) != 0:
+            print(f"[AVISO] Shard {i} falhou")
+            falhas += 1
+    if rodar("unifica.slurm") != 0:
+        falhas += 1
+    return falhas
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Gera um job array do SLURM a partir do CSV de experimentos.")
+    parser.add_argument("--csv", type=Path, default=Path("experiments_noVTune.csv"))
+    parser.add_argument("--shards", type=int, required=True)
+    parser.add_argument("--slurm-dir", type=Path, default=SLURM_DIR)
+    parser.add_argument("--particao", default=PARTICAO)
+    parser.add_argument("--tempo", default=TEMPO_LIMITE)
+    parser.add_argument("--local", action="store_true", help="Executa os shards nesta máquina em vez de submeter")
+    args = parser.parse_args(argv)
+
+    n = gerar(args.csv, args.shards, args.slurm_dir, args.particao, args.tempo)
+    print(f"[INFO] {n} shards gerados em {args.slurm_dir}")
+    if args.local:
+        return 1 if executar_local(n, args.slurm_dir) else 0
+    print(f"[INFO] Para submeter: {args.slurm_dir / 'submete.sh'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
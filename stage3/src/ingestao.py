@@ -0,0 +1,430 @@
+"""
+Ingestão compartilhada dos report.csv gerados pelo VTune.
+
+Descobre os reports em results/<GRAPH_NAME>/<ANALYSIS_TYPE>/threads-X/ht-*/bind-*/run-N/
+e os lê em paralelo (ProcessPoolExecutor) com um parser simples baseado em
+split('\t'), devolvendo uma única tabela em formato longo:
+
+  GRAPH_NAME, ANALYSIS_TYPE, THREADS, DISABLE_HYPERTHREADING, THREAD_BIND_POLICY, RUN,
+  HIERARCHY_LEVEL, METRIC_NAME, METRIC_PATH, METRIC_VALUE, METRIC_COUNT,
+  METRIC_TOTAL, METRIC_TEXT
+
+METRIC_PATH é o nome com os pais na hierarquia do VTune, separados por
+SEPARADOR_CAMINHO (tab, que nunca aparece num nome porque separa os campos do
+report; nomes como "FP Arith/Mem Rd Instr. Ratio" têm "/"). Use
+caminho_metrica("Memory Bound", "DRAM Bound") para montar um caminho (as chaves
+de METRICAS_HPC em extrair_metricias_hpc.py são montadas assim) e
+rotulo_caminho() para exibi-lo. METRIC_VALUE é o valor numérico (NaN quando
+o valor não é um número) e METRIC_TEXT é o texto original da célula. Valores
+como "12.8% (11.284 out of 88)" viram METRIC_VALUE=12.8, METRIC_COUNT=11.284
+e METRIC_TOTAL=88.
+
+As tabelas aninhadas (linhas com mais de três campos, como Bandwidth
+Utilization e Top Hotspots) viram métricas filhas da linha anterior: a
+primeira linha sem números é o cabeçalho, e cada célula das demais vira
+<pai> > <rótulo da linha> > <coluna>, ex.: a Bandwidth Utilization do
+hpc-performance fica abaixo de Memory Bound, então a banda máxima observada é
+caminho_metrica("Memory Bound", "Bandwidth Utilization", "DRAM, GB/sec",
+                "Observed Maximum").
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from topologia import POLITICAS_OMP
+
+COLUNAS_CONFIG = [
+    "GRAPH_NAME",
+    "ANALYSIS_TYPE",
+    "THREADS",
+    "DISABLE_HYPERTHREADING",
+    "THREAD_BIND_POLICY",
+    "CONCORRENTE",
+    "RUN",
+]
+COLUNAS_METRICA = [
+    "HIERARCHY_LEVEL",
+    "METRIC_NAME",
+    "METRIC_PATH",
+    "METRIC_VALUE",
+    "METRIC_COUNT",
+    "METRIC_TOTAL",
+    "METRIC_TEXT",
+]
+
+# "37.78", "12.8%" ou "12.8% (11.284 out of 88)"
+_NUMERO = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+PADRAO_VALOR = rf"^\s*({_NUMERO})\s*%?\s*(?:\(\s*({_NUMERO})\s+out of\s+({_NUMERO})\s*\))?\s*$"
+_VALOR = re.compile(PADRAO_VALOR)
+
+# Separa os níveis em METRIC_PATH; o tab separa os campos do report, então não aparece em nomes
+SEPARADOR_CAMINHO = "\t"
+# Muda quando _parse_linhas passa a extrair outras linhas (invalida o cache SQLite)
+VERSAO_PARSER = 2
+
+
+def caminho_metrica(*nomes: str) -> str:
+    """METRIC_PATH de uma métrica, a partir dos nomes do topo da hierarquia até ela."""
+    return SEPARADOR_CAMINHO.join(nomes)
+
+
+def rotulo_caminho(caminho: str) -> str:
+    """METRIC_PATH legível, para tabelas e gráficos."""
+    return caminho.replace(SEPARADOR_CAMINHO, " > ")
+
+
+def extrair_infos_caminho(rel_path_parts: List[str]) -> Optional[Tuple[str, str, int, bool, str, bool, int]]:
+    """
+    Recebe as partes do caminho relativo a 'results' e extrai:
+      GRAPH_NAME, ANALYSIS_TYPE, THREADS, DISABLE_HYPERTHREADING, THREAD_BIND_POLICY, CONCORRENTE, RUN.
+
+    Espera algo do tipo:
+      [GRAPH_NAME, ANALYSIS_TYPE, 'threads-X',
+       'ht-true|ht-false', 'bind-<policy>', 'run-N']
+
+    Nota: ht-true significa que o HT foi DESATIVADO (disable_ht=True)
+          ht-false significa que o HT está ATIVADO (disable_ht=False)
+
+    CONCORRENTE marca as runs close/spread feitas pelo executor.py --concorrente
+    (pasta bind-<policy>@<CPUs>), que dividiram a máquina com outras runs. As
+    agregações usam CONCORRENTE como chave: essas runs formam um grupo próprio,
+    com a base sequencial também concorrente, sem se misturar com as exclusivas.
+    """
+    if len(rel_path_parts) < 6:
+        return None
+
+    graph_name = rel_path_parts[0]
+    analysis_type = rel_path_parts[1]
+    threads_dir = rel_path_parts[2]
+    ht_dir = rel_path_parts[3]
+    bind_dir = rel_path_parts[4]
+    run_dir = rel_path_parts[5]
+
+    # threads-X
+    try:
+        _, threads_str = threads_dir.split("-", 1)
+        threads = int(threads_str)
+    except Exception:
+        return None
+
+    # ht-true|ht-false (ou disable-ht-true|disable-ht-false para compatibilidade)
+    try:
+        if ht_dir.startswith("ht-"):
+            disable_ht = ht_dir.split("-")[1] == "true"
+        elif ht_dir.startswith("disable-ht-"):
+            disable_ht = ht_dir.split("-")[2] == "true"
+        else:
+            return None
+    except Exception:
+        return None
+
+    # bind-<policy> ou bind-<policy>@<CPUs>. Nas políticas de topologia.py as
+    # CPUs fazem parte da política; em close/spread são a reserva do executor
+    try:
+        _, thread_bind_policy = bind_dir.split("-", 1)
+        thread_bind_policy, _, cpus = thread_bind_policy.partition("@")
+        concorrente = bool(cpus) and thread_bind_policy.lower() in POLITICAS_OMP
+    except Exception:
+        return None
+
+    # run-N
+    try:
+        _, run_str = run_dir.split("-", 1)
+        run_id = int(run_str)
+    except Exception:
+        return None
+
+    return graph_name, analysis_type, threads, disable_ht, thread_bind_policy, concorrente, run_id
+
+
+def descobrir_reports(results_root: Path) -> List[Tuple[Path, Tuple[str, str, int, bool, str, bool, int]]]:
+    """
+    Procura todos os report.csv abaixo de results_root e devolve pares
+    (caminho, config) apenas para os caminhos que seguem o layout esperado.
+    """
+    encontrados = []
+    for dirpath, _, filenames in os.walk(results_root):
+        if "report.csv" not in filenames:
+            continue
+        report_path = Path(dirpath) / "report.csv"
+        info = extrair_infos_caminho(list(report_path.parent.relative_to(results_root).parts))
+        if info is not None:
+            encontrados.append((report_path, info))
+    encontrados.sort(key=lambda item: item[0])
+    return encontrados
+
+
+def _parse_linhas(linhas_texto: Iterable[str]) -> List[Tuple[int, str, str]]:
+    linhas = []
+    cabecalho: Optional[List[str]] = None
+    for linha in linhas_texto:
+        campos = linha.rstrip("\r\n").split("\t")
+        try:
+            nivel = int(campos[0])
+        except ValueError:
+            continue
+        if len(campos) > 3:
+            # Tabela aninhada: a linha sem números é o cabeçalho; as outras viram
+            # (rótulo da linha, vazio) e uma métrica por coluna, abaixo da linha anterior
+            if not any(_VALOR.match(c) for c in campos[2:]):
+                cabecalho = campos[2:]
+            elif cabecalho is not None:
+                linhas.append((nivel + 1, campos[1], ""))
+                linhas.extend((nivel + 2, coluna, valor) for coluna, valor in zip(cabecalho, campos[2:]))
+            continue
+        cabecalho = None
+        nome = campos[1] if len(campos) > 1 else ""
+        valor = campos[2] if len(campos) > 2 else ""
+        linhas.append((nivel, nome, valor))
+    return linhas
+
+
+def ler_report(report_path: str) -> List[Tuple[int, str, str]]:
+    """
+    Lê um report.csv (separado por tab) e devolve (nível, nome, valor) por linha.
+
+    As linhas das tabelas aninhadas (Bandwidth, Top Hotspots) viram uma linha
+    por célula, um e dois níveis abaixo da linha que a tabela detalha.
+    """
+    with open(report_path, "r", encoding="utf-8", errors="replace") as f:
+        next(f, None)  # cabeçalho: Hierarchy Level, Metric Name, Metric Value
+        return _parse_linhas(f)
+
+
+def _ler_report_seguro(report_path: str) -> List[Tuple[int, str, str]]:
+    try:
+        return ler_report(report_path)
+    except OSError as e:
+        print(f"[AVISO] Falha ao ler {report_path}: {e}")
+        return []
+
+
+def _ler_report_com_hash(report_path: str) -> Tuple[str, List[Tuple[int, str, str]]]:
+    # Lê o arquivo uma única vez para calcular o hash e extrair as métricas
+    try:
+        with open(report_path, "rb") as f:
+            conteudo = f.read()
+    except OSError as e:
+        print(f"[AVISO] Falha ao ler {report_path}: {e}")
+        return "", []
+    texto = conteudo.decode("utf-8", errors="replace").splitlines()
+    return hashlib.sha1(conteudo).hexdigest(), _parse_linhas(texto[1:])
+
+
+def mapear_paralelo(funcao, caminhos: List[str], max_workers: Optional[int]) -> list:
+    """Aplica funcao a cada caminho em um pool de processos (ou em série se max_workers=1)."""
+    if max_workers == 1 or len(caminhos) < 2:
+        return [funcao(p) for p in caminhos]
+    workers = max_workers or os.cpu_count() or 1
+    # Lotes grandes diluem o custo de serialização entre processos
+    chunksize = max(1, len(caminhos) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(funcao, caminhos, chunksize=chunksize))
+
+
+def caminhos_hierarquia(linhas: List[Tuple[int, str, str]]) -> List[str]:
+    """
+    Devolve, para cada linha de um report, o nome da métrica prefixado pelos
+    pais segundo o Hierarchy Level (ex.: caminho_metrica("Memory Bound", "DRAM Bound")).
+    """
+    pilha: List[str] = []
+    caminhos = []
+    for nivel, nome, _ in linhas:
+        del pilha[nivel:]
+        pilha.append(nome)
+        caminhos.append(caminho_metrica(*pilha))
+    return caminhos
+
+
+def montar_tabela_longa(configs: Iterable[Tuple], metricas: Iterable[List[Tuple[int, str, str]]]) -> pd.DataFrame:
+    """Junta as configs e as métricas lidas de cada report em uma tabela longa."""
+    linhas = [
+        (*info, nivel, nome, caminho, valor)
+        for info, linhas_report in zip(configs, metricas)
+        for (nivel, nome, valor), caminho in zip(linhas_report, caminhos_hierarquia(linhas_report))
+    ]
+    df = pd.DataFrame(
+        linhas,
+        columns=COLUNAS_CONFIG + ["HIERARCHY_LEVEL", "METRIC_NAME", "METRIC_PATH", "METRIC_TEXT"],
+    )
+    partes = df["METRIC_TEXT"].str.extract(PADRAO_VALOR)
+    df["METRIC_VALUE"] = pd.to_numeric(partes[0], errors="coerce")
+    df["METRIC_COUNT"] = pd.to_numeric(partes[1], errors="coerce")
+    df["METRIC_TOTAL"] = pd.to_numeric(partes[2], errors="coerce")
+    return df[COLUNAS_CONFIG + COLUNAS_METRICA]
+
+
+def tabela_larga(df_longo: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte a tabela longa em uma matriz com uma linha por run e uma coluna
+    por METRIC_PATH numérico. Métricas do tipo "x% (a out of b)" ganham também
+    as colunas "<path> (count)" e "<path> (total)".
+    """
+    df = df_longo.dropna(subset=["METRIC_VALUE"])
+    df = df.drop_duplicates(subset=COLUNAS_CONFIG + ["METRIC_PATH"], keep="first")
+    df_larga = df.pivot(index=COLUNAS_CONFIG, columns="METRIC_PATH", values="METRIC_VALUE")
+
+    df_partes = df.dropna(subset=["METRIC_COUNT"])
+    if not df_partes.empty:
+        contagens = df_partes.pivot(index=COLUNAS_CONFIG, columns="METRIC_PATH", values="METRIC_COUNT")
+        totais = df_partes.pivot(index=COLUNAS_CONFIG, columns="METRIC_PATH", values="METRIC_TOTAL")
+        df_larga = df_larga.join(contagens.add_suffix(" (count)")).join(totais.add_suffix(" (total)"))
+
+    df_larga.columns.name = None
+    return df_larga.reset_index()
+
+
+def caminho_cache_padrao(results_root: Path) -> Path:
+    """Cache de ingestão padrão: um SQLite ao lado da pasta results/."""
+    results_root = Path(results_root)
+    return results_root.parent / f"{results_root.name}_ingestao_cache.sqlite"
+
+
+def _abrir_cache(cache_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(cache_path))
+    if conn.execute("PRAGMA user_version").fetchone()[0] != VERSAO_PARSER:
+        # Cache de uma versão anterior do parser: as métricas guardadas estão incompletas
+        conn.executescript("DROP TABLE IF EXISTS metricas; DROP TABLE IF EXISTS reports;")
+        conn.execute(f"PRAGMA user_version = {VERSAO_PARSER}")
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS reports (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            sha1 TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS metricas (
+            path TEXT NOT NULL,
+            ordem INTEGER NOT NULL,
+            nivel INTEGER NOT NULL,
+            nome TEXT NOT NULL,
+            valor TEXT NOT NULL,
+            PRIMARY KEY (path, ordem)
+        ) WITHOUT ROWID;
+        """
+    )
+    return conn
+
+
+def _sincronizar_cache(
+    conn: sqlite3.Connection,
+    results_root: Path,
+    caminhos_rel: List[str],
+    max_workers: Optional[int],
+) -> Tuple[int, int]:
+    """
+    Atualiza o cache para refletir os reports presentes em results_root.
+
+    Reports com mesmo tamanho e mtime são reaproveitados; os novos ou
+    alterados são lidos (em paralelo) e os que sumiram do disco são removidos.
+    Retorna (quantidade lida, quantidade removida).
+    """
+    em_cache = {
+        path: (size, mtime_ns, sha1)
+        for path, size, mtime_ns, sha1 in conn.execute("SELECT path, size, mtime_ns, sha1 FROM reports")
+    }
+
+    alterados = []
+    stats = {}
+    for rel in caminhos_rel:
+        st = os.stat(results_root / rel)
+        stats[rel] = (st.st_size, st.st_mtime_ns)
+        anterior = em_cache.get(rel)
+        if anterior is None or anterior[:2] != stats[rel]:
+            alterados.append(rel)
+
+    removidos = set(em_cache) - set(caminhos_rel)
+    lidos = mapear_paralelo(_ler_report_com_hash, [str(results_root / rel) for rel in alterados], max_workers)
+
+    with conn:
+        conn.executemany("DELETE FROM metricas WHERE path = ?", [(rel,) for rel in removidos])
+        conn.executemany("DELETE FROM reports WHERE path = ?", [(rel,) for rel in removidos])
+        for rel, (sha1, linhas) in zip(alterados, lidos):
+            if not sha1:
+                # Falha de leitura: tenta de novo na próxima execução
+                continue
+            size, mtime_ns = stats[rel]
+            anterior = em_cache.get(rel)
+            if anterior is not None and anterior[2] == sha1:
+                # Só o mtime mudou (ex.: cópia do diretório); conteúdo igual
+                conn.execute("UPDATE reports SET size = ?, mtime_ns = ? WHERE path = ?", (size, mtime_ns, rel))
+                continue
+            conn.execute("DELETE FROM metricas WHERE path = ?", (rel,))
+            conn.execute(
+                "INSERT OR REPLACE INTO reports (path, size, mtime_ns, sha1) VALUES (?, ?, ?, ?)",
+                (rel, size, mtime_ns, sha1),
+            )
+            conn.executemany(
+                "INSERT INTO metricas (path, ordem, nivel, nome, valor) VALUES (?, ?, ?, ?, ?)",
+                [(rel, ordem, nivel, nome, valor) for ordem, (nivel, nome, valor) in enumerate(linhas)],
+            )
+
+    return len(alterados), len(removidos)
+
+
+def _carregar_cache(conn: sqlite3.Connection, caminhos_rel: List[str]) -> List[List[Tuple[int, str, str]]]:
+    por_caminho = {rel: [] for rel in caminhos_rel}
+    for path, nivel, nome, valor in conn.execute(
+        "SELECT path, nivel, nome, valor FROM metricas ORDER BY path, ordem"
+    ):
+        linhas = por_caminho.get(path)
+        if linhas is not None:
+            linhas.append((nivel, nome, valor))
+    return [por_caminho[rel] for rel in caminhos_rel]
+
+
+def ingerir_reports(
+    results_root: Path,
+    analises: Optional[Iterable[str]] = None,
+    max_workers: Optional[int] = None,
+    cache: Optional[Path] = None,
+) -> pd.DataFrame:
+    """
+    Descobre e lê todos os report.csv de results_root em um pool de processos.
+
+    analises restringe os ANALYSIS_TYPE lidos (ex.: ["hpc-performance"]).
+    Com max_workers=1 a leitura é feita no próprio processo.
+    Com cache (caminho de um SQLite) só os reports novos ou alterados desde a
+    última execução são lidos; os removidos do disco saem do cache.
+    results_root também pode ser um pacote de pacote_runs.py (o cache é ignorado).
+    """
+    results_root = Path(results_root)
+    if results_root.is_file():
+        # Import local: pacote_runs usa o parser deste módulo
+        from pacote_runs import ingerir_reports_pacote
+        return ingerir_reports_pacote(results_root, analises)
+    encontrados = descobrir_reports(results_root)
+    if analises is not None:
+        analises = set(analises)
+
+    if cache is None:
+        if analises is not None:
+            encontrados = [(p, info) for p, info in encontrados if info[1] in analises]
+        metricas = mapear_paralelo(_ler_report_seguro, [str(p) for p, _ in encontrados], max_workers)
+        return montar_tabela_longa([info for _, info in encontrados], metricas)
+
+    # O cache é sincronizado com a árvore inteira, mesmo quando só algumas análises são pedidas
+    caminhos_rel = [p.relative_to(results_root).as_posix() for p, _ in encontrados]
+    conn = _abrir_cache(Path(cache))
+    try:
+        lidos, removidos = _sincronizar_cache(conn, results_root, caminhos_rel, max_workers)
+        print(f"[INFO] Cache de ingestão: {lidos} reports lidos, {removidos} removidos, "
+              f"{len(caminhos_rel) - lidos} reaproveitados")
+
+        selecionados = [
+            (rel, info) for rel, (_, info) in zip(caminhos_rel, encontrados)
+            if analises is None or info[1] in analises
+        ]
+        metricas = _carregar_cache(conn, [rel for rel, _ in selecionados])
+    finally:
+        conn.close()
+
+    return montar_tabela_longa([info for _, info in selecionados], metricas)
@@ -0,0 +1,107 @@
+"""
+Medição de tempo e memória por etapa dos scripts de pós-processamento.
+
+Desligada por padrão. Para ligar numa execução normal:
+
+  PERF_ETAPAS=1 python3 ./src/unify_all_results.py
+  PERF_ETAPAS=1 PERF_ETAPAS_MEMORIA=1 PERF_ETAPAS_ARQUIVO=tempos_etapas.csv python3 ./src/logs_gapbs.py
+
+Cada etapa imprime uma linha [TEMPO] com o tempo de parede, o tempo de CPU
+(deste processo e dos filhos, ou seja, inclui o pool de leitura dos reports)
+e, com PERF_ETAPAS_MEMORIA, o pico de memória alocada pelo Python/NumPy
+durante a etapa (tracemalloc, que deixa a execução mais lenta). O tracemalloc
+só enxerga este processo; a memória dos workers do ProcessPoolExecutor aparece
+em MAXRSS_FILHOS_MB, o maior RSS entre os filhos já encerrados (acumulado
+desde o início do processo, como o MAXRSS_MB). Com PERF_ETAPAS_ARQUIVO as
+medições também são acrescentadas a um CSV.
+
+As etapas não devem ser aninhadas quando a memória é medida: o pico é
+zerado no início de cada etapa.
+"""
+
+import csv
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+ATIVO = os.environ.get("PERF_ETAPAS", "0") not in ("", "0")
+MEDIR_MEMORIA = os.environ.get("PERF_ETAPAS_MEMORIA", "0") not in ("", "0")
+ARQUIVO = os.environ.get("PERF_ETAPAS_ARQUIVO")
+
+COLUNAS = ["SCRIPT", "ETAPA", "WALL_TIME", "CPU_TIME", "PICO_MEMORIA_MB", "MAXRSS_MB", "MAXRSS_FILHOS_MB"]
+
+# Medições feitas neste processo (uma por etapa concluída)
+REGISTROS: List[dict] = []
+
+
+def _tempo_cpu() -> float:
+    proprio = resource.getrusage(resource.RUSAGE_SELF)
+    filhos = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return proprio.ru_utime + proprio.ru_stime + filhos.ru_utime + filhos.ru_stime
+
+
+def _maxrss_mb(quem: int = resource.RUSAGE_SELF) -> float:
+    # ru_maxrss vem em KiB no Linux
+    return resource.getrusage(quem).ru_maxrss / 1024
+
+
+@contextmanager
+def etapa(
+    nome: str,
+    ativo: Optional[bool] = None,
+    memoria: Optional[bool] = None,
+    arquivo: Optional[str] = None,
+) -> Iterator[None]:
+    """Mede o bloco como a etapa `nome` quando a instrumentação está ligada."""
+    ativo = ATIVO if ativo is None else ativo
+    if not ativo:
+        yield
+        return
+
+    memoria = MEDIR_MEMORIA if memoria is None else memoria
+    arquivo = ARQUIVO if arquivo is None else arquivo
+    iniciou_trace = False
+    if memoria:
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+            iniciou_trace = True
+
+    t0, cpu0 = time.perf_counter(), _tempo_cpu()
+    try:
+        yield
+    finally:
+        registro = {
+            "SCRIPT": Path(sys.argv[0]).name,
+            "ETAPA": nome,
+            "WALL_TIME": time.perf_counter() - t0,
+            "CPU_TIME": _tempo_cpu() - cpu0,
+            "PICO_MEMORIA_MB": tracemalloc.get_traced_memory()[1] / 2**20 if memoria else float("nan"),
+            "MAXRSS_MB": _maxrss_mb(),
+            "MAXRSS_FILHOS_MB": _maxrss_mb(resource.RUSAGE_CHILDREN),
+        }
+        if iniciou_trace:
+            tracemalloc.stop()
+        REGISTROS.append(registro)
+
+        texto = f"[TEMPO] {nome}: {registro['WALL_TIME']:.3f} s (CPU {registro['CPU_TIME']:.3f} s)"
+        if memoria:
+            texto += f", pico {registro['PICO_MEMORIA_MB']:.1f} MB"
+        print(texto)
+        if arquivo:
+            _acrescentar_csv(Path(arquivo), registro)
+
+
+def _acrescentar_csv(arquivo: Path, registro: dict) -> None:
+    novo = not arquivo.exists()
+    with open(arquivo, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUNAS)
+        if novo:
+            writer.writeheader()
+        writer.writerow(registro)
@@ -0,0 +1,259 @@
+"""
+Parser dos logs do GAPBS gerados por executa_bench.sh.
+
+Percorre logs/<GRAPH_NAME>/<ANALYSIS_TYPE>/threads-X/ht-*/bind-*/run-N/*.log e
+extrai Read Time, Build Time, número de nós/arestas, cada Trial Time, o
+Average Time e se a run foi feita com o VTune (VTUNE_ENABLE). Os logs são lidos em blocos, tratando '\\r' como quebra de
+linha, e linhas muito longas (o progresso do VTune) são descartadas sem
+serem carregadas inteiras em memória.
+
+Gera duas tabelas:
+  - trials: uma linha por trial (TRIAL, TRIAL_TIME) de cada run
+  - tempos_logs: uma linha por run, no formato do logs_average_times.csv
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from anomalias import gravar_reexecucao, marcar_anomalias
+from armazenamento import STORE_PADRAO, gravar_tabela
+from filtro_log import PADRAO_GRAFO, PADRAO_TEMPO
+from ingestao import COLUNAS_CONFIG, extrair_infos_caminho, mapear_paralelo
+from instrumentacao import etapa
+from pacote_runs import logs_do_pacote, origem_runs
+
+LOGS_ROOT = Path("logs")
+# O store colunar é a saída principal; os CSVs são mantidos para os notebooks antigos
+EXPORTAR_CSV = True
+OUTPUT_CSV_TEMPOS = Path("logs_average_times.csv")
+OUTPUT_CSV_TRIALS = Path("logs_trials.csv")
+# Runs anômalas, no formato de build_commad.py --reexecutar
+REEXECUTAR_CSV = Path("reexecutar_noVTune.csv")
+
+TAMANHO_BLOCO = 1 << 16
+TAMANHO_MAX_LINHA = 512
+
+COLUNAS_RUN = ["READ_TIME", "BUILD_TIME", "NODES", "EDGES", "AVERAGE_TIME", "TRIALS", "VTUNE_ENABLE"]
+
+
+def _blocos_arquivo(caminho: Path) -> Iterator[bytes]:
+    with open(caminho, "rb") as f:
+        while True:
+            bloco = f.read(TAMANHO_BLOCO)
+            if not bloco:
+                break
+            yield bloco
+
+
+def linhas_curtas(caminho: Path, tamanho_max: int = TAMANHO_MAX_LINHA) -> Iterator[bytes]:
+    """
+    Itera sobre as linhas de um arquivo separadas por '\\n' ou '\\r', em blocos
+    de tamanho fixo. Linhas maiores que tamanho_max são descartadas.
+    """
+    return linhas_curtas_blocos(_blocos_arquivo(caminho), tamanho_max)
+
+
+def linhas_curtas_blocos(blocos: Iterable[bytes], tamanho_max: int = TAMANHO_MAX_LINHA) -> Iterator[bytes]:
+    """Como linhas_curtas, para um conteúdo já em memória ou vindo do pacote de runs."""
+    resto = b""
+    descartando = False
+    for bloco in blocos:
+        partes = re.split(rb"[\r\n]", resto + bloco)
+        resto = partes.pop()
+        for parte in partes:
+            if descartando:
+                # Fim da linha longa que estava sendo descartada
+                descartando = False
+                continue
+            if len(parte) <= tamanho_max:
+                yield parte
+        if len(resto) > tamanho_max:
+            resto = b""
+            descartando = True
+    if resto and not descartando:
+        yield resto
+
+
+def ler_log(caminho: str) -> Tuple[Dict[str, float], List[float]]:
+    """
+    Lê um log do GAPBS e devolve (tempos da run, lista de Trial Time).
+    Se o filtro_log.py gravou o registro JSON ao lado do log, usa o registro
+    (VTUNE_ENABLE vem do --meta do executa_bench.sh).
+    """
+    registro = Path(caminho).with_suffix(".json")
+    if registro.is_file():
+        with open(registro, "r") as f:
+            lido = _tempos_do_registro(json.load(f))
+        if lido is not None:
+            return lido
+    return _extrair_tempos(linhas_curtas(Path(caminho)))
+
+
+def ler_log_conteudo(conteudo: bytes, registro: Optional[bytes] = None) -> Tuple[Dict[str, float], List[float]]:
+    """Como ler_log, para o conteúdo de um log (e do seu registro JSON) lido do pacote de runs."""
+    if registro is not None:
+        lido = _tempos_do_registro(json.loads(registro))
+        if lido is not None:
+            return lido
+    blocos = (conteudo[i:i + TAMANHO_BLOCO] for i in range(0, len(conteudo), TAMANHO_BLOCO))
+    return _extrair_tempos(linhas_curtas_blocos(blocos))
+
+
+def _tempos_do_registro(dados: dict) -> Optional[Tuple[Dict[str, float], List[float]]]:
+    # Registros sem VTUNE_ENABLE (sem --meta) não dizem se a run usou o VTune: relê o log
+    if "VTUNE_ENABLE" not in dados:
+        return None
+    run = {col: dados[col] for col in COLUNAS_RUN if col in dados}
+    run["VTUNE_ENABLE"] = str(dados["VTUNE_ENABLE"]).lower() == "true"
+    return run, dados["TRIAL_TIMES"]
+
+
+def _extrair_tempos(linhas: Iterable[bytes]) -> Tuple[Dict[str, float], List[float]]:
+    run: Dict[str, float] = {}
+    trials: List[float] = []
+    # Com o VTune, a saída dele ("vtune: Collection started...") vai para o mesmo log
+    vtune = False
+    for linha in linhas:
+        if linha.startswith(b"vtune:"):
+            vtune = True
+            continue
+        m = PADRAO_TEMPO.match(linha)
+        if m:
+            rotulo, valor = m.group(1), float(m.group(2))
+            if rotulo == b"Trial Time":
+                trials.append(valor)
+            elif rotulo == b"Read Time":
+                run["READ_TIME"] = valor
+            elif rotulo == b"Build Time":
+                run["BUILD_TIME"] = valor
+            else:
+                run["AVERAGE_TIME"] = valor
+            continue
+        m = PADRAO_GRAFO.match(linha)
+        if m:
+            run["NODES"] = int(m.group(1))
+            run["EDGES"] = int(m.group(2))
+    run["TRIALS"] = len(trials)
+    run["VTUNE_ENABLE"] = vtune
+    return run, trials
+
+
+def descobrir_logs(logs_root: Path) -> List[Tuple[Path, Tuple[str, str, int, bool, str, bool, int]]]:
+    """
+    Devolve (log, config) para cada run em logs_root. Se houver mais de um log
+    na mesma pasta de run, usa o mais recente (o nome termina com o timestamp).
+    """
+    encontrados = []
+    for run_dir in sorted(logs_root.glob("*/*/threads-*/*/bind-*/run-*")):
+        logs = sorted(run_dir.glob("*.log"))
+        if not logs:
+            continue
+        info = extrair_infos_caminho(list(run_dir.relative_to(logs_root).parts))
+        if info is not None:
+            encontrados.append((logs[-1], info))
+    return encontrados
+
+
+def ingerir_logs(logs_root: Path, max_workers: Optional[int] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Lê todos os logs de logs_root em paralelo e devolve (df_runs, df_trials).
+    logs_root também pode ser um pacote de pacote_runs.py.
+    """
+    if Path(logs_root).is_file():
+        do_pacote = list(logs_do_pacote(Path(logs_root)))
+        encontrados = [(None, info) for info, _, _ in do_pacote]
+        lidos = [ler_log_conteudo(conteudo, registro) for _, conteudo, registro in do_pacote]
+    else:
+        encontrados = descobrir_logs(Path(logs_root))
+        lidos = mapear_paralelo(ler_log, [str(p) for p, _ in encontrados], max_workers)
+
+    linhas_runs = []
+    linhas_trials = []
+    for (_, info), (run, trials) in zip(encontrados, lidos):
+        linhas_runs.append([*info] + [run.get(col) for col in COLUNAS_RUN])
+        for i, tempo in enumerate(trials, start=1):
+            linhas_trials.append([*info, i, tempo])
+
+    df_runs = pd.DataFrame(linhas_runs, columns=COLUNAS_CONFIG + COLUNAS_RUN)
+    df_trials = pd.DataFrame(linhas_trials, columns=COLUNAS_CONFIG + ["TRIAL", "TRIAL_TIME"])
+    return df_runs, df_trials
+
+
+def calcular_tempos_medios(df_runs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Monta a tabela do logs_average_times.csv: ELAPSED_TIME é o Average Time da
+    run e SPEEDUP usa como base a média das runs com 1 thread da mesma
+    configuração (grafo, HT, bind). Runs do executor.py --concorrente usam as
+    runs concorrentes com 1 thread como base. Runs marcadas em ANOMALIA (se a
+    coluna existir) não entram na base.
+    """
+    chaves_seq = ["GRAPH_NAME", "ANALYSIS_TYPE", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY", "CONCORRENTE"]
+    df = df_runs.rename(columns={"AVERAGE_TIME": "ELAPSED_TIME"})
+    validas = ~df["ANOMALIA"] if "ANOMALIA" in df.columns else True
+    df_seq = (
+        df[(df["THREADS"] == 1) & validas]
+        .groupby(chaves_seq, as_index=False)["ELAPSED_TIME"].mean()
+        .rename(columns={"ELAPSED_TIME": "SEQUENTIAL_TIME"})
+    )
+    df = df.merge(df_seq, on=chaves_seq, how="left")
+    df["SPEEDUP"] = df["SEQUENTIAL_TIME"] / df["ELAPSED_TIME"]
+    df = df.sort_values(["GRAPH_NAME", "THREADS", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY", "CONCORRENTE", "RUN"])
+    return df[COLUNAS_CONFIG + ["ELAPSED_TIME", "SPEEDUP"]]
+
+
+def processar_logs(df_runs: pd.DataFrame, df_trials: pd.DataFrame, store: Path = STORE_PADRAO,
+                   reexecutar_csv: Path = REEXECUTAR_CSV) -> pd.DataFrame:
+    """
+    Marca as runs anômalas, calcula os tempos médios e grava trials e
+    tempos_logs no store. Devolve a tabela do logs_average_times.csv.
+    Usada pelo main e pelo bench_pipeline.py.
+    """
+    # Runs anômalas (tempo, trials lentas) ficam marcadas e fora da base do speedup
+    with etapa("anomalias"):
+        df_runs = marcar_anomalias(df_runs, COLUNAS_CONFIG[:-1], "AVERAGE_TIME", df_trials=df_trials)
+        # Logs vêm de runs com e sem VTune: cada run volta com o VTUNE_ENABLE que teve
+        n_reexecutar = gravar_reexecucao(df_runs, reexecutar_csv)
+        print(f"Runs anômalas: {n_reexecutar}; lista em {reexecutar_csv}")
+
+    with etapa("tempos_medios"):
+        df_tempos = calcular_tempos_medios(df_runs)
+
+    with etapa("gravacao"):
+        gravar_tabela(df_trials, "trials", store=store)
+        gravar_tabela(df_runs.merge(df_tempos, on=COLUNAS_CONFIG), "tempos_logs", store=store)
+        print(f"Store atualizado em: {store}")
+    return df_tempos
+
+
+def _bools_minusculos(df: pd.DataFrame) -> pd.DataFrame:
+    # Os CSVs das etapas anteriores usam true/false, como o logs_average_times.csv original
+    colunas = df.select_dtypes(bool).columns
+    return df.assign(**{col: df[col].astype(str).str.lower() for col in colunas})
+
+
+def main() -> None:
+    # Sem a pasta logs/, lê do runs.pack (pacote_runs.py), se existir
+    logs_root = origem_runs(LOGS_ROOT)
+    if not logs_root.exists():
+        raise FileNotFoundError(f"Pasta de logs não encontrada: {LOGS_ROOT}")
+
+    with etapa("ingestao_logs"):
+        df_runs, df_trials = ingerir_logs(logs_root)
+    print(f"Quantidade de logs lidos: {len(df_runs)}")
+    print(f"Quantidade de trials: {len(df_trials)}")
+
+    df_tempos = processar_logs(df_runs, df_trials)
+
+    if EXPORTAR_CSV:
+        # ANALYSIS_TYPE fica, como na tabela tempos_logs: com logs de mais de uma análise as linhas seriam ambíguas
+        _bools_minusculos(df_tempos).to_csv(str(OUTPUT_CSV_TEMPOS), sep=",", index=False)
+        _bools_minusculos(df_trials).to_csv(str(OUTPUT_CSV_TRIALS), sep=",", index=False)
+        print(f"CSVs gerados em: {OUTPUT_CSV_TEMPOS}, {OUTPUT_CSV_TRIALS}")
+
+
+if __name__ == "__main__":
+    main()
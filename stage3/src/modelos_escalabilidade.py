@@ -0,0 +1,177 @@
+"""
+Ajuste de modelos de escalabilidade (Amdahl, Gustafson e USL) ao speedup medido.
+
+Para cada (GRAPH_NAME, ANALYSIS_TYPE, DISABLE_HYPERTHREADING, THREAD_BIND_POLICY)
+o speedup das runs exclusivas nos agregados (um ponto por contagem de threads)
+é ajustado a:
+
+  Amdahl     S(p) = 1 / (s + (1 - s) / p)            fração serial s
+  Gustafson  S(p) = p - s (p - 1)                    fração serial s
+  USL        S(p) = p / (1 + σ (p - 1) + κ p (p - 1))  contenção σ, coerência κ
+
+Os três modelos ficam lineares nos parâmetros depois de uma transformação
+(1/S, S - p e p/S - 1), então o ajuste é um mínimos quadrados direto, sem
+otimização iterativa. Com κ > 0 a USL tem pico em p* = sqrt((1 - σ) / κ):
+esse é o número ótimo de threads previsto.
+
+O CSV gerado (modelos_escalabilidade.csv) traz LIMITE_THREADS, o maior número
+de threads que ainda vale medir (p* com uma margem). build_commad.py
+--limite-threads usa essa coluna para não gerar runs da mesma análise além do
+pico.
+
+O unified_results repete cada configuração para VTUNE_ENABLE true e false (o
+tempo vem dos reports do VTune nas duas) e, depois de um executor.py
+--concorrente, tem também as linhas CONCORRENTE. O ajuste usa só as runs
+exclusivas, uma linha por contagem de threads.
+
+Uso (a partir de stage3/):
+  python3 ./src/modelos_escalabilidade.py [--store resultados_store] [--saida modelos_escalabilidade.csv]
+"""
+
+import argparse
+import math
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import STORE_PADRAO, carregar_tabela, gravar_tabela
+
+CHAVES_MODELO = ["GRAPH_NAME", "ANALYSIS_TYPE", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY"]
+SAIDA_CSV = Path("modelos_escalabilidade.csv")
+
+# Mede até MARGEM x o pico previsto, para ainda observar a queda depois dele
+MARGEM_PICO = 1.25
+# Só poda quando a USL explica bem os pontos medidos
+R2_MINIMO = 0.9
+MIN_PONTOS = 3
+
+
+def _r2(observado: np.ndarray, previsto: np.ndarray) -> float:
+    residuo = np.sum((observado - previsto) ** 2)
+    total = np.sum((observado - observado.mean()) ** 2)
+    return float(1.0 - residuo / total) if total > 0 else math.nan
+
+
+def ajustar_amdahl(p: np.ndarray, s: np.ndarray) -> Tuple[float, float]:
+    """Fração serial pelo ajuste de 1/S - 1/p = f (1 - 1/p). Devolve (f, R²)."""
+    x = 1.0 - 1.0 / p
+    y = 1.0 / s - 1.0 / p
+    f = float(np.clip(np.dot(x, y) / np.dot(x, x), 0.0, 1.0)) if np.dot(x, x) > 0 else math.nan
+    return f, _r2(s, 1.0 / (f + (1.0 - f) / p))
+
+
+def ajustar_gustafson(p: np.ndarray, s: np.ndarray) -> Tuple[float, float]:
+    """Fração serial pelo ajuste de p - S = f (p - 1). Devolve (f, R²)."""
+    x = p - 1.0
+    y = p - s
+    f = float(np.clip(np.dot(x, y) / np.dot(x, x), 0.0, 1.0)) if np.dot(x, x) > 0 else math.nan
+    return f, _r2(s, p - f * (p - 1.0))
+
+
+def ajustar_usl(p: np.ndarray, s: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Contenção σ e coerência κ pelo ajuste de p/S - 1 = σ (p - 1) + κ p (p - 1),
+    com σ, κ >= 0. Devolve (σ, κ, R²).
+    """
+    x = np.column_stack([p - 1.0, p * (p - 1.0)])
+    y = p / s - 1.0
+    (sigma, kappa), *_ = np.linalg.lstsq(x, y, rcond=None)
+    # Coeficiente negativo não tem sentido físico: refaz o ajuste só com o outro
+    if kappa < 0:
+        sigma, kappa = max(float(np.dot(x[:, 0], y) / np.dot(x[:, 0], x[:, 0])), 0.0), 0.0
+    elif sigma < 0:
+        sigma, kappa = 0.0, max(float(np.dot(x[:, 1], y) / np.dot(x[:, 1], x[:, 1])), 0.0)
+    previsto = p / (1.0 + sigma * (p - 1.0) + kappa * p * (p - 1.0))
+    return float(sigma), float(kappa), _r2(s, previsto)
+
+
+def pico_usl(sigma: float, kappa: float) -> float:
+    """Número de threads com o maior speedup previsto pela USL (inf sem pico)."""
+    if kappa <= 0 or sigma >= 1:
+        return math.inf
+    return math.sqrt((1.0 - sigma) / kappa)
+
+
+def pontos_exclusivos(df_agregados: pd.DataFrame) -> pd.DataFrame:
+    """(chaves, THREADS, SPEEDUP) das runs exclusivas, uma linha por contagem de threads."""
+    df = df_agregados
+    if "CONCORRENTE" in df.columns:
+        df = df[~df["CONCORRENTE"].astype(bool)]
+    if "VTUNE_ENABLE" in df.columns and df["VTUNE_ENABLE"].any():
+        # As cópias VTUNE_ENABLE false repetem os tempos dos reports do VTune
+        df = df[df["VTUNE_ENABLE"].astype(bool)]
+    df = df.loc[df["SPEEDUP"] > 0, CHAVES_MODELO + ["THREADS", "SPEEDUP"]]
+    return df.drop_duplicates(CHAVES_MODELO + ["THREADS"])
+
+
+def ajustar_modelos(df_agregados: pd.DataFrame, margem: float = MARGEM_PICO, r2_minimo: float = R2_MINIMO) -> pd.DataFrame:
+    """
+    Uma linha por (GRAPH_NAME, ANALYSIS_TYPE, DISABLE_HYPERTHREADING,
+    THREAD_BIND_POLICY) com os parâmetros ajustados, o número ótimo de threads
+    e o limite de threads a medir (vazio quando o modelo não justifica podar).
+    """
+    df = pontos_exclusivos(df_agregados)
+    linhas = []
+    for chave, grupo in df.groupby(CHAVES_MODELO, observed=True):
+        p = grupo["THREADS"].to_numpy(dtype=float)
+        s = grupo["SPEEDUP"].to_numpy(dtype=float)
+        if np.unique(p).size < MIN_PONTOS:
+            continue
+        f_amdahl, r2_amdahl = ajustar_amdahl(p, s)
+        f_gustafson, r2_gustafson = ajustar_gustafson(p, s)
+        sigma, kappa, r2_usl = ajustar_usl(p, s)
+        pico = pico_usl(sigma, kappa)
+
+        # Melhor ponto medido, para comparar com o previsto
+        medido = grupo.groupby("THREADS")["SPEEDUP"].mean()
+        limite = math.nan
+        if r2_usl >= r2_minimo and math.isfinite(pico):
+            limite = max(1, math.ceil(pico * margem))
+        linhas.append(dict(
+            zip(CHAVES_MODELO, chave),
+            PONTOS=len(p),
+            AMDAHL_SERIAL_FRACTION=f_amdahl,
+            AMDAHL_R2=r2_amdahl,
+            GUSTAFSON_SERIAL_FRACTION=f_gustafson,
+            GUSTAFSON_R2=r2_gustafson,
+            USL_SIGMA=sigma,
+            USL_KAPPA=kappa,
+            USL_R2=r2_usl,
+            THREADS_OTIMO_PREVISTO=pico,
+            SPEEDUP_MAXIMO_PREVISTO=pico / (1.0 + sigma * (pico - 1.0) + kappa * pico * (pico - 1.0)) if math.isfinite(pico) else math.nan,
+            THREADS_OTIMO_MEDIDO=int(medido.idxmax()),
+            SPEEDUP_MAXIMO_MEDIDO=float(medido.max()),
+            LIMITE_THREADS=limite,
+        ))
+    return pd.DataFrame(linhas)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ajusta Amdahl, Gustafson e USL ao speedup medido.")
+    parser.add_argument("--store", type=Path, default=STORE_PADRAO)
+    parser.add_argument("--saida", type=Path, default=SAIDA_CSV)
+    parser.add_argument("--margem", type=float, default=MARGEM_PICO,
+                        help="Limite de threads = margem x pico previsto pela USL")
+    parser.add_argument("--r2-minimo", type=float, default=R2_MINIMO)
+    args = parser.parse_args(argv)
+
+    # Sem lista de colunas: stores importados de CSVs antigos não têm CONCORRENTE
+    df_agregados = carregar_tabela("agregados", store=args.store)
+    df_modelos = ajustar_modelos(df_agregados, args.margem, args.r2_minimo)
+    if df_modelos.empty:
+        print("[AVISO] Nenhuma configuração com pontos suficientes para o ajuste")
+        return 1
+
+    gravar_tabela(df_modelos, "modelos", store=args.store)
+    df_modelos.to_csv(args.saida, index=False)
+    podaveis = df_modelos["LIMITE_THREADS"].notna().sum()
+    print(f"[INFO] {len(df_modelos)} modelos ajustados; {podaveis} com limite de threads")
+    print(df_modelos[CHAVES_MODELO + ["USL_SIGMA", "USL_KAPPA", "USL_R2", "THREADS_OTIMO_PREVISTO", "LIMITE_THREADS"]].to_string(index=False))
+    print(f"[INFO] Modelos salvos em: {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
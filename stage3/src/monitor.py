@@ -0,0 +1,535 @@
+"""
+Monitor de uma varredura em andamento (estatísticas parciais, alertas e ETA).
+
+Enquanto o run.slurm roda, acompanha:
+
+  run_ledger.csv   uma linha por tentativa do executor.py (status e tempo de parede)
+  results/         report.csv de cada run do VTune (Elapsed Time, Average CPU Frequency)
+  logs/            logs do GAPBS (Average Time), pelo JSON do filtro_log.py quando existe
+
+Com inotify (Linux, via ctypes, sem dependências) o monitor acorda quando um
+arquivo é fechado ou movido para dentro das árvores; sem inotify (ou com
+--polling, ou se o inotify falhar no meio, ex.: ENOSPC ao passar de
+fs.inotify.max_user_watches) as árvores são varridas a cada --intervalo
+segundos e um arquivo só é lido depois de ESTABILIDADE segundos sem mudar. O
+ledger é lido de forma incremental, a partir do último byte lido.
+
+Cada valor novo atualiza as estatísticas da configuração (média e desvio pelo
+algoritmo de Welford, sem guardar as amostras) e é comparado com elas antes:
+
+  - tempo a mais de LIMITE_Z desvios e mais de DESVIO_MINIMO acima da média;
+  - Average CPU Frequency mais de QUEDA_FREQUENCIA abaixo da média (throttling);
+  - tentativa com status de saída diferente de zero no ledger.
+
+(Os limites são os de anomalias.py.) O ETA soma, para cada run de
+src/commands.txt ainda sem sucesso no ledger, o tempo médio de parede da sua
+configuração (ou o médio geral), dividido pelo paralelismo observado; sem
+ledger, usa o intervalo médio entre as runs concluídas.
+
+O estado vai para um JSON (--status, reescrito de forma atômica) e, com
+--porta, também é servido em http://127.0.0.1:<porta>/status.
+
+Uso (a partir de stage3/, em outro terminal ou em background no run.slurm):
+  python3 ./src/monitor.py [--status monitor_status.json] [--porta 8765] [--polling] [--sair-ao-terminar]
+"""
+
+import argparse
+import csv
+import ctypes
+import ctypes.util
+import json
+import os
+import re
+import select
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from anomalias import DESVIO_MINIMO, LIMITE_Z, MIN_RUNS, QUEDA_FREQUENCIA
+from executor import COMMANDS_FILE, LEDGER_FILE, carregar_tarefas
+from ingestao import PADRAO_VALOR, caminho_metrica, caminhos_hierarquia, extrair_infos_caminho, ler_report
+from logs_gapbs import ler_log
+
+RESULTS_ROOT = Path("results")
+LOGS_ROOT = Path("logs")
+STATUS_FILE = Path("monitor_status.json")
+INTERVALO = 5.0
+ESTABILIDADE = 2.0
+MAX_ALERTAS = 100
+FREQUENCIA_REPORT = caminho_metrica("Elapsed Time", "Average CPU Frequency")
+
+# Constantes do inotify (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+MASCARA = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENTO = struct.Struct("iIII")
+
+
+class Acumulador:
+    """Média e variância incrementais (Welford)."""
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+
+    def adicionar(self, valor: float) -> None:
+        self.n += 1
+        delta = valor - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (valor - self.media)
+
+    @property
+    def desvio(self) -> float:
+        return (self.m2 / (self.n - 1)) ** 0.5 if self.n > 1 else 0.0
+
+
+class Inotify:
+    """Observação de pastas com inotify, pela libc."""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            erro = ctypes.get_errno()
+            raise OSError(erro, os.strerror(erro))
+        self.pastas: Dict[int, Path] = {}
+
+    def observar(self, pasta: Path) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(str(pasta)), MASCARA)
+        if wd < 0:
+            erro = ctypes.get_errno()
+            raise OSError(erro, os.strerror(erro), str(pasta))
+        self.pastas[wd] = pasta
+
+    def observar_arvore(self, raiz: Path) -> None:
+        for dirpath, _, _ in os.walk(raiz):
+            self.observar(Path(dirpath))
+
+    def eventos(self, timeout: float) -> List[Tuple[Path, int]]:
+        """(caminho, máscara) dos eventos que chegarem em até timeout segundos."""
+        prontos, _, _ = select.select([self.fd], [], [], timeout)
+        if not prontos:
+            return []
+        try:
+            dados = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        eventos = []
+        inicio = 0
+        while inicio < len(dados):
+            wd, mascara, _, tamanho = EVENTO.unpack_from(dados, inicio)
+            nome = dados[inicio + EVENTO.size:inicio + EVENTO.size + tamanho].rstrip(b"\0")
+            inicio += EVENTO.size + tamanho
+            pasta = self.pastas.get(wd)
+            if mascara & IN_Q_OVERFLOW:
+                eventos.append((Path("."), IN_Q_OVERFLOW))
+            elif pasta is not None:
+                eventos.append((pasta / os.fsdecode(nome), mascara))
+        return eventos
+
+    def fechar(self) -> None:
+        os.close(self.fd)
+
+
+def valor_numerico(texto: str) -> Optional[float]:
+    m = re.match(PADRAO_VALOR, texto)
+    return float(m.group(1)) if m else None
+
+
+def metricas_report(caminho: Path) -> Dict[str, float]:
+    """Elapsed Time e Average CPU Frequency de um report.csv (vazio se ainda incompleto)."""
+    linhas = ler_report(str(caminho))
+    metricas = {}
+    for (nivel, nome, texto), caminho_linha in zip(linhas, caminhos_hierarquia(linhas)):
+        if nivel == 0 and nome == "Elapsed Time" and "ELAPSED_TIME" not in metricas:
+            valor = valor_numerico(texto)
+            if valor is not None:
+                metricas["ELAPSED_TIME"] = valor
+        elif caminho_linha == FREQUENCIA_REPORT and "AVERAGE_CPU_FREQUENCY" not in metricas:
+            valor = valor_numerico(texto)
+            if valor is not None:
+                metricas["AVERAGE_CPU_FREQUENCY"] = valor
+    return metricas
+
+
+class Monitor:
+    def __init__(self, ledger: Path, results_root: Path, logs_root: Path, comandos: Path):
+        self.ledger = ledger
+        self.results_root = results_root
+        self.logs_root = logs_root
+        self.posicao_ledger = 0
+        self.cabecalho_ledger: Optional[List[str]] = None
+        self.resto_ledger = ""
+
+        # config (GRAPH, ANALYSIS, THREADS, HT, BIND, CONCORRENTE, VTUNE) -> métrica -> Acumulador
+        self.configs: Dict[tuple, Dict[str, Acumulador]] = {}
+        self.lidos: set = set()
+        self.falhas_leitura: Dict[Path, float] = {}
+        self.pendentes: set = set()
+        self.concluidas: set = set()
+        self.chegadas: List[float] = []
+        self.falhas = 0
+        self.parede_total = 0.0
+        self.primeiro_inicio: Optional[float] = None
+        self.ultimo_fim: Optional[float] = None
+        self.alertas: Deque[dict] = deque(maxlen=MAX_ALERTAS)
+        self.inicio_monitor = time.time()
+
+        self.tarefas = carregar_tarefas(comandos) if comandos.is_file() else []
+        if not self.tarefas:
+            print(f"[AVISO] {comandos} não encontrado ou vazio: sem total de runs, o ETA fica indisponível")
+
+    # Estatísticas e alertas
+
+    def _alertar(self, tipo: str, config: tuple, detalhe: str) -> None:
+        alerta = {"HORA": datetime.now().isoformat(timespec="seconds"), "TIPO": tipo,
+                  "CONFIG": "/".join(map(str, config)), "DETALHE": detalhe}
+        self.alertas.append(alerta)
+        print(f"[AVISO] {tipo}: {alerta['CONFIG']} {detalhe}")
+
+    def registrar(self, config: tuple, metrica: str, valor: float) -> None:
+        acumulador = self.configs.setdefault(config, {}).setdefault(metrica, Acumulador())
+        if acumulador.n >= MIN_RUNS:
+            if metrica == "AVERAGE_CPU_FREQUENCY":
+                if valor < acumulador.media * (1 - QUEDA_FREQUENCIA):
+                    self._alertar("queda_frequencia", config, f"{valor:.3f} (média {acumulador.media:.3f})")
+            elif acumulador.desvio > 0:
+                z = (valor - acumulador.media) / acumulador.desvio
+                if z > LIMITE_Z and valor > acumulador.media * (1 + DESVIO_MINIMO):
+                    self._alertar("tempo_alto", config, f"{metrica}={valor:.4f} (média {acumulador.media:.4f}, z={z:.1f})")
+        acumulador.adicionar(valor)
+
+    def _concluir(self, chave: tuple, hora: float) -> None:
+        if chave not in self.concluidas:
+            self.concluidas.add(chave)
+            self.chegadas.append(hora)
+
+    # Fontes
+
+    def ler_ledger(self) -> bool:
+        """Lê as linhas novas do ledger. Devolve se havia algo novo."""
+        try:
+            tamanho = self.ledger.stat().st_size
+        except OSError:
+            return False
+        if tamanho < self.posicao_ledger:
+            # Ledger recriado: recomeça
+            self.posicao_ledger, self.cabecalho_ledger, self.resto_ledger = 0, None, ""
+        if tamanho == self.posicao_ledger:
+            return False
+        with open(self.ledger, "r", newline="") as f:
+            f.seek(self.posicao_ledger)
+            texto = self.resto_ledger + f.read()
+            self.posicao_ledger = f.tell()
+        linhas = texto.split("\n")
+        # A última linha pode estar pela metade
+        self.resto_ledger = linhas.pop()
+        for campos in csv.reader(linhas):
+            if not campos:
+                continue
+            if self.cabecalho_ledger is None:
+                self.cabecalho_ledger = campos
+                continue
+            self._linha_ledger(dict(zip(self.cabecalho_ledger, campos)))
+        return True
+
+    def _linha_ledger(self, linha: Dict[str, str]) -> None:
+        # Só as runs do executor.py --concorrente recebem uma reserva de CPUs (CPU_LIST)
+        run = (
+            linha["GRAPH_NAME"], linha["ANALYSIS_TYPE"], int(linha["THREADS"]),
+            linha["DISABLE_HYPERTHREADING"].lower() == "true", linha["THREAD_BIND_POLICY"],
+            linha["VTUNE_ENABLE"].lower(),
+        )
+        config = (*run[:5], bool(linha.get("CPU_LIST")), run[5])
+        parede = float(linha["WALL_TIME"])
+        inicio = datetime.fromisoformat(linha["START"]).timestamp()
+        self.primeiro_inicio = min(inicio, self.primeiro_inicio or inicio)
+        self.ultimo_fim = max(inicio + parede, self.ultimo_fim or 0.0)
+        self.parede_total += parede
+        if linha["EXIT_STATUS"] != "0":
+            self.falhas += 1
+            self._alertar("falha", config, f"run {linha['RUN']} tentativa {linha['ATTEMPT']} status {linha['EXIT_STATUS']}")
+            return
+        self.registrar(config, "WALL_TIME", parede)
+        self._concluir(("ledger", *run, int(linha["RUN"])), inicio + parede)
+
+    def processar(self, caminho: Path, forcar: bool = False) -> bool:
+        """
+        Lê um report.csv ou log, se ele pertence a uma run e está completo.
+        Sem forcar (polling), espera ESTABILIDADE segundos sem modificação.
+        """
+        if caminho.name == "report.csv":
+            raiz = self.results_root
+        elif caminho.suffix in (".log", ".json") and caminho.parent.name.startswith("run-"):
+            raiz = self.logs_root
+            caminho = caminho.with_suffix(".log")
+        else:
+            return False
+        try:
+            info = extrair_infos_caminho(list(caminho.parent.relative_to(raiz).parts))
+            mtime = caminho.stat().st_mtime
+        except (ValueError, OSError):
+            return False
+        if info is None or (raiz, info) in self.lidos or self.falhas_leitura.get(caminho) == mtime:
+            return False
+        recente = time.time() - mtime < ESTABILIDADE
+        # Com o filtro_log.py o JSON chega logo depois do log: espera por ele
+        sem_registro = raiz is self.logs_root and not caminho.with_suffix(".json").is_file()
+        if recente and (not forcar or sem_registro):
+            self.pendentes.add(caminho)
+            return False
+        self.pendentes.discard(caminho)
+
+        *config, concorrente, run = info
+        if raiz is self.results_root:
+            metricas = metricas_report(caminho)
+            completo = "ELAPSED_TIME" in metricas
+            vtune = "true"
+        else:
+            tempos, _ = ler_log(str(caminho))
+            metricas = {"AVERAGE_TIME": tempos["AVERAGE_TIME"]} if "AVERAGE_TIME" in tempos else {}
+            completo = bool(metricas)
+            # ler_log usa o JSON do filtro_log.py ou, sem ele, as linhas "vtune:" do log
+            vtune = str(tempos["VTUNE_ENABLE"]).lower()
+        if not completo:
+            # Ainda sendo escrito (ou run que falhou): tenta de novo quando mudar
+            self.falhas_leitura[caminho] = mtime
+            return False
+
+        self.lidos.add((raiz, info))
+        # Runs do executor.py --concorrente têm estatísticas próprias, como nas agregações
+        chave = (*config, concorrente, vtune)
+        for metrica, valor in metricas.items():
+            self.registrar(chave, metrica, valor)
+        # Mesma chave das runs do ledger: o log noVTune run-N não se confunde com o report run-N
+        self._concluir(("arquivo", *config, vtune, run), mtime)
+        return True
+
+    def processar_pendentes(self) -> bool:
+        """Arquivos recentes demais na última tentativa."""
+        novo = False
+        for caminho in list(self.pendentes):
+            novo |= self.processar(caminho)
+        return novo
+
+    def varrer(self) -> bool:
+        """Varredura completa das duas árvores (polling e estado inicial)."""
+        novo = False
+        for raiz in (self.results_root, self.logs_root):
+            if not raiz.is_dir():
+                continue
+            for dirpath, _, arquivos in os.walk(raiz):
+                for nome in arquivos:
+                    if nome == "report.csv" or nome.endswith(".log"):
+                        novo |= self.processar(Path(dirpath) / nome)
+        return novo
+
+    # Resumo
+
+    def n_concluidas(self) -> int:
+        """Runs concluídas: pelo ledger quando ele existe, senão pelos arquivos."""
+        fonte = "ledger" if self.cabecalho_ledger is not None else "arquivo"
+        return sum(1 for chave in self.concluidas if chave[0] == fonte)
+
+    def eta(self) -> Tuple[Optional[float], Optional[float]]:
+        """(segundos restantes, paralelismo observado)."""
+        if not self.tarefas:
+            return None, None
+        if self.cabecalho_ledger is None:
+            restantes = max(len(self.tarefas) - self.n_concluidas(), 0)
+            if len(self.chegadas) < 2:
+                return None, None
+            chegadas = sorted(self.chegadas)
+            intervalo = (chegadas[-1] - chegadas[0]) / (len(chegadas) - 1)
+            return restantes * intervalo, None
+
+        paredes = [a["WALL_TIME"] for a in self.configs.values() if "WALL_TIME" in a]
+        if not paredes:
+            return None, None
+        media_geral = sum(a.media * a.n for a in paredes) / sum(a.n for a in paredes)
+        total = 0.0
+        for t in self.tarefas:
+            config = (t.graph_name, t.analysis_type, t.threads, t.disable_ht.lower() == "true", t.bind, t.vtune_enable.lower())
+            if ("ledger", *config, t.run_id) in self.concluidas:
+                continue
+            # A run pode sair exclusiva ou concorrente (depende do --concorrente do executor)
+            acumulador = (self.configs.get((*config[:5], False, config[5]), {}).get("WALL_TIME")
+                          or self.configs.get((*config[:5], True, config[5]), {}).get("WALL_TIME"))
+            total += acumulador.media if acumulador is not None else media_geral
+        duracao = (self.ultimo_fim or 0.0) - (self.primeiro_inicio or 0.0)
+        paralelismo = max(self.parede_total / duracao, 1.0) if duracao > 0 else 1.0
+        return total / paralelismo, paralelismo
+
+    def resumo(self, modo: str) -> dict:
+        restante, paralelismo = self.eta()
+        agora = time.time()
+        configs = []
+        for (grafo, analise, threads, ht, bind, concorrente, vtune), metricas in sorted(self.configs.items(), key=str):
+            linha = {"GRAPH_NAME": grafo, "ANALYSIS_TYPE": analise, "THREADS": threads, "DISABLE_HYPERTHREADING": ht,
+                     "THREAD_BIND_POLICY": bind, "CONCORRENTE": concorrente, "VTUNE_ENABLE": vtune}
+            for metrica, a in sorted(metricas.items()):
+                linha[f"{metrica}_N"] = a.n
+                linha[f"{metrica}_MEDIA"] = round(a.media, 6)
+                linha[f"{metrica}_DESVIO"] = round(a.desvio, 6)
+            configs.append(linha)
+        return {
+            "ATUALIZADO_EM": datetime.fromtimestamp(agora).isoformat(timespec="seconds"),
+            "MONITOR_DESDE": datetime.fromtimestamp(self.inicio_monitor).isoformat(timespec="seconds"),
+            "MODO": modo,
+            "TOTAL_RUNS": len(self.tarefas) or None,
+            "CONCLUIDAS": self.n_concluidas(),
+            "FALHAS": self.falhas,
+            "ETA_SEGUNDOS": round(restante, 1) if restante is not None else None,
+            "ETA": datetime.fromtimestamp(agora + restante).isoformat(timespec="seconds") if restante is not None else None,
+            "PARALELISMO": round(paralelismo, 2) if paralelismo is not None else None,
+            "ALERTAS": list(self.alertas),
+            "CONFIGS": configs,
+        }
+
+    def terminou(self) -> bool:
+        return bool(self.tarefas) and self.n_concluidas() >= len(self.tarefas)
+
+
+def gravar_status(status: dict, destino: Path) -> None:
+    temporario = destino.with_name(destino.name + ".tmp")
+    with open(temporario, "w") as f:
+        json.dump(status, f, indent=1)
+    os.replace(temporario, destino)
+
+
+def servir_status(porta: int, obter) -> ThreadingHTTPServer:
+    """Serve o status atual (obter() -> bytes) em /status, numa thread em background."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/status"):
+                self.send_error(404)
+                return
+            corpo = obter()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Acompanha uma varredura em andamento: estatísticas parciais, alertas e ETA.")
+    parser.add_argument("--ledger", type=Path, default=LEDGER_FILE)
+    parser.add_argument("--results", type=Path, default=RESULTS_ROOT)
+    parser.add_argument("--logs", type=Path, default=LOGS_ROOT)
+    parser.add_argument("--comandos", type=Path, default=COMMANDS_FILE, help="Runs da varredura (total e ETA)")
+    parser.add_argument("--status", type=Path, default=STATUS_FILE)
+    parser.add_argument("--porta", type=int, default=None, help="Também serve o status em http://127.0.0.1:PORTA/status")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO)
+    parser.add_argument("--polling", action="store_true", help="Não usa inotify")
+    parser.add_argument("--uma-vez", action="store_true", help="Uma varredura, grava o status e sai")
+    parser.add_argument("--sair-ao-terminar", action="store_true", help="Sai quando todas as runs de --comandos concluírem")
+    args = parser.parse_args(argv)
+
+    monitor = Monitor(args.ledger, args.results, args.logs, args.comandos)
+    inotify = None
+    if not args.polling and not args.uma_vez:
+        try:
+            inotify = Inotify()
+        except (OSError, AttributeError) as e:
+            print(f"[AVISO] inotify indisponível ({e}); usando polling a cada {args.intervalo}s")
+    modo = "inotify" if inotify is not None else "polling"
+
+    status_atual = [b"{}"]
+    trava = threading.Lock()
+
+    def publicar() -> None:
+        status = monitor.resumo(modo)
+        gravar_status(status, args.status)
+        with trava:
+            status_atual[0] = json.dumps(status, indent=1).encode()
+
+    servidor = None
+    if args.porta is not None:
+        servidor = servir_status(args.porta, lambda: status_atual[0])
+        print(f"[INFO] Status em http://127.0.0.1:{args.porta}/status")
+
+    observadas = set()
+    pasta_ledger = args.ledger.resolve().parent
+    try:
+        monitor.ler_ledger()
+        monitor.varrer()
+        publicar()
+        print(f"[INFO] Monitor ({modo}): {monitor.n_concluidas()} runs concluídas; status em {args.status}")
+        if args.uma_vez:
+            return 0
+
+        ultima_publicacao = time.time()
+        while not (args.sair_ao_terminar and monitor.terminou()):
+            if inotify is None:
+                time.sleep(args.intervalo)
+                mudou = monitor.varrer()
+            else:
+                mudou = False
+                try:
+                    # Árvores criadas depois do início do monitor
+                    for pasta, recursiva in ((args.results, True), (args.logs, True), (pasta_ledger, False)):
+                        if pasta not in observadas and pasta.is_dir():
+                            if recursiva:
+                                inotify.observar_arvore(pasta)
+                            else:
+                                inotify.observar(pasta)
+                            observadas.add(pasta)
+                            mudou |= monitor.varrer()
+                    for caminho, mascara in inotify.eventos(min(args.intervalo, ESTABILIDADE)):
+                        if mascara & IN_Q_OVERFLOW:
+                            mudou |= monitor.varrer()
+                        elif mascara & IN_ISDIR and mascara & (IN_CREATE | IN_MOVED_TO):
+                            # Pasta nova (run-N): observa e lê o que já tiver sido escrito nela
+                            inotify.observar_arvore(caminho)
+                            for dirpath, _, arquivos in os.walk(caminho):
+                                for nome in arquivos:
+                                    mudou |= monitor.processar(Path(dirpath) / nome, forcar=True)
+                        elif mascara & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                            mudou |= monitor.processar(caminho, forcar=True)
+                except OSError as e:
+                    # Ex.: ENOSPC ao passar de fs.inotify.max_user_watches em árvores grandes
+                    print(f"[AVISO] inotify falhou ({e}); usando polling a cada {args.intervalo}s")
+                    inotify.fechar()
+                    inotify = None
+                    modo = "polling"
+                    mudou |= monitor.varrer()
+                else:
+                    mudou |= monitor.processar_pendentes()
+            mudou |= monitor.ler_ledger()
+            # O status fica na pasta do ledger: só regrava quando algo mudou
+            # (ou a cada intervalo, para o ETA), senão o próprio evento acordaria o laço
+            if mudou or time.time() - ultima_publicacao >= args.intervalo:
+                publicar()
+                ultima_publicacao = time.time()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if inotify is not None:
+            inotify.fechar()
+        if servidor is not None:
+            servidor.shutdown()
+    print(f"[INFO] Monitor encerrado: {monitor.n_concluidas()} runs concluídas, {monitor.falhas} falhas")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
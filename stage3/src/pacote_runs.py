@@ -0,0 +1,334 @@
+"""
+Pacote indexado com os reports e logs de todas as runs (runs.pack).
+
+Cada run gera uma pasta results/<GRAPH_NAME>/<ANALYSIS_TYPE>/threads-X/ht-*/bind-*/run-N/
+(e a equivalente em logs/), e percorrer milhares dessas pastas no scratch
+compartilhado do cluster é dominado pela latência de metadados. O pacote junta
+os arquivos em um único arquivo:
+
+  cabeçalho | conteúdo 1 | conteúdo 2 | ... | índice (JSON + zlib) | conteúdos novos | índice novo ...
+
+O cabeçalho (RUNPACK2 + offset e tamanho do índice atual) ocupa os primeiros
+24 bytes. Cada entrada do índice guarda o tipo (report, log, registro ou
+telemetria), o caminho relativo à raiz (results/ ou logs/), offset, tamanho no
+pacote, tamanho original, se foi comprimido (zlib, só quando diminui),
+mtime_ns e crc32.
+
+Empacotar de novo acrescenta só os arquivos novos ou alterados (tamanho ou
+mtime diferentes), no próprio pacote: os conteúdos novos e um índice novo vão
+para depois do índice atual e, com eles já no disco (fsync), só os 24 bytes do
+cabeçalho são reescritos para apontar para o índice novo. O custo é o dos
+arquivos novos, não o do pacote inteiro. Uma interrupção antes disso deixa o
+cabeçalho no índice anterior, que continua intacto (os restos são descartados
+no próximo empacotar). Conteúdos substituídos e índices antigos continuam no
+arquivo até um --recriar, que reescreve o pacote numa cópia.
+
+Leitura (PacoteRuns): o índice sai com uma leitura; buscar() devolve as
+entradas de uma configuração e iterar() percorre as entradas em ordem de
+offset com leituras sequenciais de LEITURA bytes. ingestao.ingerir_reports e
+logs_gapbs.ingerir_logs aceitam o caminho do pacote no lugar da pasta.
+
+Uso (a partir de stage3/):
+  python3 ./src/pacote_runs.py empacotar [--results results] [--logs logs] [--pacote runs.pack]
+  python3 ./src/pacote_runs.py listar [--pacote runs.pack]
+  python3 ./src/pacote_runs.py extrair --destino /tmp/arvore [--pacote runs.pack]
+"""
+
+import argparse
+import json
+import os
+import struct
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from ingestao import _parse_linhas, extrair_infos_caminho, montar_tabela_longa
+
+PACOTE_PADRAO = Path("runs.pack")
+RESULTS_ROOT = Path("results")
+LOGS_ROOT = Path("logs")
+
+MAGICO = b"RUNPACK2"
+CABECALHO = struct.Struct("<8sQQ")
+VERSAO = 2
+LEITURA = 8 << 20
+# Arquivos por tipo dentro das pastas de run
+ARQUIVOS = {
+    "report": (RESULTS_ROOT, "report.csv"),
+    "log": (LOGS_ROOT, "*.log"),
+    # Registro JSON do filtro_log.py (tempos já extraídos, contadores do filtro, VTUNE_ELAPSED_TIME)
+    "registro": (LOGS_ROOT, "*.json"),
+    "telemetria": (LOGS_ROOT, "telemetria.csv"),
+}
+
+
+class Entrada(NamedTuple):
+    tipo: str
+    caminho: str
+    offset: int
+    tamanho: int
+    tamanho_original: int
+    comprimido: bool
+    mtime_ns: int
+    crc32: int
+
+    @property
+    def config(self) -> Optional[Tuple[str, str, int, bool, str, bool, int]]:
+        """(GRAPH_NAME, ANALYSIS_TYPE, THREADS, DISABLE_HYPERTHREADING, THREAD_BIND_POLICY, CONCORRENTE, RUN)."""
+        return extrair_infos_caminho(list(Path(self.caminho).parent.parts))
+
+
+class PacoteRuns:
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self.arquivo = open(self.caminho, "rb")
+        (self.offset_indice, _), self.entradas = _ler_indice(self.arquivo)
+        self._por_config: Optional[Dict[tuple, List[Entrada]]] = None
+
+    def __enter__(self) -> "PacoteRuns":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.fechar()
+
+    def fechar(self) -> None:
+        self.arquivo.close()
+
+    def buscar(self, tipo: str, graph_name: str, analysis_type: str, threads: int, disable_ht: bool,
+               thread_bind_policy: str, run: Optional[int] = None, concorrente: bool = False) -> List[Entrada]:
+        """Entradas de uma configuração (todas as runs, ou só `run`; exclusivas por padrão)."""
+        if self._por_config is None:
+            self._por_config = defaultdict(list)
+            for e in self.entradas:
+                config = e.config
+                if config is not None:
+                    self._por_config[(e.tipo,) + config[:-1]].append(e)
+        chave = (tipo, graph_name, analysis_type, int(threads), bool(disable_ht), thread_bind_policy, concorrente)
+        return [e for e in self._por_config.get(chave, []) if run is None or e.config[-1] == run]
+
+    def ler(self, entrada: Entrada) -> bytes:
+        dados = os.pread(self.arquivo.fileno(), entrada.tamanho, entrada.offset)
+        return _descomprimir(entrada, dados)
+
+    def iterar(self, entradas: Optional[Iterable[Entrada]] = None) -> Iterator[Tuple[Entrada, bytes]]:
+        """
+        Percorre as entradas (padrão: todas) em ordem de offset, lendo o pacote
+        em janelas de LEITURA bytes em vez de uma leitura por arquivo.
+        """
+        ordenadas = sorted(self.entradas if entradas is None else entradas, key=lambda e: e.offset)
+        janela, inicio = b"", 0
+        for e in ordenadas:
+            if e.offset < inicio or e.offset + e.tamanho > inicio + len(janela):
+                inicio = e.offset
+                janela = os.pread(self.arquivo.fileno(), max(LEITURA, e.tamanho), inicio)
+            dados = janela[e.offset - inicio:e.offset - inicio + e.tamanho]
+            yield e, _descomprimir(e, dados)
+
+
+def _descomprimir(entrada: Entrada, dados: bytes) -> bytes:
+    if entrada.comprimido:
+        dados = zlib.decompress(dados)
+    if zlib.crc32(dados) != entrada.crc32:
+        raise ValueError(f"Conteúdo corrompido no pacote: {entrada.caminho}")
+    return dados
+
+
+def _ler_indice(f) -> Tuple[Tuple[int, int], List[Entrada]]:
+    """((offset, tamanho) do índice atual, entradas)."""
+    f.seek(0)
+    cabecalho = f.read(CABECALHO.size)
+    if len(cabecalho) < CABECALHO.size:
+        raise ValueError("Arquivo pequeno demais para ser um pacote de runs")
+    magico, offset, tamanho_indice = CABECALHO.unpack(cabecalho)
+    if magico == b"RUNPACK1":
+        raise ValueError("Pacote no formato antigo (índice no rodapé): gere de novo com empacotar --recriar")
+    if magico != MAGICO:
+        raise ValueError("Cabeçalho inválido: não é um pacote de runs (ou a criação foi interrompida)")
+    f.seek(offset)
+    indice = json.loads(zlib.decompress(f.read(tamanho_indice)))
+    if indice["versao"] != VERSAO:
+        raise ValueError(f"Versão de pacote não suportada: {indice['versao']}")
+    return (offset, tamanho_indice), [Entrada(*e) for e in indice["entradas"]]
+
+
+def descobrir_arquivos(raizes: Dict[str, Path]) -> List[Tuple[str, str, Path]]:
+    """(tipo, caminho relativo, caminho no disco) de cada arquivo de run encontrado."""
+    encontrados = []
+    for tipo, (_, padrao) in ARQUIVOS.items():
+        raiz = raizes[tipo]
+        if not raiz.is_dir():
+            continue
+        for caminho in raiz.glob(f"*/*/threads-*/*/bind-*/run-*/{padrao}"):
+            rel = caminho.relative_to(raiz)
+            if extrair_infos_caminho(list(rel.parent.parts)) is not None:
+                encontrados.append((tipo, rel.as_posix(), caminho))
+    return sorted(encontrados)
+
+
+def _acrescentar(f, fim: int, entradas: Dict[Tuple[str, str], Entrada], raizes: Dict[str, Path]) -> Tuple[int, int, int]:
+    """Grava a partir de `fim` os arquivos novos ou alterados. Devolve (acrescentados, presentes, novo fim)."""
+    acrescentados = presentes = 0
+    f.seek(fim)
+    for tipo, rel, caminho in descobrir_arquivos(raizes):
+        st = caminho.stat()
+        anterior = entradas.get((tipo, rel))
+        if anterior is not None and (anterior.tamanho_original, anterior.mtime_ns) == (st.st_size, st.st_mtime_ns):
+            presentes += 1
+            continue
+        dados = caminho.read_bytes()
+        comprimidos = zlib.compress(dados, 6)
+        comprimido = len(comprimidos) < len(dados)
+        gravados = comprimidos if comprimido else dados
+        entradas[(tipo, rel)] = Entrada(tipo, rel, fim, len(gravados), len(dados), comprimido,
+                                        st.st_mtime_ns, zlib.crc32(dados))
+        f.write(gravados)
+        fim += len(gravados)
+        acrescentados += 1
+    return acrescentados, presentes, fim
+
+
+def _gravar_indice(f, fim: int, entradas: Dict[Tuple[str, str], Entrada]) -> None:
+    indice = zlib.compress(json.dumps({
+        "versao": VERSAO,
+        "entradas": [list(e) for e in sorted(entradas.values(), key=lambda e: e.offset)],
+    }, separators=(",", ":")).encode())
+    f.seek(fim)
+    f.write(indice)
+    f.flush()
+    os.fsync(f.fileno())
+    # Só com o índice novo no disco o cabeçalho passa a apontar para ele
+    f.seek(0)
+    f.write(CABECALHO.pack(MAGICO, fim, len(indice)))
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def empacotar(destino: Path, results_root: Path = RESULTS_ROOT, logs_root: Path = LOGS_ROOT,
+              recriar: bool = False) -> Tuple[int, int]:
+    """
+    Acrescenta ao pacote os arquivos novos ou alterados das árvores results/
+    e logs/. Devolve (acrescentados, já presentes).
+    """
+    raizes = {"report": Path(results_root), "log": Path(logs_root), "registro": Path(logs_root),
+              "telemetria": Path(logs_root)}
+    if destino.exists() and not recriar:
+        with open(destino, "r+b") as f:
+            (offset, tamanho_indice), lidas = _ler_indice(f)
+            entradas = {(e.tipo, e.caminho): e for e in lidas}
+            # Depois do índice atual só pode haver restos de um empacotar interrompido
+            fim = offset + tamanho_indice
+            f.truncate(fim)
+            acrescentados, presentes, fim = _acrescentar(f, fim, entradas, raizes)
+            if acrescentados:
+                _gravar_indice(f, fim, entradas)
+        return acrescentados, presentes
+
+    # Pacote novo (ou --recriar): escrito inteiro numa cópia, que só substitui o anterior completa
+    temporario = destino.with_name(destino.name + ".tmp")
+    try:
+        with open(temporario, "w+b") as f:
+            f.write(CABECALHO.pack(b"\0" * len(MAGICO), 0, 0))
+            entradas: Dict[Tuple[str, str], Entrada] = {}
+            acrescentados, presentes, fim = _acrescentar(f, CABECALHO.size, entradas, raizes)
+            _gravar_indice(f, fim, entradas)
+    except BaseException:
+        temporario.unlink(missing_ok=True)
+        raise
+    os.replace(temporario, destino)
+    return acrescentados, presentes
+
+
+def origem_runs(pasta: Path, pacote: Path = PACOTE_PADRAO) -> Path:
+    """A pasta, se existir; senão o pacote, se existir (as funções de ingestão aceitam os dois)."""
+    if not Path(pasta).is_dir() and Path(pacote).is_file():
+        print(f"[INFO] {pasta}/ não encontrada, lendo do pacote {pacote}")
+        return Path(pacote)
+    return Path(pasta)
+
+
+def ingerir_reports_pacote(pacote: Path, analises: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Mesmo resultado de ingestao.ingerir_reports, lido do pacote."""
+    analises = set(analises) if analises is not None else None
+    with PacoteRuns(pacote) as p:
+        selecionadas = [
+            e for e in p.entradas
+            if e.tipo == "report" and e.config is not None and (analises is None or e.config[1] in analises)
+        ]
+        lidos = {e.caminho: dados for e, dados in p.iterar(selecionadas)}
+    # Mesma ordem de descobrir_reports (por caminho)
+    selecionadas.sort(key=lambda e: e.caminho)
+    metricas = [_parse_linhas(lidos[e.caminho].decode("utf-8", errors="replace").splitlines()[1:]) for e in selecionadas]
+    return montar_tabela_longa([e.config for e in selecionadas], metricas)
+
+
+def logs_do_pacote(pacote: Path) -> Iterator[Tuple[Tuple, bytes, Optional[bytes]]]:
+    """
+    (config, conteúdo, registro) do log mais recente de cada run, como
+    logs_gapbs.descobrir_logs. registro é o JSON do filtro_log.py gravado ao
+    lado do log (None se a run não tem).
+    """
+    with PacoteRuns(pacote) as p:
+        por_run: Dict[str, Entrada] = {}
+        registros: Dict[str, Entrada] = {}
+        for e in p.entradas:
+            if e.tipo == "registro":
+                registros[e.caminho] = e
+            elif e.tipo == "log" and e.config is not None:
+                pasta = str(Path(e.caminho).parent)
+                # O nome termina com o timestamp: o maior é o mais recente
+                if pasta not in por_run or e.caminho > por_run[pasta].caminho:
+                    por_run[pasta] = e
+        escolhidas = [por_run[pasta] for pasta in sorted(por_run)]
+        do_log = {e.caminho: registros.get(Path(e.caminho).with_suffix(".json").as_posix()) for e in escolhidas}
+        lidos = {e.caminho: dados for e, dados in p.iterar(escolhidas + [r for r in do_log.values() if r is not None])}
+    for e in escolhidas:
+        registro = do_log[e.caminho]
+        yield e.config, lidos[e.caminho], lidos[registro.caminho] if registro is not None else None
+
+
+def extrair(pacote: Path, destino: Path) -> int:
+    """Recria as árvores results/ e logs/ em destino. Devolve o número de arquivos."""
+    with PacoteRuns(pacote) as p:
+        n = 0
+        for e, dados in p.iterar():
+            caminho = destino / ARQUIVOS[e.tipo][0] / e.caminho
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            caminho.write_bytes(dados)
+            os.utime(caminho, ns=(e.mtime_ns, e.mtime_ns))
+            n += 1
+    return n
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Empacota e lê os reports e logs das runs em um arquivo indexado.")
+    parser.add_argument("comando", choices=["empacotar", "listar", "extrair"])
+    parser.add_argument("--pacote", type=Path, default=PACOTE_PADRAO)
+    parser.add_argument("--results", type=Path, default=RESULTS_ROOT)
+    parser.add_argument("--logs", type=Path, default=LOGS_ROOT)
+    parser.add_argument("--recriar", action="store_true", help="Reescreve o pacote do zero (descarta conteúdos substituídos)")
+    parser.add_argument("--destino", type=Path, default=None, help="Pasta onde extrair recria results/ e logs/")
+    args = parser.parse_args(argv)
+
+    if args.comando == "empacotar":
+        acrescentados, presentes = empacotar(args.pacote, args.results, args.logs, args.recriar)
+        print(f"[INFO] {acrescentados} arquivos acrescentados, {presentes} já no pacote: "
+              f"{args.pacote} ({args.pacote.stat().st_size / 2**20:.1f} MB)")
+    elif args.comando == "listar":
+        with PacoteRuns(args.pacote) as p:
+            df = pd.DataFrame(p.entradas, columns=Entrada._fields)
+        resumo = df.groupby("tipo").agg(ARQUIVOS=("caminho", "size"), ORIGINAL_MB=("tamanho_original", "sum"),
+                                        PACOTE_MB=("tamanho", "sum"))
+        resumo[["ORIGINAL_MB", "PACOTE_MB"]] /= 2**20
+        print(resumo.round(2).to_string())
+    else:
+        if args.destino is None:
+            parser.error("extrair precisa de --destino")
+        print(f"[INFO] {extrair(args.pacote, args.destino)} arquivos extraídos em {args.destino}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
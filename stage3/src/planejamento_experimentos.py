@@ -0,0 +1,296 @@
+"""
+Geração de planejamentos reduzidos a partir do CSV de experimentos.
+
+O experiments.csv é o produto cartesiano completo dos fatores (grafo, threads,
+análise, HT, bind e VTune). Este script escolhe um subconjunto das linhas para
+um orçamento e escreve um CSV no mesmo formato, que build_commad.py lê sem
+mudanças. Métodos:
+
+  fracionado  fatorial fracionado 2^(k-1) nos fatores de dois níveis (HT, bind,
+              VTune), cruzado por completo com os demais. A relação de
+              definição é escolhida para não confundir os termos do modelo;
+              se nenhuma serve, ou se a meia fração passa do --orcamento
+              (opcional), o script falha. Com três fatores de dois níveis,
+              toda meia fração confunde cada efeito principal com uma
+              interação dupla: por isso este método não usa a interação
+              padrão HT:bind (só as passadas em --interacoes).
+  lhs         hipercubo latino no eixo de threads: cada combinação dos outros
+              fatores mede 1 thread e um nível de cada estrato da escada de
+              threads, com os níveis balanceados entre as combinações. O
+              orçamento precisa de ao menos 2 linhas por combinação; as
+              linhas que sobram da divisão em estratos inteiros viram um
+              nível a mais (fora dos já escolhidos) em parte das combinações.
+  d-otimo     escolhe as linhas que maximizam det(X'X) do modelo (troca de
+              Fedorov), mantendo as linhas com 1 thread (base do speedup).
+
+O modelo tem os efeitos principais de todos os fatores que variam no CSV (todos
+categóricos, como nas ANOVAs de tabelas/) e as interações pedidas em
+--interacoes (padrão: HT:bind, exceto no fracionado). Depois da escolha é
+impresso, para os efeitos principais e todas as interações de dois fatores,
+quantos graus de liberdade continuam estimáveis, a eficiência D relativa ao planejamento completo e, quando o
+planejamento usa menos linhas que o --orcamento, a diferença. Se algum termo
+do modelo ficar confundido, o CSV não é escrito e o script sai com status 1.
+
+Uso (a partir de stage3/):
+  python3 ./src/planejamento_experimentos.py --csv experiments.csv --metodo d-otimo --orcamento 400 --saida experiments_reduzido.csv
+"""
+
+import argparse
+import itertools
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+FATORES = ["GRAPH_NAME", "THREADS", "ANALYSIS_TYPE", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY", "VTUNE_ENABLE"]
+INTERACOES_PADRAO = ["DISABLE_HYPERTHREADING:THREAD_BIND_POLICY"]
+SEMENTE = 0
+MAX_TROCAS = 500
+
+
+def fatores_variaveis(df: pd.DataFrame) -> List[str]:
+    return [f for f in FATORES if f in df.columns and df[f].nunique() > 1]
+
+
+def matriz_modelo(df: pd.DataFrame, termos: List[str], niveis: Dict[str, list]) -> Tuple[np.ndarray, Dict[str, slice]]:
+    """
+    Matriz do modelo (intercepto + dummies sem o primeiro nível, produtos nas
+    interações). Devolve a matriz e a fatia de colunas de cada termo.
+    """
+    dummies = {
+        f: np.column_stack([(df[f] == nivel).to_numpy(dtype=float) for nivel in niveis[f][1:]])
+        for f in niveis
+    }
+    colunas = [np.ones((len(df), 1))]
+    fatias = {}
+    inicio = 1
+    for termo in termos:
+        partes = [dummies[f] for f in termo.split(":")]
+        bloco = partes[0]
+        for parte in partes[1:]:
+            bloco = np.einsum("ni,nj->nij", bloco, parte).reshape(len(df), -1)
+        colunas.append(bloco)
+        fatias[termo] = slice(inicio, inicio + bloco.shape[1])
+        inicio += bloco.shape[1]
+    return np.hstack(colunas), fatias
+
+
+def graus_estimaveis(x: np.ndarray, fatias: Dict[str, slice]) -> Dict[str, int]:
+    """Graus de liberdade de cada termo que o planejamento ainda separa dos demais."""
+    posto = np.linalg.matrix_rank(x)
+    resultado = {}
+    for termo, fatia in fatias.items():
+        sem_termo = np.delete(x, np.r_[fatia], axis=1)
+        resultado[termo] = int(posto - np.linalg.matrix_rank(sem_termo))
+    return resultado
+
+
+def log_det_informacao(x: np.ndarray) -> float:
+    sinal, log_det = np.linalg.slogdet(x.T @ x / len(x))
+    return log_det if sinal > 0 else -np.inf
+
+
+def fracionado(df: pd.DataFrame, termos: List[str], niveis: Dict[str, list],
+               orcamento: Optional[int] = None) -> Tuple[pd.DataFrame, str]:
+    """
+    Meia fração nos fatores de dois níveis. Testa as palavras de definição da
+    mais longa para a mais curta e fica com a primeira que mantém todos os
+    termos do modelo estimáveis. Devolve (planejamento, relação de definição);
+    ValueError se nenhuma palavra serve ou se a fração passa do orçamento.
+    """
+    dois_niveis = [f for f in niveis if len(niveis[f]) == 2]
+    if len(dois_niveis) < 2:
+        raise ValueError("O fatorial fracionado precisa de ao menos dois fatores de dois níveis")
+    # Codificação -1/+1 de cada fator de dois níveis
+    sinais = {f: np.where(df[f] == niveis[f][0], -1, 1) for f in dois_niveis}
+
+    for tamanho in range(len(dois_niveis), 1, -1):
+        for palavra in itertools.combinations(dois_niveis, tamanho):
+            selecao = np.prod([sinais[f] for f in palavra], axis=0) == 1
+            x, fatias = matriz_modelo(df[selecao], termos, niveis)
+            gl = graus_estimaveis(x, fatias)
+            if all(gl[t] == fatias[t].stop - fatias[t].start for t in termos):
+                if orcamento is not None and selecao.sum() > orcamento:
+                    raise ValueError(f"A meia fração tem {selecao.sum()} linhas, acima do orçamento de {orcamento}; "
+                                     "use --metodo lhs ou d-otimo")
+                return df[selecao], "I = " + "*".join(palavra)
+    raise ValueError(f"Nenhuma meia fração em {', '.join(dois_niveis)} mantém os termos do modelo estimáveis "
+                     f"({', '.join(termos)}); reduza --interacoes ou use --metodo d-otimo")
+
+
+def lhs_threads(df: pd.DataFrame, orcamento: int, semente: int = SEMENTE) -> pd.DataFrame:
+    """
+    Hipercubo latino no eixo de threads. Toda combinação mantém THREADS == 1 e
+    recebe um nível de cada estrato da escada restante; o nível dentro do
+    estrato gira entre as combinações, para cobrir todos igualmente. O resto
+    da divisão do orçamento dá um nível extra a parte das combinações. Usa no
+    máximo `orcamento` linhas (ValueError se não couber 2 por combinação).
+    """
+    rng = np.random.default_rng(semente)
+    outros = [f for f in fatores_variaveis(df) if f != "THREADS"]
+    escada = sorted(t for t in df["THREADS"].unique() if t != 1)
+    combinacoes = df[outros].drop_duplicates().reset_index(drop=True)
+    # 1 thread mais ao menos um estrato por combinação
+    if orcamento < 2 * len(combinacoes):
+        raise ValueError(f"Orçamento {orcamento} menor que 2 linhas por combinação dos outros fatores "
+                         f"({2 * len(combinacoes)})")
+    por_combinacao = orcamento // len(combinacoes) - 1
+    estratos = np.array_split(np.array(escada), min(por_combinacao, len(escada)))
+
+    ordem = rng.permutation(len(combinacoes))
+    # Linhas que não formam um estrato inteiro em todas as combinações
+    resto = orcamento - len(combinacoes) * (1 + len(estratos)) if len(estratos) < len(escada) else 0
+    escolhidas = []
+    for posicao, i in enumerate(ordem):
+        threads = [1] + [int(e[(posicao + j) % len(e)]) for j, e in enumerate(estratos)]
+        if posicao < resto:
+            livres = [int(t) for t in escada if t not in threads]
+            threads.append(livres[posicao % len(livres)])
+        escolhidas.append(combinacoes.loc[[i] * len(threads)].assign(THREADS=threads))
+    selecao = pd.concat(escolhidas)
+    return df.merge(selecao, on=outros + ["THREADS"], how="inner")
+
+
+def d_otimo(
+    df: pd.DataFrame,
+    termos: List[str],
+    niveis: Dict[str, list],
+    orcamento: int,
+    semente: int = SEMENTE,
+    max_trocas: int = MAX_TROCAS,
+) -> pd.DataFrame:
+    """
+    Planejamento D-ótimo com `orcamento` linhas: começa das linhas com 1 thread
+    mais uma escolha gulosa e faz trocas de Fedorov enquanto det(X'X) aumenta.
+    As linhas com 1 thread nunca saem.
+    """
+    rng = np.random.default_rng(semente)
+    x, _ = matriz_modelo(df, termos, niveis)
+    n, p = x.shape
+    fixas = np.flatnonzero(df["THREADS"].to_numpy() == 1)
+    if orcamento < max(p, len(fixas)):
+        raise ValueError(f"Orçamento {orcamento} menor que os parâmetros do modelo ({p}) ou as linhas com 1 thread ({len(fixas)})")
+    orcamento = min(orcamento, n)
+
+    no_plano = np.zeros(n, dtype=bool)
+    no_plano[fixas] = True
+    # Regularização pequena para a escolha gulosa começar com X'X singular
+    informacao = x[no_plano].T @ x[no_plano] + 1e-6 * np.eye(p)
+    while no_plano.sum() < orcamento:
+        inversa = np.linalg.inv(informacao)
+        variancia = np.einsum("ij,jk,ik->i", x, inversa, x)
+        variancia[no_plano] = -np.inf
+        # Desempate aleatório entre candidatas equivalentes
+        melhor = rng.choice(np.flatnonzero(variancia >= variancia.max() - 1e-12))
+        no_plano[melhor] = True
+        informacao += np.outer(x[melhor], x[melhor])
+
+    for _ in range(max_trocas):
+        inversa = np.linalg.inv(informacao)
+        plano = np.flatnonzero(no_plano & ~np.isin(np.arange(n), fixas))
+        fora = np.flatnonzero(~no_plano)
+        if len(plano) == 0 or len(fora) == 0:
+            break
+        d_plano = np.einsum("ij,jk,ik->i", x[plano], inversa, x[plano])
+        d_fora = np.einsum("ij,jk,ik->i", x[fora], inversa, x[fora])
+        cruzado = x[plano] @ inversa @ x[fora].T
+        # Razão det(novo)/det(atual) ao trocar plano[i] por fora[j]
+        ganho = (1 + d_fora[None, :]) * (1 - d_plano[:, None]) + cruzado ** 2
+        i, j = np.unravel_index(np.argmax(ganho), ganho.shape)
+        if ganho[i, j] <= 1 + 1e-9:
+            break
+        sai, entra = plano[i], fora[j]
+        no_plano[sai], no_plano[entra] = False, True
+        informacao += np.outer(x[entra], x[entra]) - np.outer(x[sai], x[sai])
+    return df[no_plano]
+
+
+def relatorio_efeitos(df_completo: pd.DataFrame, df_plano: pd.DataFrame, niveis: Dict[str, list], termos_modelo: List[str]) -> pd.DataFrame:
+    """Graus de liberdade estimáveis dos efeitos principais e de todas as interações duplas."""
+    fatores = list(niveis)
+    termos = fatores + [f"{a}:{b}" for a, b in itertools.combinations(fatores, 2)]
+    linhas = []
+    for termo in termos:
+        # Cada termo é avaliado junto com os efeitos principais e os termos do modelo
+        contexto = list(dict.fromkeys(fatores + termos_modelo + [termo]))
+        x, fatias = matriz_modelo(df_plano, contexto, niveis)
+        gl = graus_estimaveis(x, fatias)[termo]
+        total = fatias[termo].stop - fatias[termo].start
+        linhas.append({
+            "TERMO": termo,
+            "NO_MODELO": termo in termos_modelo,
+            "GL": total,
+            "GL_ESTIMAVEIS": gl,
+            "ESTIMAVEL": gl == total,
+        })
+    return pd.DataFrame(linhas)
+
+
+def eficiencia_d(df_completo: pd.DataFrame, df_plano: pd.DataFrame, termos: List[str], niveis: Dict[str, list]) -> float:
+    """(det(M_plano) / det(M_completo))^(1/p), com M = X'X / n."""
+    x_completo, _ = matriz_modelo(df_completo, termos, niveis)
+    x_plano, _ = matriz_modelo(df_plano, termos, niveis)
+    return float(np.exp((log_det_informacao(x_plano) - log_det_informacao(x_completo)) / x_completo.shape[1]))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Gera um planejamento reduzido a partir do CSV de experimentos.")
+    parser.add_argument("--csv", type=Path, default=Path("experiments.csv"))
+    parser.add_argument("--metodo", choices=["fracionado", "lhs", "d-otimo"], required=True)
+    parser.add_argument("--orcamento", type=int, default=None, help="Número máximo de linhas (configurações) do planejamento")
+    parser.add_argument("--interacoes", nargs="*", default=None,
+                        help="Interações do modelo (ex.: THREADS:DISABLE_HYPERTHREADING). Padrão: "
+                             f"{' '.join(INTERACOES_PADRAO)}, exceto com --metodo fracionado, em que toda meia "
+                             "fração de HT, bind e VTune confunde essa interação com um efeito principal")
+    parser.add_argument("--saida", type=Path, required=True)
+    parser.add_argument("--relatorio", type=Path, default=None, help="CSV com a estimabilidade de cada efeito")
+    parser.add_argument("--semente", type=int, default=SEMENTE)
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.csv, dtype=str, keep_default_na=False)
+    df["THREADS"] = df["THREADS"].astype(int)
+    fatores = fatores_variaveis(df)
+    niveis = {f: sorted(df[f].unique()) for f in fatores}
+    if args.interacoes is None:
+        args.interacoes = [] if args.metodo == "fracionado" else INTERACOES_PADRAO
+    interacoes = [t for t in args.interacoes if all(f in niveis for f in t.split(":"))]
+    termos = fatores + interacoes
+
+    if args.metodo in ("lhs", "d-otimo") and args.orcamento is None:
+        parser.error(f"--orcamento é obrigatório com --metodo {args.metodo}")
+    try:
+        if args.metodo == "fracionado":
+            df_plano, relacao = fracionado(df, termos, niveis, args.orcamento)
+            print(f"[INFO] Relação de definição: {relacao}")
+        elif args.metodo == "lhs":
+            df_plano = lhs_threads(df, args.orcamento, args.semente)
+        else:
+            df_plano = d_otimo(df, termos, niveis, args.orcamento, args.semente)
+    except ValueError as e:
+        print(f"[ERRO] {e}")
+        return 1
+
+    df_efeitos = relatorio_efeitos(df, df_plano, niveis, termos)
+    print(df_efeitos.to_string(index=False))
+    if args.relatorio is not None:
+        df_efeitos.to_csv(args.relatorio, index=False)
+    nao_estimaveis = df_efeitos.loc[df_efeitos["NO_MODELO"] & ~df_efeitos["ESTIMAVEL"], "TERMO"].tolist()
+    if nao_estimaveis:
+        print(f"[ERRO] Termos do modelo não estimáveis neste planejamento: {', '.join(nao_estimaveis)}; "
+              f"{args.saida} não foi escrito")
+        return 1
+
+    # Mesma ordem e mesmas colunas do CSV original
+    df_plano = df_plano.sort_index() if args.metodo != "lhs" else df_plano
+    df_plano.to_csv(args.saida, index=False)
+    print(f"[INFO] {len(df_plano)} de {len(df)} configurações ({len(df_plano) / len(df):.0%}) em {args.saida}")
+    print(f"[INFO] Eficiência D relativa ao completo: {eficiencia_d(df, df_plano, termos, niveis):.3f}")
+    if args.orcamento is not None and len(df_plano) < args.orcamento:
+        print(f"[AVISO] {args.orcamento - len(df_plano)} linhas do orçamento de {args.orcamento} não foram usadas "
+              f"pelo método {args.metodo}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
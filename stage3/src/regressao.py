@@ -0,0 +1,244 @@
+"""
+Comparação entre duas varreduras (ex.: stage2 x stage3, antes x depois de uma troca de BIOS).
+
+As amostras por run dos dois lados são alinhadas por configuração
+(GRAPH_NAME, THREADS, DISABLE_HYPERTHREADING, THREAD_BIND_POLICY, CONCORRENTE) e, em cada
+configuração presente nos dois, comparadas com:
+
+  - teste t de Welch sobre log(tempo): a hipótese nula é razão de médias
+    geométricas 1, sem supor variâncias iguais; os p-valores de todas as
+    configurações passam pela correção de Benjamini-Hochberg (Q_VALOR);
+  - Mann-Whitney (P_MANN_WHITNEY), só informativo, para runs com outliers.
+
+Tamanhos de efeito: VARIACAO (média do candidato / média da base - 1;
+positivo = mais lento), HEDGES_G (diferença das médias em desvios padrão,
+com correção para amostras pequenas) e CLIFF_DELTA (P(cand > base) -
+P(cand < base)).
+
+Uma configuração é REGRESSAO quando Q_VALOR < --alfa e VARIACAO >= --limite,
+MELHORIA quando Q_VALOR < --alfa e VARIACAO <= -limite, e IGUAL nos outros
+casos (INCONCLUSIVA com menos de 2 runs válidas num dos lados).
+
+Cada lado pode ser uma pasta results/ (Elapsed Time dos report.csv do VTune),
+uma pasta logs/ (Average Time do GAPBS, com --tempo gapbs), um runs.pack
+(pacote_runs.py) ou um store (tabelas amostras / tempos_logs). Runs anômalas
+(anomalias.py) ficam de fora, como nas médias do unify_all_results.py.
+
+Saída: código 0 sem regressões, 1 com pelo menos --max-regressoes + 1
+regressões e 2 quando não há configurações em comum. O CSV (--saida) tem uma
+linha por configuração alinhada.
+
+Uso (a partir de stage3/):
+  python3 ./src/regressao.py --base ../stage2/results --candidato results [--analise performance-snapshot]
+  python3 ./src/regressao.py --base ../stage2/logs --candidato logs --tempo gapbs --limite 0.10
+"""
+
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from anomalias import marcar_anomalias
+from armazenamento import carregar_tabela
+from estatistica import matriz_amostras
+from ingestao import ingerir_reports
+from logs_gapbs import ingerir_logs
+from unify_all_results import extrair_frequencias, extrair_tempos
+
+# Runs do executor.py --concorrente (CONCORRENTE) só são comparadas com runs concorrentes
+CHAVES = ["GRAPH_NAME", "THREADS", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY", "CONCORRENTE"]
+ANALISE_PADRAO = "performance-snapshot"
+ALFA = 0.05
+LIMITE = 0.05
+SAIDA_PADRAO = Path("regressoes.csv")
+LINHAS_RESUMO = 15
+
+
+def _eh_store(caminho: Path) -> bool:
+    return (caminho / "amostras").is_dir() or (caminho / "tempos_logs").is_dir()
+
+
+def carregar_amostras(origem: Path, tempo: str, analise: Optional[str], com_anomalias: bool = False) -> pd.DataFrame:
+    """Uma linha por run: CHAVES + RUN + ELAPSED_TIME, já sem as runs anômalas."""
+    origem = Path(origem)
+    if not origem.exists():
+        raise FileNotFoundError(f"Origem não encontrada: {origem}")
+    filtros = [("ANALYSIS_TYPE", "==", analise)] if analise else None
+
+    if _eh_store(origem):
+        if tempo == "vtune":
+            df = carregar_tabela("amostras", filtros=filtros, store=origem)
+        else:
+            df = carregar_tabela("tempos_logs", filtros=filtros, store=origem).drop(columns=["ELAPSED_TIME"], errors="ignore")
+            df = df.rename(columns={"AVERAGE_TIME": "ELAPSED_TIME"})
+        if com_anomalias and "ANOMALIA" in df.columns:
+            df = df.drop(columns=["ANOMALIA"])
+    elif tempo == "vtune":
+        df_longo = ingerir_reports(origem, analises=[analise] if analise else None)
+        chaves = CHAVES + ["ANALYSIS_TYPE"]
+        df = extrair_tempos(df_longo).merge(extrair_frequencias(df_longo), on=chaves + ["RUN"], how="left")
+        if not com_anomalias:
+            df = marcar_anomalias(df, chaves, "ELAPSED_TIME", "AVERAGE_CPU_FREQUENCY")
+    else:
+        df, df_trials = ingerir_logs(origem)
+        if analise:
+            df = df[df["ANALYSIS_TYPE"] == analise]
+        if not com_anomalias:
+            df = marcar_anomalias(df, CHAVES + ["ANALYSIS_TYPE"], "AVERAGE_TIME", df_trials=df_trials)
+        df = df.rename(columns={"AVERAGE_TIME": "ELAPSED_TIME"})
+
+    if "ANOMALIA" in df.columns:
+        df = df[~df["ANOMALIA"]]
+    if "CONCORRENTE" not in df.columns:
+        # Stores anteriores ao executor.py --concorrente só têm runs exclusivas
+        df = df.assign(CONCORRENTE=False)
+    df = df[CHAVES + ["RUN", "ELAPSED_TIME"]].copy()
+    # Partições do store voltam como categoria de texto; os caminhos, como int/bool
+    df["GRAPH_NAME"] = df["GRAPH_NAME"].astype(str)
+    df["THREADS"] = df["THREADS"].astype(int)
+    df["DISABLE_HYPERTHREADING"] = df["DISABLE_HYPERTHREADING"].astype(str).str.lower() == "true"
+    df["THREAD_BIND_POLICY"] = df["THREAD_BIND_POLICY"].astype(str)
+    df["CONCORRENTE"] = df["CONCORRENTE"].astype(str).str.lower() == "true"
+    return df[df["ELAPSED_TIME"] > 0]
+
+
+def _momentos(valores: np.ndarray) -> tuple:
+    """(n, média, variância amostral) por linha, ignorando NaN."""
+    n = np.sum(~np.isnan(valores), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = np.nanmean(valores, axis=1)
+        variancia = np.nansum((valores - media[:, None]) ** 2, axis=1) / (n - 1)
+    return n, media, variancia
+
+
+def benjamini_hochberg(p: np.ndarray) -> np.ndarray:
+    """q-valores de Benjamini-Hochberg (NaN fica NaN)."""
+    q = np.full_like(p, np.nan, dtype=float)
+    validos = np.flatnonzero(~np.isnan(p))
+    if len(validos) == 0:
+        return q
+    ordem = validos[np.argsort(p[validos])]
+    m = len(ordem)
+    ajustados = p[ordem] * m / np.arange(1, m + 1)
+    q[ordem] = np.minimum(np.minimum.accumulate(ajustados[::-1])[::-1], 1.0)
+    return q
+
+
+def comparar(df_base: pd.DataFrame, df_candidato: pd.DataFrame, alfa: float = ALFA, limite: float = LIMITE) -> pd.DataFrame:
+    """Uma linha por configuração presente nos dois lados, com testes e tamanhos de efeito."""
+    indice_base, base, _ = matriz_amostras(df_base, CHAVES, "ELAPSED_TIME")
+    indice_cand, cand, _ = matriz_amostras(df_candidato, CHAVES, "ELAPSED_TIME")
+    indice_base["_LINHA_BASE"] = np.arange(len(indice_base))
+    indice_cand["_LINHA_CAND"] = np.arange(len(indice_cand))
+    alinhado = indice_base.merge(indice_cand, on=CHAVES, how="inner")
+    base = base[alinhado["_LINHA_BASE"].to_numpy()]
+    cand = cand[alinhado["_LINHA_CAND"].to_numpy()]
+    df = alinhado[CHAVES].copy()
+
+    n_b, media_b, var_b = _momentos(base)
+    n_c, media_c, var_c = _momentos(cand)
+    df["N_BASE"], df["N_CANDIDATO"] = n_b, n_c
+    df["TEMPO_BASE"], df["TEMPO_CANDIDATO"] = media_b, media_c
+    df["VARIACAO"] = media_c / media_b - 1
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Welch sobre log(tempo)
+        _, log_b, lvar_b = _momentos(np.log(base))
+        _, log_c, lvar_c = _momentos(np.log(cand))
+        erro_b, erro_c = lvar_b / n_b, lvar_c / n_c
+        t = (log_c - log_b) / np.sqrt(erro_b + erro_c)
+        gl = (erro_b + erro_c) ** 2 / (erro_b ** 2 / (n_b - 1) + erro_c ** 2 / (n_c - 1))
+        p = 2 * stats.t.sf(np.abs(t), gl)
+        # Sem variação nos dois lados: diferente se as médias diferem, senão igual
+        constantes = (erro_b + erro_c) == 0
+        p[constantes] = np.where(log_c[constantes] != log_b[constantes], 0.0, 1.0)
+
+        desvio = np.sqrt(((n_b - 1) * var_b + (n_c - 1) * var_c) / (n_b + n_c - 2))
+        correcao = 1 - 3 / (4 * (n_b + n_c) - 9)
+        df["HEDGES_G"] = (media_c - media_b) / desvio * correcao
+
+    # Cliff's delta: todos os pares (candidato, base) de cada configuração de uma vez
+    maior = np.nansum(cand[:, :, None] > base[:, None, :], axis=(1, 2))
+    menor = np.nansum(cand[:, :, None] < base[:, None, :], axis=(1, 2))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        df["CLIFF_DELTA"] = (maior - menor) / (n_b * n_c)
+
+    insuficiente = (n_b < 2) | (n_c < 2)
+    p[insuficiente] = np.nan
+    df["P_WELCH"] = p
+    df["Q_VALOR"] = benjamini_hochberg(p)
+    df["P_MANN_WHITNEY"] = [
+        stats.mannwhitneyu(c[~np.isnan(c)], b[~np.isnan(b)], alternative="two-sided").pvalue if not falta else np.nan
+        for b, c, falta in zip(base, cand, insuficiente)
+    ]
+
+    significativa = df["Q_VALOR"] < alfa
+    df["RESULTADO"] = np.select(
+        [insuficiente, significativa & (df["VARIACAO"] >= limite), significativa & (df["VARIACAO"] <= -limite)],
+        ["INCONCLUSIVA", "REGRESSAO", "MELHORIA"],
+        default="IGUAL",
+    )
+    return df.sort_values("VARIACAO", ascending=False, ignore_index=True)
+
+
+def _linha_resumo(r: pd.Series) -> str:
+    ht = "ht-off" if r["DISABLE_HYPERTHREADING"] else "ht-on"
+    bind = f"{r['THREAD_BIND_POLICY']} (concorrente)" if r["CONCORRENTE"] else r["THREAD_BIND_POLICY"]
+    return (f"{r['GRAPH_NAME']} t={r['THREADS']} {ht} {bind}: "
+            f"{r['TEMPO_BASE']:.4f}s -> {r['TEMPO_CANDIDATO']:.4f}s ({r['VARIACAO']:+.1%}), "
+            f"q={r['Q_VALOR']:.3g}, g={r['HEDGES_G']:.2f}, delta={r['CLIFF_DELTA']:.2f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Detecta regressões de desempenho entre duas varreduras.")
+    parser.add_argument("--base", type=Path, required=True, help="results/, logs/, runs.pack ou store da referência")
+    parser.add_argument("--candidato", type=Path, required=True, help="results/, logs/, runs.pack ou store a comparar")
+    parser.add_argument("--tempo", choices=["vtune", "gapbs"], default="vtune",
+                        help="Elapsed Time dos reports do VTune ou Average Time dos logs do GAPBS")
+    parser.add_argument("--analise", default=ANALISE_PADRAO, help="ANALYSIS_TYPE comparado ('' para todos)")
+    parser.add_argument("--alfa", type=float, default=ALFA, help="Nível de significância (após Benjamini-Hochberg)")
+    parser.add_argument("--limite", type=float, default=LIMITE, help="Variação relativa mínima para contar (0.05 = 5%%)")
+    parser.add_argument("--max-regressoes", type=int, default=0, help="Regressões toleradas antes de sair com código 1")
+    parser.add_argument("--com-anomalias", action="store_true", help="Não remove as runs anômalas")
+    parser.add_argument("--saida", type=Path, default=SAIDA_PADRAO)
+    args = parser.parse_args(argv)
+
+    lados = {}
+    for nome, origem in (("base", args.base), ("candidato", args.candidato)):
+        try:
+            lados[nome] = carregar_amostras(origem, args.tempo, args.analise or None, args.com_anomalias)
+        except FileNotFoundError as e:
+            print(f"[ERRO] {e}")
+            return 2
+        print(f"[INFO] {nome}: {len(lados[nome])} runs em {lados[nome].groupby(CHAVES).ngroups} configurações ({origem})")
+
+    df = comparar(lados["base"], lados["candidato"], args.alfa, args.limite)
+    if df.empty:
+        print("[ERRO] Nenhuma configuração em comum entre base e candidato")
+        return 2
+    df.to_csv(args.saida, index=False)
+
+    contagem = df["RESULTADO"].value_counts()
+    print(f"[INFO] {len(df)} configurações alinhadas: " + ", ".join(f"{k}={v}" for k, v in contagem.items()))
+    for resultado, rotulo in (("REGRESSAO", "[AVISO] Regressão"), ("MELHORIA", "[INFO] Melhoria")):
+        selecao = df[df["RESULTADO"] == resultado]
+        if resultado == "MELHORIA":
+            selecao = selecao.iloc[::-1]
+        for _, r in selecao.head(LINHAS_RESUMO).iterrows():
+            print(f"{rotulo}: {_linha_resumo(r)}")
+        if len(selecao) > LINHAS_RESUMO:
+            print(f"... mais {len(selecao) - LINHAS_RESUMO}")
+    print(f"[INFO] Comparação completa em: {args.saida}")
+
+    n_regressoes = int(contagem.get("REGRESSAO", 0))
+    if n_regressoes > args.max_regressoes:
+        print(f"[ERRO] {n_regressoes} regressões (tolerância: {args.max_regressoes})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
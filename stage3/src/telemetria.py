@@ -0,0 +1,164 @@
+"""
+Amostrador leve de frequência e utilização por núcleo para as runs sem VTune.
+
+Executa o comando do benchmark como filho e, enquanto ele roda, lê a cada
+INTERVALO segundos:
+
+  <sys>/devices/system/cpu/cpuN/cpufreq/scaling_cur_freq   frequência (kHz)
+  <proc>/stat                                              tempos por CPU
+
+A utilização de cada CPU é 1 - (idle + iowait) / total entre duas amostras.
+Os arquivos são abertos uma única vez e relidos com os.pread, e o processo do
+amostrador roda com prioridade baixa (nice), para não perturbar a medição.
+As raízes de /sys e /proc são configuráveis (--sys-root, --proc-root), para
+testar com uma árvore falsa.
+
+A série vai para <saida>/telemetria.csv (TEMPO, CPU, FREQ_MHZ, UTILIZACAO) e
+o status de saída é o do comando.
+
+Uso (executa_bench.sh faz isso nas runs com -vtune-enable false):
+  python3 ./src/telemetria.py --saida logs/.../run-1 --cpus 0-3 -- ./src/gapbs/pr -f g.sg
+"""
+
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from topologia import expandir_lista_cpus
+
+RAIZ_SYS = Path("/sys")
+RAIZ_PROC = Path("/proc")
+INTERVALO = 0.5
+NICE = 10
+ARQUIVO_SAIDA = "telemetria.csv"
+COLUNAS = ["TEMPO", "CPU", "FREQ_MHZ", "UTILIZACAO"]
+TAMANHO_LEITURA = 1 << 16
+
+
+def cpus_disponiveis(raiz_sys: Path = RAIZ_SYS) -> List[int]:
+    cpus = []
+    for pasta in (raiz_sys / "devices/system/cpu").glob("cpu[0-9]*"):
+        cpus.append(int(pasta.name[3:]))
+    return sorted(cpus)
+
+
+def ler_stat(conteudo: bytes) -> Dict[int, Tuple[int, int]]:
+    """CPU -> (tempo ocioso, tempo total) a partir do conteúdo de /proc/stat."""
+    tempos = {}
+    for linha in conteudo.splitlines():
+        if not linha.startswith(b"cpu") or linha.startswith(b"cpu "):
+            continue
+        campos = linha.split()
+        valores = [int(v) for v in campos[1:9]]
+        # user nice system idle iowait irq softirq steal (guest já está em user)
+        ocioso = valores[3] + (valores[4] if len(valores) > 4 else 0)
+        tempos[int(campos[0][3:])] = (ocioso, sum(valores))
+    return tempos
+
+
+class Amostrador:
+    def __init__(self, cpus: List[int], raiz_sys: Path = RAIZ_SYS, raiz_proc: Path = RAIZ_PROC):
+        self.cpus = cpus
+        self.fd_stat = os.open(raiz_proc / "stat", os.O_RDONLY)
+        self.fd_freq: Dict[int, int] = {}
+        for cpu in cpus:
+            caminho = raiz_sys / f"devices/system/cpu/cpu{cpu}/cpufreq/scaling_cur_freq"
+            try:
+                self.fd_freq[cpu] = os.open(caminho, os.O_RDONLY)
+            except OSError:
+                # Sem cpufreq (VM, CPU offline): a frequência fica vazia
+                pass
+        self.anterior = ler_stat(os.pread(self.fd_stat, TAMANHO_LEITURA, 0))
+
+    def amostrar(self) -> List[Tuple[int, Optional[float], Optional[float]]]:
+        """Uma linha (CPU, MHz, utilização) por CPU desde a amostra anterior."""
+        atual = ler_stat(os.pread(self.fd_stat, TAMANHO_LEITURA, 0))
+        linhas = []
+        for cpu in self.cpus:
+            freq = None
+            if cpu in self.fd_freq:
+                try:
+                    freq = int(os.pread(self.fd_freq[cpu], 64, 0)) / 1000
+                except (OSError, ValueError):
+                    pass
+            util = None
+            if cpu in atual and cpu in self.anterior:
+                ocioso = atual[cpu][0] - self.anterior[cpu][0]
+                total = atual[cpu][1] - self.anterior[cpu][1]
+                if total > 0:
+                    util = 1.0 - ocioso / total
+            linhas.append((cpu, freq, util))
+        self.anterior = atual
+        return linhas
+
+    def fechar(self) -> None:
+        os.close(self.fd_stat)
+        for fd in self.fd_freq.values():
+            os.close(fd)
+
+
+def executar_com_telemetria(
+    comando: List[str],
+    saida: Path,
+    cpus: List[int],
+    intervalo: float = INTERVALO,
+    raiz_sys: Path = RAIZ_SYS,
+    raiz_proc: Path = RAIZ_PROC,
+) -> int:
+    """Roda `comando` amostrando as CPUs até ele terminar. Devolve o status de saída."""
+    saida.mkdir(parents=True, exist_ok=True)
+    amostrador = Amostrador(cpus, raiz_sys, raiz_proc)
+    try:
+        try:
+            proc = subprocess.Popen(comando)
+        except OSError as e:
+            # Como no shell: comando inexistente ou sem permissão sai com 127
+            print(f"[ERRO] Não foi possível executar {comando[0]}: {e}", file=sys.stderr)
+            return 127
+        # O filho já herdou a prioridade normal; só o amostrador fica com nice
+        os.nice(NICE)
+        t0 = time.monotonic()
+        with open(saida / ARQUIVO_SAIDA, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUNAS)
+            while True:
+                try:
+                    status = proc.wait(timeout=intervalo)
+                except subprocess.TimeoutExpired:
+                    status = None
+                tempo = round(time.monotonic() - t0, 3)
+                for cpu, freq, util in amostrador.amostrar():
+                    writer.writerow([tempo, cpu, "" if freq is None else f"{freq:.0f}", "" if util is None else f"{util:.3f}"])
+                if status is not None:
+                    break
+    finally:
+        amostrador.fechar()
+    return status
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if "--" not in argv or argv.index("--") == len(argv) - 1:
+        print("[ERRO] Uso: telemetria.py [opções] -- comando [args...]")
+        return 2
+    separador = argv.index("--")
+    parser = argparse.ArgumentParser(description="Amostra frequência e utilização por CPU enquanto um comando roda.")
+    parser.add_argument("--saida", type=Path, required=True, help="Pasta da run onde telemetria.csv é escrito")
+    parser.add_argument("--cpus", default="", help="CPUs amostradas (ex.: 0-3,8); padrão: todas")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO)
+    parser.add_argument("--sys-root", type=Path, default=RAIZ_SYS)
+    parser.add_argument("--proc-root", type=Path, default=RAIZ_PROC)
+    args = parser.parse_args(argv[:separador])
+    comando = argv[separador + 1:]
+
+    cpus = expandir_lista_cpus(args.cpus) if args.cpus else cpus_disponiveis(args.sys_root)
+    return executar_com_telemetria(comando, args.saida, cpus, args.intervalo, args.sys_root, args.proc_root)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+"""
+Topologia da máquina e posicionamento explícito de threads e memória.
+
+OMP_PROC_BIND=close/spread deixa o OpenMP decidir onde cada thread fica, e nos
+reports de hpc-performance do PageRank o "NUMA: % of Remote Accesses" fica
+perto de 30% no nó de dois sockets. As políticas abaixo montam a lista de
+CPUs (na ordem em que as threads são colocadas) e a política de memória do
+numactl a partir da topologia lida de <sys>/devices/system/cpu e
+<sys>/devices/system/node:
+
+  socket      enche um socket antes do próximo (núcleos físicos primeiro e,
+              com HT ligado, depois os irmãos do mesmo socket); memória presa
+              aos nós usados (membind)
+  cores       só núcleos físicos, alternando os sockets, independente do HT;
+              memória no nó de quem aloca (localalloc)
+  interleave  alterna os sockets como cores (com os irmãos de HT no fim) e
+              intercala as páginas entre os nós usados (interleave)
+
+A raiz de /sys é configurável (--sys-root) para testar com uma árvore falsa.
+
+Uso (a partir de stage3/), para conferir o que uma run vai receber:
+  python3 ./src/topologia.py --politica socket --threads 22 --disable-ht false
+"""
+
+import argparse
+from functools import lru_cache
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+RAIZ_SYS = Path("/sys")
+POLITICAS_TOPOLOGIA = ("socket", "cores", "interleave")
+# Políticas do OMP_PROC_BIND; com @<CPUs> na pasta, a run veio do executor.py --concorrente
+POLITICAS_OMP = ("close", "spread")
+
+
+class CPU(NamedTuple):
+    cpu: int
+    socket: int
+    nucleo: int
+    no: int
+
+
+class Posicionamento(NamedTuple):
+    cpus: List[int]
+    memoria: str
+
+    @property
+    def tag(self) -> str:
+        """Lista de CPUs compacta, usada no nome da pasta bind-<política>@<tag>."""
+        return compactar_lista_cpus(self.cpus)
+
+
+def expandir_lista_cpus(lista: str) -> List[int]:
+    """Expande listas no formato do kernel ("0-3,8,10-11")."""
+    cpus = []
+    for parte in lista.split(","):
+        parte = parte.strip()
+        if not parte:
+            continue
+        if "-" in parte:
+            inicio, fim = parte.split("-", 1)
+            cpus.extend(range(int(inicio), int(fim) + 1))
+        else:
+            cpus.append(int(parte))
+    return cpus
+
+
+def compactar_lista_cpus(cpus: List[int]) -> str:
+    """Inverso de expandir_lista_cpus: [0, 1, 2, 3, 8] -> "0-3,8"."""
+    partes = []
+    ordenadas = sorted(set(cpus))
+    inicio = anterior = None
+    for cpu in ordenadas + [None]:
+        if cpu is not None and anterior is not None and cpu == anterior + 1:
+            anterior = cpu
+            continue
+        if inicio is not None:
+            partes.append(str(inicio) if inicio == anterior else f"{inicio}-{anterior}")
+        inicio = anterior = cpu
+    return ",".join(partes)
+
+
+def _ler_inteiro(caminho: Path, padrao: int) -> int:
+    try:
+        return int(caminho.read_text().strip())
+    except (OSError, ValueError):
+        return padrao
+
+
+@lru_cache(maxsize=None)
+def ler_topologia(raiz_sys: Path = RAIZ_SYS) -> List[CPU]:
+    """Uma entrada por CPU lógica online, ordenada pelo número da CPU."""
+    pasta_cpu = raiz_sys / "devices/system/cpu"
+    online = pasta_cpu / "online"
+    ativas = set(expandir_lista_cpus(online.read_text().strip())) if online.exists() else None
+
+    no_da_cpu = {}
+    for pasta_no in (raiz_sys / "devices/system/node").glob("node[0-9]*"):
+        lista = pasta_no / "cpulist"
+        if lista.exists():
+            for cpu in expandir_lista_cpus(lista.read_text().strip()):
+                no_da_cpu[cpu] = int(pasta_no.name[4:])
+
+    cpus = []
+    for pasta in pasta_cpu.glob("cpu[0-9]*"):
+        cpu = int(pasta.name[3:])
+        if ativas is not None and cpu not in ativas:
+            continue
+        socket = _ler_inteiro(pasta / "topology/physical_package_id", 0)
+        nucleo = _ler_inteiro(pasta / "topology/core_id", cpu)
+        cpus.append(CPU(cpu, socket, nucleo, no_da_cpu.get(cpu, 0)))
+    return sorted(cpus)
+
+
+def _por_socket(topologia: List[CPU]) -> dict:
+    """socket -> (primeiros irmãos de cada núcleo, demais irmãos), em ordem de CPU."""
+    sockets = {}
+    vistos = set()
+    for c in topologia:
+        fisicos, irmaos = sockets.setdefault(c.socket, ([], []))
+        if (c.socket, c.nucleo) in vistos:
+            irmaos.append(c)
+        else:
+            vistos.add((c.socket, c.nucleo))
+            fisicos.append(c)
+    return dict(sorted(sockets.items()))
+
+
+def _alternar(listas: List[List[CPU]]) -> List[CPU]:
+    """Round-robin entre as listas: a0, b0, a1, b1, ..."""
+    resultado = []
+    for i in range(max((len(l) for l in listas), default=0)):
+        resultado.extend(l[i] for l in listas if i < len(l))
+    return resultado
+
+
+def ordem_politica(topologia: List[CPU], politica: str, disable_ht: bool) -> List[CPU]:
+    """Todas as CPUs que a política pode usar, na ordem em que recebem threads."""
+    sockets = _por_socket(topologia)
+    if politica == "socket":
+        ordem = []
+        for fisicos, irmaos in sockets.values():
+            ordem.extend(fisicos if disable_ht else fisicos + irmaos)
+        return ordem
+    if politica == "cores":
+        return _alternar([fisicos for fisicos, _ in sockets.values()])
+    if politica == "interleave":
+        ordem = _alternar([fisicos for fisicos, _ in sockets.values()])
+        if not disable_ht:
+            ordem += _alternar([irmaos for _, irmaos in sockets.values()])
+        return ordem
+    raise ValueError(f"Política de posicionamento desconhecida: {politica}")
+
+
+def posicionar(topologia: List[CPU], politica: str, threads: int, disable_ht: bool) -> Posicionamento:
+    """CPUs (uma por thread, na ordem de colocação) e política de memória do numactl."""
+    ordem = ordem_politica(topologia, politica, disable_ht)
+    if threads > len(ordem):
+        raise ValueError(f"{threads} threads não cabem na política {politica} ({len(ordem)} CPUs disponíveis)")
+    escolhidas = ordem[:threads]
+    nos = ",".join(str(n) for n in sorted({c.no for c in escolhidas}))
+    if politica == "socket":
+        memoria = f"membind={nos}"
+    elif politica == "interleave":
+        memoria = f"interleave={nos}"
+    else:
+        memoria = "localalloc"
+    return Posicionamento([c.cpu for c in escolhidas], memoria)
+
+
+def posicionamento_local(politica: str, threads: int, disable_ht: bool, raiz_sys: Path = RAIZ_SYS) -> Posicionamento:
+    return posicionar(ler_topologia(raiz_sys), politica, threads, disable_ht)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mostra a lista de CPUs e a política de memória de uma run.")
+    parser.add_argument("--politica", choices=POLITICAS_TOPOLOGIA, required=True)
+    parser.add_argument("--threads", type=int, required=True)
+    parser.add_argument("--disable-ht", choices=["true", "false"], default="false")
+    parser.add_argument("--sys-root", type=Path, default=RAIZ_SYS)
+    args = parser.parse_args(argv)
+
+    topologia = ler_topologia(args.sys_root)
+    sockets = sorted({c.socket for c in topologia})
+    nos = sorted({c.no for c in topologia})
+    print(f"[INFO] {len(topologia)} CPUs lógicas, {len(sockets)} socket(s), {len(nos)} nó(s) NUMA")
+    try:
+        p = posicionar(topologia, args.politica, args.threads, args.disable_ht == "true")
+    except ValueError as e:
+        print(f"[ERRO] {e}")
+        return 1
+    print(f"CPU_LIST={','.join(map(str, p.cpus))}")
+    print(f"MEM_POLICY={p.memoria}")
+    print(f"BIND_DIR=bind-{args.politica}@{p.tag}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,142 +1,119 @@
 import pandas as pd
-import subprocess
 import time
-
-def setSequencialTime(dic_key):
-    df = pd.read_csv("unified_results.csv", sep=",")
-
-    csv_values = dic_key.split("_")
-    grafo = csv_values[0]
-    analise = csv_values[1]
-    ht = csv_values[3] == 'True'
-    bind = csv_values[4]
-
-    filtro = (df["GRAPH_NAME"] == grafo) & (df["ANALYSIS_TYPE"] == analise) & (df["DISABLE_HYPERTHREADING"] == ht) & (df["THREAD_BIND_POLICY"] == bind)
-    df_sequencial = df[filtro & (df["THREADS"] == 1)]
-
+from pathlib import Path
+
+from anomalias import gravar_reexecucao, marcar_anomalias
+from armazenamento import STORE_PADRAO, gravar_tabela
+from estatistica import intervalos_speedup
+from ingestao import caminho_cache_padrao, caminho_metrica, ingerir_reports
+from instrumentacao import etapa
+from pacote_runs import origem_runs
+
+# O store colunar é a saída principal; o CSV é mantido para os notebooks antigos
+EXPORTAR_CSV = True
+# Runs anômalas (ver anomalias.py), no formato de build_commad.py --reexecutar
+REEXECUTAR_CSV = "reexecutar.csv"
+
+# Colunas que identificam uma configuração no experiments.csv
+CHAVES_EXPERIMENTO = ["GRAPH_NAME", "ANALYSIS_TYPE", "THREADS", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY"]
+# Runs do executor.py --concorrente (CONCORRENTE) formam um grupo próprio de cada configuração
+CHAVES_CONFIG = CHAVES_EXPERIMENTO + ["CONCORRENTE"]
+# Mesma configuração sem o número de threads (base do tempo sequencial, do mesmo grupo)
+CHAVES_SEQUENCIAL = ["GRAPH_NAME", "ANALYSIS_TYPE", "DISABLE_HYPERTHREADING", "THREAD_BIND_POLICY", "CONCORRENTE"]
+
+def extrair_tempos(df_longo):
+    # hpc-performance, hotspots e performance-snapshot reportam o mesmo "Elapsed Time" no nível 0
+    filtro = (df_longo["METRIC_NAME"] == "Elapsed Time") & (df_longo["HIERARCHY_LEVEL"] == 0)
+    df_tempos = df_longo.loc[filtro, CHAVES_CONFIG + ["RUN", "METRIC_VALUE"]]
+    df_tempos = df_tempos.drop_duplicates(subset=CHAVES_CONFIG + ["RUN"], keep="first")
+    return df_tempos.rename(columns={"METRIC_VALUE": "ELAPSED_TIME"})
+
+def extrair_frequencias(df_longo):
+    # Frequência média do report, usada para detectar throttling (não existe no hotspots)
+    filtro = df_longo["METRIC_PATH"] == caminho_metrica("Elapsed Time", "Average CPU Frequency")
+    df_freq = df_longo.loc[filtro, CHAVES_CONFIG + ["RUN", "METRIC_VALUE"]]
+    df_freq = df_freq.drop_duplicates(subset=CHAVES_CONFIG + ["RUN"], keep="first")
+    return df_freq.rename(columns={"METRIC_VALUE": "AVERAGE_CPU_FREQUENCY"})
+
+def agregar_tempos(df_amostras):
+    # Média de todas as runs de cada configuração, calculada de uma vez
+    return df_amostras.groupby(CHAVES_CONFIG, as_index=False)["ELAPSED_TIME"].mean()
+
+def calcular_speedup_parallel_efficiency(df_tempos):
     # O tempo sequencial é o ELAPSED_TIME da configuração com 1 thread
-    tempo_sequencial = df_sequencial["ELAPSED_TIME"].values[0]
-    
-    # Atualizar SEQUENTIAL_TIME para todas as configurações desta combinação (grafo, analise, ht, bind)
-    df.loc[filtro, "SEQUENTIAL_TIME"] = tempo_sequencial
-    
-    df.to_csv("unified_results.csv", sep=",", index=False)
-
-def add_tempo_resultados(dic_key, tempo, contador_runs):
-    csv_values = dic_key.split("_")
-    grafo = csv_values[0]
-    analise = csv_values[1] 
-    threads = int(csv_values[2])
-    ht = csv_values[3] == 'True'
-    bind = csv_values[4]
-    df = pd.read_csv("unified_results.csv", sep=",")
-    filtro = (df["GRAPH_NAME"] == grafo) & (df["ANALYSIS_TYPE"] == analise)  & (df["THREADS"] == threads) & (df["THREAD_BIND_POLICY"] == bind) & (df["DISABLE_HYPERTHREADING"] == ht)
-
-    # Usar média ponderada correta
-    tempo_atual = df.loc[filtro, "ELAPSED_TIME"].values[0]
-    if tempo_atual == 0.0:
-        # Primeiro valor
-        df.loc[filtro, "ELAPSED_TIME"] = float(tempo)
-    else:
-        # Calcular média correta: (soma_anterior + novo_valor) / total_runs
-        # soma_anterior = tempo_atual * (contador_runs - 1)
-        soma_anterior = tempo_atual * (contador_runs - 1)
-        nova_soma = soma_anterior + float(tempo)
-        nova_media = nova_soma / contador_runs
-        df.loc[filtro, "ELAPSED_TIME"] = nova_media
-
-    df.to_csv("unified_results.csv", sep=",", index=False)
-
-def calcular_speedup_parallel_efficiency(dic_key):
-    csv_values = dic_key.split("_")
-    threads = int(csv_values[2])
-    grafo = csv_values[0]
-    analise = csv_values[1]
-    ht = csv_values[3] == 'True'
-    bind = csv_values[4]
-    df = pd.read_csv("unified_results.csv", sep=",")
-    filtro = (df["GRAPH_NAME"] == grafo) & (df["ANALYSIS_TYPE"] == analise)  & (df["THREADS"] == threads) & (df["THREAD_BIND_POLICY"] == bind) & (df["DISABLE_HYPERTHREADING"] == ht)
-    
-    sequential_time = df.loc[filtro, "SEQUENTIAL_TIME"].values[0]
-    elapsed_time = df.loc[filtro, "ELAPSED_TIME"].values[0]
-    speed_up = sequential_time / elapsed_time
-    parallel_efficiency = sequential_time / (threads * elapsed_time)
-
-    df.loc[filtro, "SPEEDUP"] = speed_up
-    df.loc[filtro, "PARALLEL_EFFICIENCY"] = parallel_efficiency
-
-    df.to_csv("Vtune_DISABLED_unified_results.csv", sep="," , index=False)
-
+    df_sequencial = df_tempos.loc[df_tempos["THREADS"] == 1, CHAVES_SEQUENCIAL + ["ELAPSED_TIME"]]
+    df_sequencial = df_sequencial.rename(columns={"ELAPSED_TIME": "SEQUENTIAL_TIME"})
+
+    df = df_tempos.merge(df_sequencial, on=CHAVES_SEQUENCIAL, how="left")
+    df["SPEEDUP"] = df["SEQUENTIAL_TIME"] / df["ELAPSED_TIME"]
+    df["PARALLEL_EFFICIENCY"] = df["SEQUENTIAL_TIME"] / (df["THREADS"] * df["ELAPSED_TIME"])
+    return df
+
+def unificar(df_longo, df_unified, store=STORE_PADRAO, reexecutar_csv=REEXECUTAR_CSV):
+    # Amostras por run (com ANOMALIA/MOTIVO) e resultados por configuração do
+    # experimento, já gravados no store. Usada pelo main e pelo bench_pipeline.py
+
+    # Runs anômalas ficam nas amostras (ANOMALIA, MOTIVO), mas fora das médias
+    with etapa("anomalias"):
+        df_amostras = extrair_tempos(df_longo).merge(
+            extrair_frequencias(df_longo), on=CHAVES_CONFIG + ["RUN"], how="left"
+        )
+        df_amostras = marcar_anomalias(df_amostras, CHAVES_CONFIG, "ELAPSED_TIME", "AVERAGE_CPU_FREQUENCY")
+        df_validas = df_amostras.loc[~df_amostras["ANOMALIA"]]
+        n_reexecutar = gravar_reexecucao(df_amostras, reexecutar_csv, vtune_enable=True)
+        print(f"Runs anômalas (fora das médias): {n_reexecutar}; lista em {reexecutar_csv}")
+
+    with etapa("speedup"):
+        df_resultados = calcular_speedup_parallel_efficiency(agregar_tempos(df_validas))
+        df_anomalas = df_amostras.groupby(CHAVES_CONFIG, as_index=False, observed=True)["ANOMALIA"].sum()
+        df_resultados = df_resultados.merge(
+            df_anomalas.rename(columns={"ANOMALIA": "N_RUNS_ANOMALAS"}), on=CHAVES_CONFIG, how="left"
+        )
+
+    # Intervalos de confiança (bootstrap) a partir das amostras por run
+    with etapa("intervalos"):
+        df_intervalos = intervalos_speedup(df_validas, CHAVES_CONFIG, CHAVES_SEQUENCIAL)
+        df_resultados = df_resultados.merge(df_intervalos, on=CHAVES_CONFIG, how="left")
+
+    # Junta os resultados às configurações do experimento; configurações sem runs ficam zeradas.
+    # Uma configuração com runs exclusivas e concorrentes ganha uma linha para cada grupo.
+    # Os intervalos ficam NaN (desconhecidos) quando não há runs válidas suficientes
+    colunas_resultado = ["ELAPSED_TIME", "SPEEDUP", "PARALLEL_EFFICIENCY", "SEQUENTIAL_TIME", "N_RUNS_ANOMALAS"]
+    colunas_intervalo = [c for c in df_intervalos.columns if c.endswith(("_CI_LOW", "_CI_HIGH"))]
+    df_unified = df_unified.merge(
+        df_resultados[CHAVES_CONFIG + colunas_resultado + colunas_intervalo], on=CHAVES_EXPERIMENTO, how="left"
+    )
+    df_unified["CONCORRENTE"] = df_unified["CONCORRENTE"].fillna(False).astype(bool)
+    df_unified[colunas_resultado] = df_unified[colunas_resultado].fillna(0.0)
+
+    # Grava as amostras por run e os agregados no store colunar
+    with etapa("gravacao"):
+        gravar_tabela(df_amostras, "amostras", store=store)
+        gravar_tabela(df_unified, "agregados", store=store)
+        print(f"Store atualizado em: {store}")
+    return df_amostras, df_unified
 
 def main():
     t0 = time.time()
-    # Copia o arquivo experiments.csv para unified_results.csv
-    subprocess.run(["cp", "experiments.csv", "unified_results.csv"])
-    df_unified = pd.read_csv("unified_results.csv", sep=",")
-    # Adiciona as colunas que conterão nossos resultados
-    df_unified["ELAPSED_TIME"] = float(0.0)
-    df_unified["SPEEDUP"] = float(0.0)
-    df_unified["PARALLEL_EFFICIENCY"] = float(0.0)
-    df_unified["SEQUENTIAL_TIME"] = float(0.0)
-    df_unified.to_csv("unified_results.csv", sep=",", index=False)
-
-    # Pega todos os arquivos report.csv
-    all_csv = subprocess.run([
-        "find", 
-        ".", 
-        "-regex", 
-        ".*/results/.*/run-.*/report.csv"
-    ], capture_output=True, text=True, check=True)
-
-    lista_arquivos = all_csv.stdout.strip().split('\n')
-
-    # 3780
-    print(f'Quantidade de arquivos de resultados: {len(lista_arquivos)}')
-    
-    # Contar runs por configuração
-    contador_runs = {}
-    
-    for arquivo in lista_arquivos:
-        arquivo = arquivo[2::]
-        arquivo_dir = arquivo.split("/")[1::]
-        grafo = arquivo_dir[0]
-        analise = arquivo_dir[1]
-        threads = int(arquivo_dir[2].split("-")[1])
-        ht_str = arquivo_dir[3].split("-")[1]
-        ht = ht_str == 'true'
-        bind = arquivo_dir[4].split("-")[1]
-        dic_key = f'{grafo}_{analise}_{threads}_{ht}_{bind}'
-        
-        # Contar este run
-        if dic_key not in contador_runs:
-            contador_runs[dic_key] = 0
-        contador_runs[dic_key] += 1
-        
-        df = pd.read_csv(arquivo, sep='\t', engine='python', header=0, on_bad_lines="skip")
-        
-        if(analise == 'hpc-performance'):
-            tempo = df[df["Metric Name"] == "Elapsed Time"]["Metric Value"].values[0]
-        elif(analise == 'hotspots'):
-            tempo = df[df["Metric Name"] == "Elapsed Time"]["Metric Value"].values[0]
-        elif(analise == 'performance-snapshot'):
-            tempo = df[df["Metric Name"] == "Elapsed Time"]["Metric Value"].values[0]
-
-        add_tempo_resultados(dic_key, tempo, contador_runs[dic_key])
-
-    # Calcular sequential time após processar todos os elapsed times
-    for dic_key in contador_runs:
-        csv_values = dic_key.split("_")
-        threads = int(csv_values[2])
-        if threads == 1:
-            setSequencialTime(dic_key)
-
-    # Calcular speedup e parallel efficiency
-    for dic_key in contador_runs:
-        calcular_speedup_parallel_efficiency(dic_key)
+    df_unified = pd.read_csv("experiments.csv", sep=",")
+
+    # Lê cada report uma única vez, em paralelo, e guarda as amostras em memória.
+    # O cache em SQLite ao lado de results/ evita reler os reports que não mudaram.
+    # Sem a pasta results/, lê do runs.pack (pacote_runs.py), se existir.
+    results_root = origem_runs(Path("results"))
+    with etapa("ingestao"):
+        df_longo = ingerir_reports(results_root, cache=caminho_cache_padrao(results_root))
+    print(f'Quantidade de arquivos de resultados: {df_longo.groupby(CHAVES_CONFIG + ["RUN"]).ngroups}')
+
+    _, df_unified = unificar(df_longo, df_unified)
+
+    # Escreve o CSV final uma única vez
+    if EXPORTAR_CSV:
+        with etapa("exportacao"):
+            df_unified.to_csv("unified_results.csv", sep=",", index=False)
 
     t1 = time.time()
     print(f"Tempo de execução: {t1 - t0} segundos")
 
 if __name__ == "__main__":
     main()
-
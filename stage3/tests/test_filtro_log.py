@@ -0,0 +1,99 @@
+"""
+Testes do filtro_log.py com um log real da etapa 2 (VTune ligado).
+
+Uso (a partir de stage3/):
+  python3 -m pytest -q tests
+"""
+
+import io
+import sys
+from pathlib import Path
+from typing import Tuple
+
+import pytest
+
+STAGE3 = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(STAGE3 / "src"))
+
+from filtro_log import FiltroLog  # noqa: E402
+
+LOG_STAGE2 = (
+    STAGE3.parent / "stage2" / "logs" / "web-BerkStan" / "performance-snapshot" / "threads-28"
+    / "ht-true" / "bind-close" / "run-3" / "pr_web-BerkStan_t28_3_20251004-221224.log"
+)
+
+
+def _filtrar(dados: bytes, tamanho_bloco: int) -> Tuple[FiltroLog, bytes]:
+    saida = io.BytesIO()
+    filtro = FiltroLog([saida])
+    for i in range(0, len(dados), tamanho_bloco):
+        filtro.alimentar(dados[i:i + tamanho_bloco])
+    filtro.finalizar()
+    return filtro, saida.getvalue()
+
+
+@pytest.fixture(scope="module")
+def log_stage2() -> bytes:
+    if not LOG_STAGE2.is_file():
+        pytest.skip(f"Log da etapa 2 não encontrado: {LOG_STAGE2}")
+    return LOG_STAGE2.read_bytes()
+
+
+@pytest.mark.parametrize("tamanho_bloco", [1 << 16, 4096, 7])
+def test_elapsed_depois_do_progresso(log_stage2, tamanho_bloco):
+    # "Elapsed Time: 1.637s" chega colado no último "Executing actions 75 %"
+    filtro, saida = _filtrar(log_stage2, tamanho_bloco)
+    assert filtro.run["VTUNE_ELAPSED_TIME"] == pytest.approx(1.637)
+    assert b"\nElapsed Time: 1.637s\n" in saida
+    assert b"vtune: Executing actions 75 % Generating a report\n" in saida
+
+
+def test_tempos_do_gapbs(log_stage2):
+    filtro, saida = _filtrar(log_stage2, 1 << 16)
+    assert filtro.run["AVERAGE_TIME"] == pytest.approx(0.03481)
+    assert filtro.run["NODES"] == 685231
+    assert len(filtro.trials) == 16
+    assert b"\r" not in saida
+    assert len(saida) < len(log_stage2)
+
+
+def test_reducao_do_volume(log_stage2):
+    # Dicas, avisos de símbolos e o corpo do resumo viram contagens no JSON.
+    # Este log cai ~9.6x (12310 -> 1281 bytes); os 3780 logs da etapa 2, ~10.9x
+    filtro, saida = _filtrar(log_stage2, 1 << 16)
+    assert len(log_stage2) / len(saida) >= 9
+    assert b" | " not in saida
+    assert b"Effective Logical Core Utilization" not in saida
+    assert filtro.estatisticas["DICAS_VTUNE"] == 12
+    assert filtro.estatisticas["LINHAS_RESUMO_VTUNE"] > 0
+    assert filtro.estatisticas["BYTES_SAIDA"] == len(saida)
+
+
+def test_manter_resumo_sem_dicas(log_stage2):
+    saida = io.BytesIO()
+    filtro = FiltroLog([saida], manter_resumo=True)
+    filtro.alimentar(log_stage2)
+    filtro.finalizar()
+    assert b"    Effective Physical Core Utilization: 25.6% (11.286 out of 44)\n" in saida.getvalue()
+    assert b" | " not in saida.getvalue()
+    assert filtro.estatisticas["LINHAS_RESUMO_VTUNE"] == 0
+
+
+def test_avisos_de_simbolos():
+    linhas = (
+        b"vtune: Executing actions 19 % Resolving information for `libgomp.so.1'\n"
+        b"vtune: Warning: Cannot locate debugging information for file `/lib/x86_64-linux-gnu/libgomp.so.1'.\n"
+        b"vtune: Executing actions 21 % Resolving information for `libtpsstool.so'\n"
+        b"vtune: Warning: Cannot locate debugging information for the Linux kernel.\n"
+        b"vtune: Error: algo deu errado\n"
+    )
+    filtro, saida = _filtrar(linhas, 1 << 16)
+    assert saida == b"vtune: Executing actions 21 % Resolving information for `libtpsstool.so'\nvtune: Error: algo deu errado\n"
+    assert filtro.estatisticas["AVISOS_SIMBOLOS"] == 2
+
+
+def test_progresso_sem_cauda():
+    linhas = b"vtune: Executing actions  0 % Finalizing results          \r\n"
+    filtro, saida = _filtrar(linhas, 1 << 16)
+    assert saida == b"vtune: Executing actions  0 % Finalizing results          \n"
+    assert "VTUNE_ELAPSED_TIME" not in filtro.run
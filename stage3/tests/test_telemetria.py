@@ -0,0 +1,115 @@
+"""
+Testes do telemetria.py com uma árvore falsa de /sys e /proc.
+
+Uso (a partir de stage3/):
+  python3 -m pytest -q tests
+"""
+
+import csv
+import os
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+STAGE3 = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(STAGE3 / "src"))
+
+import telemetria  # noqa: E402
+
+# user nice system idle iowait irq softirq steal
+STAT_INICIAL = (
+    "cpu  400 0 200 1600 0 0 0 0\n"
+    "cpu0 100 0 100 800 0 0 0 0\n"
+    "cpu1 100 0 100 800 0 0 0 0\n"
+    "intr 12345\n"
+)
+# cpu0: 150 de 300 ocupados (os 75 de iowait contam como ociosos) -> 0.5; cpu1 parada -> 0
+STAT_FINAL = (
+    "cpu  550 0 200 1775 75 0 0 0\n"
+    "cpu0 250 0 100 875 75 0 0 0\n"
+    "cpu1 100 0 100 900 0 0 0 0\n"
+    "intr 23456\n"
+)
+
+
+@pytest.fixture
+def raizes(tmp_path, monkeypatch):
+    """(raiz de /sys, raiz de /proc) com cpu0 a 2.4 GHz e cpu1 sem cpufreq."""
+    raiz_sys = tmp_path / "sys"
+    raiz_proc = tmp_path / "proc"
+    cpufreq = raiz_sys / "devices/system/cpu/cpu0/cpufreq"
+    cpufreq.mkdir(parents=True)
+    (cpufreq / "scaling_cur_freq").write_text("2400000\n")
+    (raiz_sys / "devices/system/cpu/cpu1").mkdir()
+    (raiz_sys / "devices/system/cpu/cpufreq").mkdir()
+    raiz_proc.mkdir()
+    (raiz_proc / "stat").write_text(STAT_INICIAL)
+    # Sem isso o próprio pytest ficaria com nice até o fim da sessão
+    monkeypatch.setattr(telemetria.os, "nice", lambda incremento: 0)
+    return raiz_sys, raiz_proc
+
+
+def _fds_abertos() -> List[str]:
+    return sorted(os.listdir("/proc/self/fd"))
+
+
+def _ler_saida(saida: Path) -> List[dict]:
+    with open(saida / telemetria.ARQUIVO_SAIDA, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_cpus_disponiveis(raizes):
+    raiz_sys, _ = raizes
+    assert telemetria.cpus_disponiveis(raiz_sys) == [0, 1]
+
+
+def test_frequencia_utilizacao_e_status(raizes, tmp_path):
+    raiz_sys, raiz_proc = raizes
+    # O comando reescreve o /proc/stat falso (mesmo inode, relido com pread) e sai com 3
+    comando = [
+        sys.executable, "-c",
+        f"import sys; open({str(raiz_proc / 'stat')!r}, 'w').write({STAT_FINAL!r}); sys.exit(3)",
+    ]
+    status = telemetria.main([
+        "--saida", str(tmp_path / "run-1"), "--intervalo", "5",
+        "--sys-root", str(raiz_sys), "--proc-root", str(raiz_proc), "--", *comando,
+    ])
+    assert status == 3
+
+    linhas = _ler_saida(tmp_path / "run-1")
+    assert [linha["CPU"] for linha in linhas] == ["0", "1"]
+    cpu0, cpu1 = linhas
+    assert cpu0["FREQ_MHZ"] == "2400"
+    assert cpu0["UTILIZACAO"] == "0.500"
+    assert cpu1["FREQ_MHZ"] == ""
+    assert cpu1["UTILIZACAO"] == "0.000"
+
+
+def test_sem_variacao_utilizacao_vazia(raizes, tmp_path):
+    raiz_sys, raiz_proc = raizes
+    status = telemetria.executar_com_telemetria(
+        [sys.executable, "-c", "pass"], tmp_path / "run-1", [0], 5, raiz_sys, raiz_proc,
+    )
+    assert status == 0
+    linhas = _ler_saida(tmp_path / "run-1")
+    assert linhas[-1]["FREQ_MHZ"] == "2400"
+    assert linhas[-1]["UTILIZACAO"] == ""
+
+
+def test_comando_inexistente(raizes, tmp_path, capsys):
+    raiz_sys, raiz_proc = raizes
+    antes = _fds_abertos()
+    status = telemetria.executar_com_telemetria(
+        [str(tmp_path / "nao-existe")], tmp_path / "run-1", [0, 1], 5, raiz_sys, raiz_proc,
+    )
+    assert status == 127
+    assert _fds_abertos() == antes
+    assert not (tmp_path / "run-1" / telemetria.ARQUIVO_SAIDA).exists()
+    assert "[ERRO]" in capsys.readouterr().err
+
+
+def test_uso_sem_comando(capsys):
+    assert telemetria.main(["--saida", "x", "--"]) == 2
+    assert "[ERRO] Uso" in capsys.readouterr().out
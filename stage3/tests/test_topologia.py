@@ -0,0 +1,121 @@
+"""
+Testes do topologia.py com uma árvore falsa de /sys (2 sockets, 2 núcleos por
+socket, HT ligado: 8 CPUs lógicas, numeradas como no kernel).
+
+Uso (a partir de stage3/):
+  python3 -m pytest -q tests
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+STAGE3 = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(STAGE3 / "src"))
+
+import topologia  # noqa: E402
+
+# CPU -> (socket, núcleo); 0-3 são os primeiros irmãos, 4-7 os irmãos de HT
+CPUS = {0: (0, 0), 1: (0, 1), 2: (1, 0), 3: (1, 1), 4: (0, 0), 5: (0, 1), 6: (1, 0), 7: (1, 1)}
+NOS = {0: "0-1,4-5", 1: "2-3,6-7"}
+
+
+def _criar_sys(raiz: Path, online: str = "0-7") -> Path:
+    pasta_cpu = raiz / "devices/system/cpu"
+    for cpu, (socket, nucleo) in CPUS.items():
+        topo = pasta_cpu / f"cpu{cpu}" / "topology"
+        topo.mkdir(parents=True)
+        (topo / "physical_package_id").write_text(f"{socket}\n")
+        (topo / "core_id").write_text(f"{nucleo}\n")
+    (pasta_cpu / "cpufreq").mkdir()
+    (pasta_cpu / "online").write_text(f"{online}\n")
+    for no, lista in NOS.items():
+        pasta_no = raiz / f"devices/system/node/node{no}"
+        pasta_no.mkdir(parents=True)
+        (pasta_no / "cpulist").write_text(f"{lista}\n")
+    return raiz
+
+
+@pytest.fixture
+def raiz_sys(tmp_path) -> Path:
+    return _criar_sys(tmp_path / "sys")
+
+
+def test_ler_topologia(raiz_sys):
+    topo = topologia.ler_topologia(raiz_sys)
+    assert [c.cpu for c in topo] == list(range(8))
+    assert topo[2] == topologia.CPU(cpu=2, socket=1, nucleo=0, no=1)
+    assert topo[5] == topologia.CPU(cpu=5, socket=0, nucleo=1, no=0)
+
+
+def test_cpus_offline_ficam_de_fora(tmp_path):
+    topo = topologia.ler_topologia(_criar_sys(tmp_path / "sys", online="0-6"))
+    assert [c.cpu for c in topo] == list(range(7))
+
+
+@pytest.mark.parametrize("threads, disable_ht, cpus, memoria", [
+    # Enche o socket 0 (núcleos físicos, depois os irmãos) antes do socket 1
+    (4, False, [0, 1, 4, 5], "membind=0"),
+    (6, False, [0, 1, 4, 5, 2, 3], "membind=0,1"),
+    (3, True, [0, 1, 2], "membind=0,1"),
+])
+def test_politica_socket(raiz_sys, threads, disable_ht, cpus, memoria):
+    p = topologia.posicionamento_local("socket", threads, disable_ht, raiz_sys)
+    assert p.cpus == cpus
+    assert p.memoria == memoria
+
+
+@pytest.mark.parametrize("disable_ht", [False, True])
+def test_politica_cores(raiz_sys, disable_ht):
+    # Só núcleos físicos, alternando os sockets, com ou sem HT
+    p = topologia.posicionamento_local("cores", 4, disable_ht, raiz_sys)
+    assert p.cpus == [0, 2, 1, 3]
+    assert p.memoria == "localalloc"
+    with pytest.raises(ValueError):
+        topologia.posicionamento_local("cores", 5, disable_ht, raiz_sys)
+
+
+def test_politica_interleave(raiz_sys):
+    p = topologia.posicionamento_local("interleave", 6, False, raiz_sys)
+    assert p.cpus == [0, 2, 1, 3, 4, 6]
+    assert p.memoria == "interleave=0,1"
+    assert p.tag == "0-4,6"
+    with pytest.raises(ValueError):
+        topologia.posicionamento_local("interleave", 5, True, raiz_sys)
+
+
+def test_politica_desconhecida(raiz_sys):
+    with pytest.raises(ValueError):
+        topologia.posicionamento_local("close", 2, False, raiz_sys)
+
+
+@pytest.mark.parametrize("cpus, lista", [
+    ([0, 1, 2, 3, 8], "0-3,8"),
+    ([8, 3, 2, 1, 0, 3], "0-3,8"),
+    ([5], "5"),
+    ([0, 2, 4], "0,2,4"),
+    ([10, 11, 20, 21, 22], "10-11,20-22"),
+    ([], ""),
+])
+def test_compactar_lista_cpus(cpus, lista):
+    assert topologia.compactar_lista_cpus(cpus) == lista
+    assert topologia.expandir_lista_cpus(lista) == sorted(set(cpus))
+
+
+def test_main_pasta_da_run(raiz_sys, capsys):
+    assert topologia.main(["--politica", "socket", "--threads", "3", "--disable-ht", "true",
+                           "--sys-root", str(raiz_sys)]) == 0
+    saida = capsys.readouterr().out
+    assert "[INFO] 8 CPUs lógicas, 2 socket(s), 2 nó(s) NUMA" in saida
+    assert "CPU_LIST=0,1,2\n" in saida
+    assert "BIND_DIR=bind-socket@0-2\n" in saida
+
+
+def test_ingestao_nao_carrega_o_executor():
+    # Ler reports só precisa das constantes de topologia.py, não do executor
+    codigo = "import sys, ingestao; print('executor' in sys.modules)"
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=STAGE3 / "src", check=True,
+                           capture_output=True, text=True).stdout
+    assert saida.strip() == "False"